@@ -0,0 +1,374 @@
+"""Build subroutines for the charstrings of CFF and CFF2 fonts.
+
+The charstrings are first flattened (see desubroutinize), and cut into
+"units": an operator together with the operands it takes, which can be
+moved into a subroutine without changing what the charstring draws. The
+sequences of units shared by several charstrings are then found with a
+suffix array of all charstrings, and the ones saving the most bytes are
+replaced by calls to new global subroutines.
+
+Usage::
+
+	from fontTools.cffLib.subroutinizer import subroutinize
+	subroutinize(font["CFF "].cff)
+
+The subroutines built do not call other subroutines. Hint masks, widths,
+'endchar' and 'vsindex' operators stay in the glyph charstrings.
+"""
+
+from fontTools.misc.py23 import *
+from fontTools.misc import psCharStrings
+import logging
+
+
+__all__ = ["desubroutinize", "subroutinize"]
+
+
+log = logging.getLogger(__name__)
+
+
+# Operators that only use and clear the operands preceding them, so that a
+# run of them can be moved into a subroutine ('blend' leaves its results on
+# the stack for the next operator, and is kept with it in the same unit).
+_movableOperators = frozenset([
+	'hstem', 'vstem', 'hstemhm', 'vstemhm',
+	'rmoveto', 'hmoveto', 'vmoveto',
+	'rlineto', 'hlineto', 'vlineto',
+	'rrcurveto', 'hhcurveto', 'vvcurveto', 'hvcurveto', 'vhcurveto',
+	'rcurveline', 'rlinecurve',
+	'flex', 'hflex', 'hflex1', 'flex1',
+])
+
+# Operators that stay in the glyph charstrings
+_fixedOperators = frozenset(['hintmask', 'cntrmask', 'endchar', 'vsindex'])
+
+# Estimated byte cost of a subroutine call (number and operator), and of
+# a subroutine itself besides its units ('return' and INDEX offset)
+_CALL_COST = 3
+_SUBR_COST = 3
+
+_MAX_SUBRS = 65535
+
+
+class _FlatteningT2Decompiler(psCharStrings.SimpleT2Decompiler):
+
+	"""Executes a charstring, recording its program with the subroutine
+	calls replaced by the subroutines' programs."""
+
+	def flatten(self, charString):
+		self.reset()
+		self.program = []
+		self.ended = False
+		self.execute(charString)
+		return self.program
+
+	def execute(self, charString):
+		self.callingStack.append(charString)
+		program = self.program
+		index = 0
+		while not self.ended:
+			token, isOperator, index = charString.getToken(index)
+			if token is None or token == 'return':
+				break
+			if not isOperator:
+				self.operandStack.append(token)
+				program.append(token)
+				continue
+			if token in ('callsubr', 'callgsubr'):
+				# drop the subroutine number, which the call pops
+				assert program and isinstance(program[-1], int), \
+						"computed subroutine numbers are not supported"
+				del program[-1]
+				getattr(self, "op_" + token)(index)
+				continue
+			program.append(token)
+			handler = getattr(self, "op_" + token, None)
+			if handler is not None:
+				rv = handler(index)
+				if rv:
+					hintMaskBytes, index = rv
+					program.append(hintMaskBytes)
+			else:
+				self.popall()
+			if token == 'endchar':
+				self.ended = True
+		del self.callingStack[-1]
+
+
+def _iterCharStrings(cff):
+	seen = set()
+	for fontName in cff.keys():
+		charStrings = cff[fontName].CharStrings
+		for glyphName in charStrings.keys():
+			charString = charStrings[glyphName]
+			if id(charString) in seen:
+				continue
+			seen.add(id(charString))
+			yield charString
+
+
+def _deleteSubrs(cff):
+	for fontName in cff.keys():
+		topDict = cff[fontName]
+		if hasattr(topDict, 'FDArray'):
+			privates = [fd.Private for fd in topDict.FDArray]
+		else:
+			privates = [topDict.Private]
+		for private in privates:
+			if hasattr(private, 'Subrs'):
+				del private.Subrs
+			if 'Subrs' in private.rawDict:
+				del private.rawDict['Subrs']
+	gsubrs = cff.GlobalSubrs
+	gsubrs.clear()
+	for attr in ('file', 'offsets'):
+		if hasattr(gsubrs, attr):
+			delattr(gsubrs, attr)
+
+
+def _hasSubrs(cff):
+	if len(cff.GlobalSubrs):
+		return True
+	for fontName in cff.keys():
+		topDict = cff[fontName]
+		if hasattr(topDict, 'FDArray'):
+			privates = [fd.Private for fd in topDict.FDArray]
+		else:
+			privates = [topDict.Private]
+		if any(getattr(private, 'Subrs', None) for private in privates):
+			return True
+	return False
+
+
+def desubroutinize(cff):
+	"""Replace the subroutine calls in all charstrings of the CFFFontSet
+	'cff' by the subroutines' programs, and delete all subroutines."""
+	for charString in _iterCharStrings(cff):
+		subrs = getattr(charString.private, "Subrs", [])
+		decompiler = _FlatteningT2Decompiler(
+			subrs, charString.globalSubrs, charString.private)
+		charString.setProgram(decompiler.flatten(charString))
+	_deleteSubrs(cff)
+
+
+def _splitUnits(program):
+	units = []
+	unit = []
+	i = 0
+	end = len(program)
+	while i < end:
+		token = program[i]
+		i += 1
+		unit.append(token)
+		if not isinstance(token, basestring):
+			continue
+		if token in ('hintmask', 'cntrmask'):
+			unit.append(program[i])
+			i += 1
+		if token != 'blend':
+			units.append(tuple(unit))
+			unit = []
+	if unit:
+		units.append(tuple(unit))
+	return units
+
+
+def _unitOperator(unit):
+	if len(unit) > 1 and unit[-2] in ('hintmask', 'cntrmask'):
+		return unit[-2]
+	op = unit[-1]
+	return op if isinstance(op, basestring) else None
+
+
+def _isMovable(unit):
+	return _unitOperator(unit) in _movableOperators
+
+
+def _unitSize(unit, opcodes=psCharStrings.T2CharString.opcodes):
+	size = 0
+	for token in unit:
+		if isinstance(token, basestring):
+			size += len(opcodes[token])
+		elif isinstance(token, int):
+			size += len(psCharStrings.encodeIntT2(token))
+		elif isinstance(token, float):
+			size += len(psCharStrings.encodeFixed(token))
+		else:
+			size += len(token)  # hint mask
+	return size
+
+
+def _suffixArray(seq, numSymbols):
+	"""Return the suffix array of 'seq', a list of ints in range(numSymbols),
+	and its inverse, by prefix doubling."""
+	n = len(seq)
+	rank = seq
+	sa = sorted(range(n), key=rank.__getitem__)
+	k = 1
+	while True:
+		base = max(numSymbols, n) + 1
+		shifted = rank[k:] + [-1] * min(k, n)
+		keys = [a * base + b + 1 for a, b in zip(rank, shifted)]
+		sa.sort(key=keys.__getitem__)
+		newRank = [0] * n
+		r = 0
+		prev = keys[sa[0]]
+		for i in sa:
+			key = keys[i]
+			if key != prev:
+				r += 1
+				prev = key
+			newRank[i] = r
+		rank = newRank
+		if r == n - 1:
+			return sa, rank
+		k *= 2
+
+
+def _lcpArray(seq, sa, rank):
+	"""Return the array of the longest common prefix length of each suffix
+	in 'sa' with the previous one (Kasai's algorithm)."""
+	n = len(seq)
+	lcp = [0] * n
+	h = 0
+	for i in range(n):
+		r = rank[i]
+		if r == 0:
+			h = 0
+			continue
+		j = sa[r - 1]
+		while i + h < n and j + h < n and seq[i + h] == seq[j + h]:
+			h += 1
+		lcp[r] = h
+		if h:
+			h -= 1
+	return lcp
+
+
+def _candidates(sa, lcp, sizes):
+	"""Yield a (savings, length, lb, rb) tuple for each run of units that
+	is repeated at the positions sa[lb:rb+1], and is estimated to save
+	bytes when moved to a subroutine."""
+	n = len(sa)
+	stack = [(0, 0)]
+	for i in range(1, n + 1):
+		cur = lcp[i] if i < n else 0
+		lb = i - 1
+		while cur < stack[-1][0]:
+			length, lb = stack.pop()
+			count = i - lb
+			start = sa[lb]
+			size = sizes[start + length] - sizes[start]
+			savings = count * (size - _CALL_COST) - size - _SUBR_COST
+			if savings > 0:
+				yield savings, length, lb, i - 1
+		if cur > stack[-1][0]:
+			stack.append((cur, lb))
+
+
+def subroutinize(cff, maxSubrs=_MAX_SUBRS):
+	"""Build global subroutines for the charstrings of the CFFFontSet 'cff'.
+
+	Existing subroutines are flattened into the charstrings first. Returns
+	the number of subroutines built, at most 'maxSubrs'.
+	"""
+	isCFF2 = cff.major > 1
+	if _hasSubrs(cff):
+		desubroutinize(cff)
+
+	charStrings = []
+	for charString in _iterCharStrings(cff):
+		charString.decompile()
+		charStrings.append(charString)
+
+	# Give each distinct movable unit a symbol; all other units, and the
+	# ends of charstrings, get a new symbol each so that they never match.
+	symbols = {}
+	unitsBySymbol = []
+	seq = []
+	sizes = [0]
+	starts = []
+	for charString in charStrings:
+		units = _splitUnits(charString.program)
+		starts.append(len(seq))
+		movable = all(_isMovable(u) or _unitOperator(u) in _fixedOperators
+			      for u in units)
+		for i, unit in enumerate(units):
+			if movable and _isMovable(unit) and (isCFF2 or i > 0):
+				symbol = symbols.get(unit)
+				if symbol is None:
+					symbol = symbols[unit] = len(unitsBySymbol)
+					unitsBySymbol.append(unit)
+			else:
+				symbol = len(unitsBySymbol)
+				unitsBySymbol.append(unit)
+			seq.append(symbol)
+			sizes.append(sizes[-1] + _unitSize(unitsBySymbol[symbol]))
+		seq.append(len(unitsBySymbol))
+		unitsBySymbol.append(None)
+		sizes.append(sizes[-1])
+	starts.append(len(seq))
+	if len(symbols) < 2:
+		return 0
+
+	sa, rank = _suffixArray(seq, len(unitsBySymbol))
+	lcp = _lcpArray(seq, sa, rank)
+
+	# Greedily pick the most profitable runs, and the positions where they
+	# don't overlap the runs picked before.
+	covered = bytearray(len(seq))
+	picked = []
+	for _, length, lb, rb in sorted(_candidates(sa, lcp, sizes), reverse=True):
+		positions = []
+		end = -1
+		for p in sorted(sa[lb:rb + 1]):
+			if p >= end and covered.find(1, p, p + length) == -1:
+				positions.append(p)
+				end = p + length
+		if len(positions) < 2:
+			continue
+		size = sizes[positions[0] + length] - sizes[positions[0]]
+		if len(positions) * (size - _CALL_COST) - size - _SUBR_COST <= 0:
+			continue
+		for p in positions:
+			covered[p:p + length] = b'\x01' * length
+		picked.append((positions, length))
+		if len(picked) == maxSubrs:
+			break
+
+	# Most used subroutines get the numbers that are shortest to encode.
+	picked.sort(key=lambda item: len(item[0]), reverse=True)
+	gsubrs = cff.GlobalSubrs
+	_deleteSubrs(cff)
+	bias = psCharStrings.calcSubrBias(picked)
+	calls = {}
+	for index, (positions, length) in enumerate(picked):
+		program = []
+		start = positions[0]
+		for symbol in seq[start:start + length]:
+			program.extend(unitsBySymbol[symbol])
+		if not isCFF2:
+			program.append('return')
+		gsubrs.append(psCharStrings.T2CharString(
+			program=program, globalSubrs=gsubrs))
+		for p in positions:
+			calls[p] = (index - bias, length)
+
+	for charString, start, end in zip(charStrings, starts, starts[1:]):
+		program = []
+		p = start
+		end -= 1  # skip the end symbol
+		while p < end:
+			call = calls.get(p)
+			if call is not None:
+				number, length = call
+				program.extend((number, 'callgsubr'))
+				p += length
+			else:
+				program.extend(unitsBySymbol[seq[p]])
+				p += 1
+		charString.setProgram(program)
+		charString.globalSubrs = gsubrs
+
+	log.info("Built %d global subroutines", len(picked))
+	return len(picked)
@@ -497,7 +497,8 @@ class FontBuilder(object):
             assert "cmap" in self.font, "the 'cmap' table must be setup before the 'OS/2' table"
             self.font["OS/2"].recalcUnicodeRanges(self.font)
 
-    def setupCFF(self, psName, fontInfo, charStringsDict, privateDict):
+    def setupCFF(self, psName, fontInfo, charStringsDict, privateDict,
+                 subroutinize=False):
         from .cffLib import CFFFontSet, TopDictIndex, TopDict, CharStrings, \
                 GlobalSubrsIndex, PrivateDict
 
@@ -540,7 +541,12 @@ class FontBuilder(object):
         self.font["CFF "] = newTable("CFF ")
         self.font["CFF "].cff = fontSet
 
-    def setupCFF2(self, charStringsDict, fdArrayList=None, regions=None):
+        if subroutinize:
+            from .cffLib import subroutinizer
+            subroutinizer.subroutinize(fontSet)
+
+    def setupCFF2(self, charStringsDict, fdArrayList=None, regions=None,
+                  subroutinize=False):
         from .cffLib import CFFFontSet, TopDictIndex, TopDict, CharStrings, \
                 GlobalSubrsIndex, PrivateDict, FDArrayIndex, FontDict
 
@@ -593,6 +599,10 @@ class FontBuilder(object):
         if regions:
             self.setupCFF2Regions(regions)
 
+        if subroutinize:
+            from .cffLib import subroutinizer
+            subroutinizer.subroutinize(fontSet)
+
     def setupCFF2Regions(self, regions):
         from .varLib.builder import buildVarRegionList, buildVarData, buildVarStore
         from .cffLib import VarStoreData
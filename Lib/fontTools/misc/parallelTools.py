@@ -0,0 +1,74 @@
+"""Tools for running tasks in a pool of worker processes."""
+
+from fontTools.misc.py23 import *
+import logging
+
+
+__all__ = ['parallelMap']
+
+
+log = logging.getLogger(__name__)
+
+
+# The function and initializer of the running parallelMap call; the forked
+# worker processes inherit them.
+_workerFunc = None
+_workerInitializer = None
+
+
+def _initWorker():
+	if _workerInitializer is not None:
+		_workerInitializer()
+
+
+def _callWorker(item):
+	return _workerFunc(item)
+
+
+def parallelMap(func, items, workers, chunksize=None, initializer=None):
+	"""Return the list of func(item) for each item in 'items'.
+
+	If 'workers' is greater than 1, the items are mapped by a pool of that
+	many processes, forked from this one. They inherit 'func', 'initializer'
+	and the objects these refer to, e.g. a font, which thus needn't be
+	pickled; but any changes made to them in the worker processes are lost.
+	The items and results must be picklable.
+
+	The items are handed to the processes in chunks of 'chunksize' items,
+	by default such that there are several chunks per process, to even out
+	the load. If not None, 'initializer' is called with no arguments in
+	each worker process when it starts.
+
+	This requires the 'fork' start method of the multiprocessing module;
+	elsewhere a warning is logged and the items are mapped serially.
+	"""
+	global _workerFunc, _workerInitializer
+
+	items = list(items)
+	if workers is None or workers < 2 or len(items) < 2:
+		return [func(item) for item in items]
+
+	import multiprocessing
+	try:
+		context = multiprocessing.get_context("fork")
+	except ValueError:
+		log.warning(
+			"running in parallel requires the 'fork' start method; "
+			"running serially")
+		return [func(item) for item in items]
+
+	workers = min(workers, len(items))
+	if chunksize is None:
+		chunksize = max(1, -(-len(items) // (workers * 4)))
+
+	saved = _workerFunc, _workerInitializer
+	_workerFunc, _workerInitializer = func, initializer
+	try:
+		pool = context.Pool(workers, initializer=_initWorker)
+		try:
+			return pool.map(_callWorker, items, chunksize=chunksize)
+		finally:
+			pool.terminate()
+			pool.join()
+	finally:
+		_workerFunc, _workerInitializer = saved
@@ -77,7 +77,8 @@ def pack(fmt, obj):
 def unpack(fmt, data, obj=None):
 	if obj is None:
 		obj = {}
-	data = tobytes(data)
+	if not isinstance(data, (bytes, memoryview)):
+		data = tobytes(data)
 	formatstring, names, fixes = getformat(fmt)
 	if isinstance(obj, dict):
 		d = obj
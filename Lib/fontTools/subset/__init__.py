@@ -9,13 +9,18 @@ from fontTools.ttLib.tables import otTables
 from fontTools.otlLib.maxContextCalc import maxCtxFont
 from fontTools.pens.basePen import NullPen
 from fontTools.misc.loggingTools import Timer
+from fontTools.misc.parallelTools import parallelMap
 from fontTools.subset.cff import *
 from fontTools.varLib import varStore
 import sys
 import struct
 import array
+import copy
+import itertools
 import logging
+import time
 from collections import Counter
+from contextlib import contextmanager
 from types import MethodType
 
 __usage__ = "pyftsubset font-file [glyph...] [--option=value]..."
@@ -121,6 +126,26 @@ Output options:
       The Zopfli Python bindings are available at:
       https://pypi.python.org/pypi/zopfli
 
+Batch options:
+  --batch=<path>
+      Produce one subset font per line of the given file, loading and
+      preparing the input font only once. Each line lists Unicode code
+      points like --unicodes does, optionally preceded by a name for the
+      slice and a colon; '#' starts a comment. Glyphs, glyph IDs, text and
+      Unicodes given on the command line are added to every slice.
+      Example file:
+        latin: U+0000-00FF, U+0131, U+0152-0153
+        latin-ext: U+0100-024F
+      Can't be combined with --output-file and --profile.
+  --output-dir=<path>
+      The directory batch outputs are written to. Defaults to the one of
+      the input font. Each slice is saved as font-file.<name>, using the
+      slice's line number when it has no name.
+  --workers=<number>
+      The number of processes subsetting batch slices concurrently.
+      Defaults to the number of CPUs. The processes are forked from the
+      one that prepared the font, and share it with it.
+
 Glyph set expansion:
   These options control how additional glyphs are added to the subset.
   --retain-gids
@@ -200,6 +225,14 @@ Optimization options:
       Also see note under --no-hinting.
   --no-desubroutinize [default]
       Leave CFF subroutinizes as is, only throw away unused subroutinizes.
+  --subroutinize
+      Build new CFF subroutines for the subset font, from the charstring
+      sequences shared by the retained glyphs, after desubroutinizing it.
+      Smaller subsets of big fonts usually come out smaller than when
+      keeping the original subroutines or desubroutinizing, at the cost of
+      some subsetting time.
+  --no-subroutinize [default]
+      Don't build new CFF subroutines.
 
 Font table options:
   --drop-tables[+|-]=<table>[,<table>...]
@@ -333,6 +366,14 @@ Application options:
       Display verbose information of the subsetting process.
   --timing
       Display detailed timing information of the subsetting process.
+  --profile=<path>
+      Write a JSON report of the subsetting process to the given file:
+      the time spent in each stage and on each table, the number of
+      glyphs added by closing the glyph set over each table, and the
+      sizes of the tables before and after subsetting. The sizes come
+      from compiling the subset tables once for the report, before the
+      font is compiled again to be saved, so profiling roughly doubles
+      the compile time.
   --xml
       Display the TTX XML representation of subsetted font.
 
@@ -390,14 +431,123 @@ def _list_subset(l, indices):
 	count = len(l)
 	return [l[i] for i in indices if i < count]
 
+_bitsToDigits = bytes.maketrans(b'\x00\x01', b'01')
+_digitsToBits = bytes.maketrans(b'01', b'\x00\x01')
+
+class _GlyphIDs(object):
+
+	"""Maps sets of glyph names of a font to bitmasks of their glyph IDs
+	and back, and caches the masks of the coverages and class definitions
+	of the font's (unmodified) tables.
+
+	The masks make the intersection of a glyph set with a coverage or a
+	class a single bitwise operation; see _GlyphIDSet.
+	"""
+
+	def __init__(self, font):
+		self.glyphOrder = font.getGlyphOrder()
+		self.reverse = font.getReverseGlyphMap()
+		self._masks = {}
+
+	def mask(self, glyphs):
+		"""Returns the bitmask of the glyph IDs of 'glyphs'. Glyphs not in
+		the glyph order are ignored."""
+		return self._mask(glyphs)[0]
+
+	def _mask(self, glyphs):
+		# One byte per glyph, turned into the binary digits of the mask
+		bits = bytearray(len(self.glyphOrder) + 1)
+		unknown = 0
+		for gid in map(self.reverse.get, glyphs):
+			if gid is None:
+				unknown += 1
+			else:
+				bits[gid] = 1
+		return int(bits[::-1].translate(_bitsToDigits), 2), unknown
+
+	def glyphs(self, mask):
+		"""Returns the list of glyphs in bitmask 'mask', in glyph order."""
+		bits = bin(mask)[:1:-1].encode('ascii').translate(_digitsToBits)
+		return list(itertools.compress(self.glyphOrder, bits))
+
+	def set(self, glyphs):
+		"""Returns a _GlyphIDSet of 'glyphs', or a plain frozenset if some
+		are not in the glyph order (e.g. names GSUB substitutes to that
+		are not in the font): their bits can't be in the mask."""
+		mask, unknown = self._mask(glyphs)
+		if unknown:
+			return frozenset(glyphs)
+		return _GlyphIDSet(self, mask, glyphs)
+
+	def coverage_mask(self, coverage):
+		"""Returns the mask of the glyphs in 'coverage', or None if some
+		are not in the glyph order."""
+		entry = self._masks.get(id(coverage))
+		if entry is None or entry[0] is not coverage.glyphs:
+			mask, unknown = self._mask(coverage.glyphs)
+			entry = (coverage.glyphs, None if unknown else mask)
+			self._masks[id(coverage)] = entry
+		return entry[1]
+
+	def class_masks(self, classDef):
+		"""Returns the mask of all glyphs in 'classDef', and a dict mapping
+		each class to the mask of its glyphs."""
+		entry = self._masks.get(id(classDef))
+		if entry is None or entry[0] is not classDef.classDefs:
+			classes = {}
+			for g,v in classDef.classDefs.items():
+				classes.setdefault(v, []).append(g)
+			classes = {v:self.mask(l) for v,l in classes.items()}
+			allMask = 0
+			for m in classes.values():
+				allMask |= m
+			entry = (classDef.classDefs, allMask, classes)
+			self._masks[id(classDef)] = entry
+		return entry[1], entry[2]
+
+class _GlyphIDSet(frozenset):
+
+	"""A frozenset of glyph names that also holds the bitmask of their
+	glyph IDs. The Coverage and ClassDef intersection methods use the mask
+	instead of looking up each glyph name when given one."""
+
+	def __new__(cls, glyphIDs, mask, glyphs=None):
+		if glyphs is None:
+			glyphs = glyphIDs.glyphs(mask)
+		self = frozenset.__new__(cls, glyphs)
+		self.glyphIDs = glyphIDs
+		self.mask = mask
+		return self
+
+def _coverage_matched(coverage, glyphs):
+	"""Returns True if all glyphs of 'coverage' are in 'glyphs', False if
+	none are, and None if only some are or it takes a look at each."""
+	if not isinstance(glyphs, _GlyphIDSet):
+		return None
+	mask = glyphs.glyphIDs.coverage_mask(coverage)
+	if mask is None:
+		return None
+	matched = mask & glyphs.mask
+	if not matched:
+		return False
+	if matched == mask:
+		return True
+	return None
+
 @_add_method(otTables.Coverage)
 def intersect(self, glyphs):
 	"""Returns ascending list of matching coverage values."""
+	matched = _coverage_matched(self, glyphs)
+	if matched is not None:
+		return list(range(len(self.glyphs))) if matched else []
 	return [i for i,g in enumerate(self.glyphs) if g in glyphs]
 
 @_add_method(otTables.Coverage)
 def intersect_glyphs(self, glyphs):
 	"""Returns set of intersecting glyphs."""
+	matched = _coverage_matched(self, glyphs)
+	if matched is not None:
+		return set(self.glyphs) if matched else set()
 	return set(g for g in self.glyphs if g in glyphs)
 
 @_add_method(otTables.Coverage)
@@ -415,6 +565,11 @@ def remap(self, coverage_map):
 @_add_method(otTables.ClassDef)
 def intersect(self, glyphs):
 	"""Returns ascending list of matching class values."""
+	if isinstance(glyphs, _GlyphIDSet):
+		allMask, classes = glyphs.glyphIDs.class_masks(self)
+		return _uniq_sort(
+			 ([0] if glyphs.mask & ~allMask else []) +
+				[v for v,m in classes.items() if m & glyphs.mask])
 	return _uniq_sort(
 		 ([0] if any(g not in self.classDefs for g in glyphs) else []) +
 			[v for g,v in self.classDefs.items() if g in glyphs])
@@ -423,6 +578,9 @@ def intersect(self, glyphs):
 def intersect_class(self, glyphs, klass):
 	"""Returns set of glyphs matching class."""
 	if klass == 0:
+		if isinstance(glyphs, _GlyphIDSet):
+			allMask, _ = glyphs.glyphIDs.class_masks(self)
+			return set(glyphs.glyphIDs.glyphs(glyphs.mask & ~allMask))
 		return set(g for g in glyphs if g not in self.classDefs)
 	return set(g for g,v in self.classDefs.items()
 		     if v == klass and g in glyphs)
@@ -555,6 +713,11 @@ def prune_post_subset(self, font, options):
 
 @_add_method(otTables.PairPos)
 def subset_glyphs(self, s):
+	index = s.subset_indexes.get('GPOS')
+	if index is not None:
+		retain = index.subset_glyphs(self, s)
+		if retain is not None:
+			return retain
 	if self.Format == 1:
 		indices = self.Coverage.subset(s.glyphs)
 		pairs = self.PairSet
@@ -583,6 +746,147 @@ def subset_glyphs(self, s):
 	else:
 		assert 0, "unknown format: %s" % self.Format
 
+class PairPosIndex(object):
+
+	"""Subsets the PairPos subtables of (copies of) a 'GPOS' table without
+	decompiling them.
+
+	The index is built from a lazily loaded 'GPOS' table. It decompiles
+	each PairPos subtable once, and keeps its coverage, class definitions
+	and pair values by the subtable's offset in the table data. A PairPos
+	subtable of a table loaded lazily from the same data is then subset
+	by building its coverage, class definitions and remaining rows and
+	columns of values from the index, in time proportional to the subset
+	glyph set and the values kept, rather than by decompiling the whole
+	kerning matrix of each subset. The value records kept are copied, as
+	subsetting modifies their device tables in place (e.g. when remapping
+	the variation indices of the 'GDEF' VarStore).
+
+	PreparedFont indexes its 'GPOS' table this way.
+	"""
+
+	def __init__(self, table):
+		self.subtables = {}
+		lookupList = table.LookupList
+		if not lookupList:
+			return
+		for lookup in lookupList.Lookup:
+			if not lookup or lookup.LookupType not in (2, 9):
+				continue
+			for st in lookup.SubTable:
+				if not st: continue
+				if lookup.LookupType == 9:
+					if st.ExtensionLookupType != 2:
+						continue
+					st = st.ExtSubTable
+				reader = st.__dict__.get('reader')
+				if reader is None:
+					continue
+				self.subtables[reader.offset] = self._index_subtable(st)
+
+	@staticmethod
+	def _index_subtable(st):
+		entry = {
+			'Format': st.Format,
+			'ValueFormat1': st.ValueFormat1,
+			'ValueFormat2': st.ValueFormat2,
+			'Coverage': st.Coverage.glyphs,
+			'CoverageIndex': {g:i for i,g in enumerate(st.Coverage.glyphs)},
+		}
+		if st.Format == 1:
+			entry['PairSet'] = [p.PairValueRecord for p in st.PairSet]
+		elif st.Format == 2:
+			entry['ClassDef1'] = st.ClassDef1.classDefs
+			entry['ClassDef2'] = st.ClassDef2.classDefs
+			entry['Class1Count'] = st.Class1Count
+			entry['Class2Count'] = st.Class2Count
+			entry['Class1Record'] = [c.Class2Record for c in st.Class1Record]
+		else:
+			return None
+		return entry
+
+	def subset_glyphs(self, st, s):
+		"""Subset the PairPos subtable 'st' to s.glyphs if it is indexed and
+		not yet decompiled, and return whether it is to be retained;
+		otherwise return None."""
+		reader = st.__dict__.get('reader')
+		if reader is None:
+			return None
+		entry = self.subtables.get(reader.offset)
+		if entry is None:
+			return None
+		del st.reader, st.font
+		glyphs = s.glyphs
+
+		st.Format = entry['Format']
+		st.ValueFormat1 = entry['ValueFormat1']
+		st.ValueFormat2 = entry['ValueFormat2']
+		covGlyphs = entry['Coverage']
+		if len(glyphs) < len(covGlyphs):
+			covIndex = entry['CoverageIndex']
+			indices = sorted(covIndex[g] for g in glyphs if g in covIndex)
+		else:
+			indices = [i for i,g in enumerate(covGlyphs) if g in glyphs]
+		st.Coverage = otTables.Coverage()
+
+		if st.Format == 1:
+			pairSets = []
+			kept = []
+			for i in indices:
+				records = [r for r in entry['PairSet'][i] if r.SecondGlyph in glyphs]
+				if not records: continue
+				records = copy.deepcopy(records)
+				pairSet = otTables.PairSet()
+				pairSet.PairValueRecord = records
+				pairSet.PairValueCount = len(records)
+				pairSets.append(pairSet)
+				kept.append(covGlyphs[i])
+			st.Coverage.glyphs = kept
+			st.PairSet = pairSets
+			st.PairSetCount = len(pairSets)
+			return bool(st.PairSetCount)
+
+		st.Coverage.glyphs = [covGlyphs[i] for i in indices]
+		st.ClassDef1 = otTables.ClassDef()
+		st.ClassDef2 = otTables.ClassDef()
+		class1_map = [c for c in self._subset_classes(st.ClassDef1, entry['ClassDef1'], glyphs)
+			      if c < entry['Class1Count']]
+		class2_map = [c for c in self._subset_classes(st.ClassDef2, entry['ClassDef2'], glyphs)
+			      if c < entry['Class2Count']]
+		rows = entry['Class1Record']
+		st.Class1Record = []
+		for i in class1_map:
+			record = otTables.Class1Record()
+			row = rows[i]
+			record.Class2Record = copy.deepcopy([row[j] for j in class2_map])
+			st.Class1Record.append(record)
+		st.Class1Count = len(class1_map)
+		st.Class2Count = len(class2_map)
+		return bool(st.Class1Count and
+			    st.Class2Count and
+			    st.Coverage.glyphs)
+
+	@staticmethod
+	def _subset_classes(classDef, classDefs, glyphs):
+		# Like ClassDef.subset(glyphs, remap=True), from the smaller of the
+		# glyph set and the class definitions
+		if len(glyphs) < len(classDefs):
+			subset = {g:classDefs[g] for g in glyphs if g in classDefs}
+			indices = sorted(set(classDefs.get(g, 0) for g in glyphs))
+		else:
+			subset = {g:v for g,v in classDefs.items() if g in glyphs}
+			indices = _uniq_sort(
+				 ([0] if any(g not in classDefs for g in glyphs) else []) +
+					list(subset.values()))
+		classDef.classDefs = subset
+		classDef.remap(indices)
+		return indices
+
+@_add_method(ttLib.getTableClass('GPOS'))
+def build_subset_index(self):
+	"""Return a PairPosIndex for subsetting copies of this table."""
+	return PairPosIndex(self.table)
+
 @_add_method(otTables.PairPos)
 def prune_post_subset(self, font, options):
 	if not options.hinting:
@@ -722,6 +1026,51 @@ def prune_post_subset(self, font, options):
 						m.prune_hints()
 		return True
 
+@_add_method(otTables.SingleSubst,
+			 otTables.MultipleSubst)
+def closure_input_glyphs(self):
+	return set(self.mapping)
+
+@_add_method(otTables.AlternateSubst)
+def closure_input_glyphs(self):
+	return set(self.alternates)
+
+@_add_method(otTables.LigatureSubst)
+def closure_input_glyphs(self):
+	glyphs = set(self.ligatures)
+	for seqs in self.ligatures.values():
+		for seq in seqs:
+			glyphs.update(seq.Component)
+	return glyphs
+
+@_add_method(otTables.ReverseChainSingleSubst)
+def closure_input_glyphs(self):
+	if self.Format != 1:
+		return None
+	glyphs = set(self.Coverage.glyphs)
+	for c in self.LookAheadCoverage + self.BacktrackCoverage:
+		glyphs.update(c.glyphs)
+	return glyphs
+
+@_add_method(otTables.SingleSubst)
+def closure_mapping(self):
+	return {g:(v,) for g,v in self.mapping.items()}
+
+@_add_method(otTables.MultipleSubst)
+def closure_mapping(self):
+	return self.mapping
+
+@_add_method(otTables.AlternateSubst)
+def closure_mapping(self):
+	return self.alternates
+
+@_add_method(otTables.LigatureSubst,
+			 otTables.ReverseChainSingleSubst,
+			 otTables.ContextSubst,
+			 otTables.ChainContextSubst)
+def closure_mapping(self):
+	return None
+
 @_add_method(otTables.SingleSubst,
 			 otTables.MultipleSubst,
 			 otTables.AlternateSubst,
@@ -996,6 +1345,47 @@ def closure_glyphs(self, s, cur_glyphs):
 	else:
 		assert 0, "unknown format: %s" % self.Format
 
+@_add_method(otTables.ContextSubst,
+			 otTables.ChainContextSubst)
+def closure_input_glyphs(self):
+	c = self.__subset_classify_context()
+	if c is None:
+		return None
+
+	if self.Format == 1:
+		glyphs = set(c.Coverage(self).glyphs)
+		for rs in getattr(self, c.RuleSet):
+			if not rs: continue
+			for r in getattr(rs, c.Rule):
+				if not r: continue
+				for glist in c.RuleData(r):
+					glyphs.update(glist)
+		return glyphs
+	elif self.Format == 2:
+		glyphs = set(c.Coverage(self).glyphs)
+		ContextData = c.ContextData(self)
+		classes = [set() for _ in ContextData]
+		for rs in getattr(self, c.RuleSet):
+			if not rs: continue
+			for r in getattr(rs, c.Rule):
+				if not r: continue
+				for klasses,klist in zip(classes, c.RuleData(r)):
+					klasses.update(klist)
+		for cd,klasses in zip(ContextData, classes):
+			if 0 in klasses:
+				# Class 0 matches any glyph not in the ClassDef
+				return None
+			if cd:
+				glyphs.update(g for g,v in cd.classDefs.items() if v in klasses)
+		return glyphs
+	elif self.Format == 3:
+		glyphs = set()
+		for cov in c.RuleData(self):
+			glyphs.update(cov.glyphs)
+		return glyphs
+	else:
+		assert 0, "unknown format: %s" % self.Format
+
 @_add_method(otTables.ContextSubst,
 			 otTables.ContextPos,
 			 otTables.ChainContextSubst,
@@ -1124,6 +1514,20 @@ def closure_glyphs(self, s, cur_glyphs):
 	else:
 		assert 0, "unknown format: %s" % self.Format
 
+@_add_method(otTables.ExtensionSubst)
+def closure_input_glyphs(self):
+	if self.Format == 1:
+		return self.ExtSubTable.closure_input_glyphs()
+	else:
+		assert 0, "unknown format: %s" % self.Format
+
+@_add_method(otTables.ExtensionSubst)
+def closure_mapping(self):
+	if self.Format == 1:
+		return self.ExtSubTable.closure_mapping()
+	else:
+		assert 0, "unknown format: %s" % self.Format
+
 @_add_method(otTables.ExtensionSubst)
 def may_have_non_1to1(self):
 	if self.Format == 1:
@@ -1178,10 +1582,52 @@ def closure_glyphs(self, s, cur_glyphs=None):
 		return
 	covered.update(cur_glyphs)
 
+	closure = getattr(s, '_gsubClosure', None)
+	mapping = closure.mappings.get(key) if closure is not None else None
+	if mapping is not None:
+		if len(cur_glyphs) > len(mapping):
+			for g,v in mapping.items():
+				if g in cur_glyphs:
+					s.glyphs.update(v)
+		else:
+			for g in cur_glyphs:
+				if g in mapping:
+					s.glyphs.update(mapping[g])
+		return
+
 	for st in self.SubTable:
 		if not st: continue
 		st.closure_glyphs(s, cur_glyphs)
 
+@_add_method(otTables.Lookup)
+def closure_input_glyphs(self):
+	"""Returns the set of glyphs whose presence in the subset the closure
+	over this lookup's own subtables depends on, or None if it may depend
+	on any glyph."""
+	glyphs = set()
+	for st in self.SubTable:
+		if not st: continue
+		st_glyphs = st.closure_input_glyphs()
+		if st_glyphs is None:
+			return None
+		glyphs.update(st_glyphs)
+	return glyphs
+
+@_add_method(otTables.Lookup)
+def closure_mapping(self):
+	"""Returns a dict mapping each input glyph to the set of glyphs it
+	is substituted by, or None if the lookup is not a plain one-to-many
+	substitution (i.e. its closure depends on more than one glyph)."""
+	mapping = {}
+	for st in self.SubTable:
+		if not st: continue
+		st_mapping = st.closure_mapping()
+		if st_mapping is None:
+			return None
+		for g,v in st_mapping.items():
+			mapping.setdefault(g, set()).update(v)
+	return mapping
+
 @_add_method(otTables.Lookup)
 def subset_glyphs(self, s):
 	self.SubTable = [st for st in self.SubTable if st and st.subset_glyphs(s)]
@@ -1410,6 +1856,90 @@ def subset_glyphs(self, s):
 
 	return True
 
+class GSUBClosure(object):
+
+	"""Closes glyph sets over the lookups of a 'GSUB' table by semi-naive
+	evaluation: after a first pass over all lookups, a lookup is only run
+	again if glyphs it depends on (its "triggers") were added to the set
+	during the previous pass.
+
+	The triggers of a lookup are the glyphs in its coverages, class
+	definitions, ligature components and contexts, plus those of the
+	lookups it calls. Lookups matching class 0 (any glyph) in a context
+	are triggered by any new glyph. For single, multiple and alternate
+	substitution lookups, the glyphs each input glyph is substituted by are
+	memoized, and later passes only look up the newly added glyphs.
+
+	Each pass runs the lookups on a snapshot of the glyph set holding
+	its glyph ID bitmask (see _GlyphIDSet), against which the coverages
+	and class definitions of their subtables are tested with bitwise
+	operations.
+
+	Neither depends on the glyph set being closed, so one GSUBClosure can
+	be used for any number of subsets; see PreparedFont.
+	"""
+
+	def __init__(self, table):
+		lookupList = table.LookupList
+		self.lookups = list(lookupList.Lookup) if lookupList else []
+		self.mappings = {}
+		for lookup in self.lookups:
+			if not lookup: continue
+			mapping = lookup.closure_mapping()
+			if mapping is not None:
+				self.mappings[id(lookup)] = mapping
+		self.triggers = {}
+		for i in range(len(self.lookups)):
+			self._collect_triggers(i, set())
+
+	def _collect_triggers(self, i, visiting):
+		if i in self.triggers:
+			return self.triggers[i]
+		if i >= len(self.lookups) or i in visiting:
+			# Dangling or recursive lookup reference; always run
+			return None
+		lookup = self.lookups[i]
+		if not lookup:
+			self.triggers[i] = frozenset()
+			return self.triggers[i]
+		visiting.add(i)
+		glyphs = lookup.closure_input_glyphs()
+		if glyphs is not None:
+			for j in lookup.collect_lookups():
+				nested = self._collect_triggers(j, visiting)
+				if nested is None:
+					glyphs = None
+					break
+				glyphs.update(nested)
+		visiting.remove(i)
+		self.triggers[i] = frozenset(glyphs) if glyphs is not None else None
+		return self.triggers[i]
+
+	def close_glyphs(self, s, lookup_indices):
+		"""Add to s.glyphs all glyphs reachable from it through the given
+		lookups and the lookups they call."""
+		glyphIDs = s.glyph_ids
+		lookups = [(i, self.lookups[i]) for i in lookup_indices
+			   if i < len(self.lookups) and self.lookups[i]]
+		cur_glyphs = new_glyphs = glyphIDs.set(s.glyphs)
+		while new_glyphs:
+			for i,lookup in lookups:
+				triggers = self.triggers[i]
+				if triggers is not None and triggers.isdisjoint(new_glyphs):
+					continue
+				if id(lookup) in self.mappings:
+					# Only the new glyphs can map to anything not added yet
+					lookup.closure_glyphs(s, cur_glyphs=new_glyphs)
+				else:
+					lookup.closure_glyphs(s, cur_glyphs=cur_glyphs)
+			orig_glyphs = cur_glyphs
+			cur_glyphs = glyphIDs.set(s.glyphs)
+			if isinstance(cur_glyphs, _GlyphIDSet):
+				# Then so is orig_glyphs, a subset of it
+				new_glyphs = _GlyphIDSet(glyphIDs, cur_glyphs.mask & ~orig_glyphs.mask)
+			else:
+				new_glyphs = cur_glyphs - orig_glyphs
+
 @_add_method(ttLib.getTableClass('GSUB'))
 def closure_glyphs(self, s):
 	s.table = self.table
@@ -1425,18 +1955,21 @@ def closure_glyphs(self, s):
 		lookup_indices += self.table.FeatureVariations.collect_lookups(feature_indices)
 	lookup_indices = _uniq_sort(lookup_indices)
 	if self.table.LookupList:
+		closure = s.closure_indexes.get('GSUB')
+		if closure is None:
+			closure = self.build_closure_index()
 		s._doneLookups = {}
-		while True:
-			orig_glyphs = frozenset(s.glyphs)
-			for i in lookup_indices:
-				if i >= self.table.LookupList.LookupCount: continue
-				if not self.table.LookupList.Lookup[i]: continue
-				self.table.LookupList.Lookup[i].closure_glyphs(s)
-			if orig_glyphs == s.glyphs:
-				break
+		s._gsubClosure = closure
+		closure.close_glyphs(s, lookup_indices)
+		del s._gsubClosure
 		del s._doneLookups
 	del s.table
 
+@_add_method(ttLib.getTableClass('GSUB'))
+def build_closure_index(self):
+	"""Return a GSUBClosure for closing glyph sets over this table."""
+	return GSUBClosure(self.table)
+
 @_add_method(ttLib.getTableClass('GSUB'),
 	     ttLib.getTableClass('GPOS'))
 def subset_glyphs(self, s):
@@ -1753,6 +2286,12 @@ def subset_glyphs(self, s):
 		self.metrics[g] = (0,0)
 	return True # Required table
 
+@_add_method(ttLib.getTableClass('hmtx')) # also used by 'vmtx'
+def copy_for_subset(self, s):
+	table = copy.copy(self)
+	table.metrics = _dict_subset(self.metrics, s.glyphs_retained)
+	return table
+
 @_add_method(ttLib.getTableClass('hdmx'))
 def subset_glyphs(self, s):
 	self.hdmx = {sz:_dict_subset(l, s.glyphs) for sz,l in self.hdmx.items()}
@@ -1929,6 +2468,10 @@ def prune_pre_subset(self, font, options):
 		self.formatType = 3.0
 	return True # Required table
 
+@_add_method(ttLib.getTableClass('post'))
+def copy_for_subset(self, s):
+	return copy.copy(self)
+
 @_add_method(ttLib.getTableClass('post'))
 def subset_glyphs(self, s):
 	self.extraNames = []	# This seems to do it
@@ -1955,16 +2498,9 @@ def subset_glyphs(self, s):
 		assert False, "unknown 'prop' format %s" % prop.Format
 
 @_add_method(ttLib.getTableClass('COLR'))
-def closure_glyphs(self, s):
-	decompose = s.glyphs
-	while decompose:
-		layers = set()
-		for g in decompose:
-			for l in self.ColorLayers.get(g, []):
-				layers.add(l.name)
-		layers -= s.glyphs
-		s.glyphs.update(layers)
-		decompose = layers
+def closure_dependencies(self, index=None):
+	colorLayers = self.ColorLayers
+	return lambda g: [l.name for l in colorLayers.get(g, ())]
 
 @_add_method(ttLib.getTableClass('COLR'))
 def subset_glyphs(self, s):
@@ -1987,26 +2523,24 @@ def closure_glyphs(self, glyphs):
 	return variants
 
 @_add_method(otTables.MathVariants)
-def closure_glyphs(self, s):
-	glyphs = frozenset(s.glyphs)
-	variants = set()
-
-	if self.VertGlyphCoverage:
-		indices = self.VertGlyphCoverage.intersect(glyphs)
-		for i in indices:
-			variants.update(self.VertGlyphConstruction[i].closure_glyphs(glyphs))
-
-	if self.HorizGlyphCoverage:
-		indices = self.HorizGlyphCoverage.intersect(glyphs)
-		for i in indices:
-			variants.update(self.HorizGlyphConstruction[i].closure_glyphs(glyphs))
-
-	s.glyphs.update(variants)
+def closure_dependencies(self):
+	dependencies = {}
+	for coverage,constructions in (
+			(self.VertGlyphCoverage, self.VertGlyphConstruction),
+			(self.HorizGlyphCoverage, self.HorizGlyphConstruction)):
+		if not coverage:
+			continue
+		for g,construction in zip(coverage.glyphs, constructions):
+			dependencies.setdefault(g, set()).update(
+				construction.closure_glyphs(None))
+	return {g:sorted(v) for g,v in dependencies.items()}
 
 @_add_method(ttLib.getTableClass('MATH'))
-def closure_glyphs(self, s):
+def closure_dependencies(self, index=None):
+	dependencies = {}
 	if self.table.MathVariants:
-		self.table.MathVariants.closure_glyphs(s)
+		dependencies = self.table.MathVariants.closure_dependencies()
+	return lambda g: dependencies.get(g, ())
 
 @_add_method(otTables.MathItalicsCorrectionInfo)
 def subset_glyphs(self, s):
@@ -2090,21 +2624,31 @@ def remapComponentsFast(self, glyphidmap):
 
 	self.data = data.tobytes()
 
+@_add_method(ttLib.getTableClass('loca'))
+def copy_for_subset(self, s):
+	# Rebuilt from 'glyf' upon compiling
+	return ttLib.newTable('loca')
+
 @_add_method(ttLib.getTableClass('glyf'))
-def closure_glyphs(self, s):
+def build_closure_index(self):
+	"""Return a dict mapping composite glyphs to their component names."""
+	index = {}
+	for g,gl in self.glyphs.items():
+		components = gl.getComponentNames(self)
+		if components:
+			index[g] = components
+	return index
+
+@_add_method(ttLib.getTableClass('glyf'))
+def closure_dependencies(self, index=None):
+	if index is not None:
+		return lambda g: index.get(g, ())
 	glyphSet = self.glyphs
-	decompose = s.glyphs
-	while decompose:
-		components = set()
-		for g in decompose:
-			if g not in glyphSet:
-				continue
-			gl = glyphSet[g]
-			for c in gl.getComponentNames(self):
-				components.add(c)
-		components -= s.glyphs
-		s.glyphs.update(components)
-		decompose = components
+	def dependencies(g):
+		if g not in glyphSet:
+			return ()
+		return glyphSet[g].getComponentNames(self)
+	return dependencies
 
 @_add_method(ttLib.getTableClass('glyf'))
 def prune_pre_subset(self, font, options):
@@ -2132,6 +2676,15 @@ def subset_glyphs(self, s):
 	# Don't drop empty 'glyf' tables, otherwise 'loca' doesn't get subset.
 	return True
 
+@_add_method(ttLib.getTableClass('glyf'))
+def copy_for_subset(self, s):
+	# Glyphs are copied as they are modified in place when subsetting, but
+	# their compact data is shared
+	table = copy.copy(self)
+	table.glyphs = {g:copy.copy(self.glyphs[g]) for g in s.glyphs_retained
+			if g in self.glyphs}
+	return table
+
 @_add_method(ttLib.getTableClass('glyf'))
 def prune_post_subset(self, font, options):
 	remove_hinting = not options.hinting
@@ -2140,8 +2693,38 @@ def prune_post_subset(self, font, options):
 	return True
 
 
+@_add_method(ttLib.getTableClass('cmap'))
+def build_closure_index(self):
+	"""Return a dict mapping each Unicode to the glyphs it maps to in any
+	Unicode subtable (including variation sequences), and the set of
+	Unicodes mapped by the non-UVS subtables."""
+	mapping = {}
+	covered = set()
+	for table in self.tables:
+		if not table.isUnicode():
+			continue
+		if table.format == 14:
+			for cmap in table.uvsDict.values():
+				for u,g in cmap:
+					if g is not None:
+						mapping.setdefault(u, set()).add(g)
+		else:
+			for u,g in table.cmap.items():
+				mapping.setdefault(u, set()).add(g)
+		covered.update(table.cmap)
+	return mapping, covered
+
 @_add_method(ttLib.getTableClass('cmap'))
 def closure_glyphs(self, s):
+	index = s.closure_indexes.get('cmap')
+	if index is not None:
+		mapping, covered = index
+		for u in s.unicodes_requested:
+			if u in mapping:
+				s.glyphs.update(mapping[u])
+		s.unicodes_missing = s.unicodes_requested - covered
+		return
+
 	tables = [t for t in self.tables if t.isUnicode()]
 
 	# Close glyphs
@@ -2175,6 +2758,12 @@ def prune_pre_subset(self, font, options):
 	self.numSubTables = len(self.tables)
 	return True # Required table
 
+@_add_method(ttLib.getTableClass('cmap'))
+def copy_for_subset(self, s):
+	table = copy.copy(self)
+	table.tables = [copy.copy(t) for t in self.tables]
+	return table
+
 @_add_method(ttLib.getTableClass('cmap'))
 def subset_glyphs(self, s):
 	s.glyphs = None # We use s.glyphs_requested and s.unicodes_requested only
@@ -2269,6 +2858,98 @@ def prune_post_subset(self, font, options):
 	return True
 
 
+class GlyphDependencyGraph(object):
+
+	"""The glyphs each glyph of a font depends on, in the tables whose
+	class has a closure_dependencies() method: MATH variants and parts,
+	COLR layers, glyf components and CFF seac base and accent glyphs.
+	Edges are tagged with the table they come from:
+
+		graph = GlyphDependencyGraph(font)
+		graph.dependencies('Aacute')  # [('A', 'glyf'), ('acute', 'glyf')]
+
+	The glyphs needed by a glyph set are all those reachable from it in
+	the graph, whichever tables their edges come from, so that e.g. the
+	components of COLR layers, and the COLR layers of components, are
+	kept too.
+
+	The edges of a glyph are only looked up the first time they are
+	needed; building the graph does not decompile the glyphs. The tables
+	must not be modified afterwards. 'closure_indexes' maps table tags
+	to the indexes built by their build_closure_index() methods, if any.
+
+	A closure_dependencies(index) method returns a function returning the
+	glyphs a glyph depends on, or None if the table has no dependencies.
+	"""
+
+	def __init__(self, font, closure_indexes={}):
+		self.glyphs = font.getReverseGlyphMap()
+		self.tags = []
+		self._sources = []
+		for tag in font.keys():
+			if tag == 'GlyphOrder': continue
+			clazz = ttLib.getTableClass(tag)
+			if not hasattr(clazz, 'closure_dependencies'): continue
+			dependencies = font[tag].closure_dependencies(closure_indexes.get(tag))
+			if dependencies is None: continue
+			self.tags.append(tag)
+			self._sources.append((tag, dependencies))
+		self._edges = {}
+
+	def dependencies(self, glyph, times=None):
+		"""Return the list of (glyph, tag) tuples of the glyphs that 'glyph'
+		depends on, and the tags of the tables it depends on them in.
+
+		If 'times' is a dict, the seconds spent looking up the edges from
+		each table are added to it by tag."""
+		edges = self._edges.get(glyph)
+		if edges is None:
+			edges = []
+			for tag,dependencies in self._sources:
+				if times is not None:
+					start = time.perf_counter()
+				for g in dependencies(glyph):
+					if g in self.glyphs:
+						edges.append((g, tag))
+				if times is not None:
+					times[tag] = times.get(tag, 0) + time.perf_counter() - start
+			self._edges[glyph] = edges
+		return edges
+
+	def closure(self, glyphs, tags=None, reasons=None, times=None):
+		"""Return the set of glyphs reachable from 'glyphs', following
+		the edges from the tables in 'tags' (default: all of them).
+
+		If 'reasons' is a dict, each glyph added is mapped in it to the
+		(glyph, tag) tuple of the edge it was first reached by. 'times'
+		is passed on to dependencies()."""
+		closure = set(glyphs)
+		queue = sorted(closure)
+		for glyph in queue:
+			for g,tag in self.dependencies(glyph, times):
+				if g in closure or (tags is not None and tag not in tags):
+					continue
+				closure.add(g)
+				queue.append(g)
+				if reasons is not None:
+					reasons[g] = (glyph, tag)
+		return closure
+
+	def export(self, glyphs=None):
+		"""Return a JSON-serializable dict mapping each glyph name (by
+		default, of all glyphs of the font) to a dict mapping table tags
+		to the list of glyphs it depends on in that table."""
+		if glyphs is None:
+			glyphs = sorted(self.glyphs, key=self.glyphs.__getitem__)
+		graph = {}
+		for glyph in glyphs:
+			edges = {}
+			for g,tag in self.dependencies(glyph):
+				edges.setdefault(tag, []).append(g)
+			graph[glyph] = edges
+		return graph
+
+
 # TODO(behdad) OS/2 ulCodePageRange?
 # TODO(behdad) Drop AAT tables.
 # TODO(behdad) Drop unneeded GSUB/GPOS Script/LangSys entries.
@@ -2352,6 +3033,7 @@ class Options(object):
 		self.flavor = None  # May be 'woff' or 'woff2'
 		self.with_zopfli = False  # use zopfli instead of zlib for WOFF 1.0
 		self.desubroutinize = False # Desubroutinize CFF CharStrings
+		self.subroutinize = False # Re-subroutinize CFF CharStrings
 		self.verbose = False
 		self.timing = False
 		self.xml = False
@@ -2456,6 +3138,12 @@ class Subsetter(object):
 		self.unicodes_requested = set()
 		self.glyph_names_requested = set()
 		self.glyph_ids_requested = set()
+		# Precomputed closure and subsetting data, by table tag; see
+		# PreparedFont
+		self.closure_indexes = {}
+		self.subset_indexes = {}
+		# The _SubsetProfile being filled in by subset(font, profile=True)
+		self._profile = None
 
 	def populate(self, glyphs=[], gids=[], unicodes=[], text=""):
 		self.unicodes_requested.update(unicodes)
@@ -2480,9 +3168,9 @@ class Subsetter(object):
 			clazz = ttLib.getTableClass(tag)
 
 			if hasattr(clazz, 'prune_pre_subset'):
-				with timer("load '%s'" % tag):
+				with timer("load '%s'" % tag), self._profiled('load', tag):
 					table = font[tag]
-				with timer("prune '%s'" % tag):
+				with timer("prune '%s'" % tag), self._profiled('prune_pre', tag):
 					retain = table.prune_pre_subset(font, self.options)
 				if not retain:
 					log.info("%s pruned to empty; dropped", tag)
@@ -2496,6 +3184,10 @@ class Subsetter(object):
 		realGlyphs = set(font.getGlyphOrder())
 		glyph_order = font.getGlyphOrder()
 
+		self.glyph_ids = self.closure_indexes.get('GlyphOrder')
+		if self.glyph_ids is None:
+			self.glyph_ids = _GlyphIDs(font)
+
 		self.glyphs_requested = set()
 		self.glyphs_requested.update(self.glyph_names_requested)
 		self.glyphs_requested.update(glyph_order[i]
@@ -2512,13 +3204,20 @@ class Subsetter(object):
 				raise self.MissingGlyphsSubsettingError(self.glyphs_missing)
 
 		self.glyphs = self.glyphs_requested.copy()
+		if self._profile is not None:
+			self._profile.closure['requested'] = len(self.glyphs)
+		# Maps each glyph to the (glyph, tag) tuple of the dependency it
+		# was added by, or (None, stage) for those added by other stages
+		self.closure_reasons = {}
+		self._add_closure_reasons('requested')
 
 		self.unicodes_missing = set()
 		if 'cmap' in font:
-			with timer("close glyph list over 'cmap'"):
+			with timer("close glyph list over 'cmap'"), self._profiled('closure', 'cmap'):
 				font['cmap'].closure_glyphs(self)
 				self.glyphs.intersection_update(realGlyphs)
 		self.glyphs_cmaped = frozenset(self.glyphs)
+		self._add_closure_reasons('cmap')
 		if self.unicodes_missing:
 			missing = ["U+%04X" % u for u in self.unicodes_missing]
 			log.info("Missing glyphs for requested Unicodes: %s", missing)
@@ -2538,9 +3237,10 @@ class Subsetter(object):
 				for i in range(min(4, len(font.getGlyphOrder()))):
 					self.glyphs.add(font.getGlyphName(i))
 				log.info("Added first four glyphs to subset")
+		self._add_closure_reasons('notdef')
 
 		if self.options.layout_closure and 'GSUB' in font:
-			with timer("close glyph list over 'GSUB'"):
+			with timer("close glyph list over 'GSUB'"), self._profiled('closure', 'GSUB'):
 				log.info("Closing glyph list over 'GSUB': %d glyphs before",
 						 len(self.glyphs))
 				log.glyphs(self.glyphs, font=font)
@@ -2550,54 +3250,42 @@ class Subsetter(object):
 						 len(self.glyphs))
 				log.glyphs(self.glyphs, font=font)
 		self.glyphs_gsubed = frozenset(self.glyphs)
+		self._add_closure_reasons('GSUB')
 
-		if 'MATH' in font:
-			with timer("close glyph list over 'MATH'"):
-				log.info("Closing glyph list over 'MATH': %d glyphs before",
-						 len(self.glyphs))
-				log.glyphs(self.glyphs, font=font)
-				font['MATH'].closure_glyphs(self)
+		if 'bsln' in font:
+			with timer("close glyph list over 'bsln'"), self._profiled('closure', 'bsln'):
+				font['bsln'].closure_glyphs(self)
 				self.glyphs.intersection_update(realGlyphs)
-				log.info("Closed glyph list over 'MATH': %d glyphs after",
-						 len(self.glyphs))
-				log.glyphs(self.glyphs, font=font)
+			self._add_closure_reasons('bsln')
+
+		graph = self.closure_indexes.get('GlyphDependencies')
+		if graph is None:
+			graph = GlyphDependencyGraph(font, self.closure_indexes)
+		self.glyph_dependencies = graph
+		times = {} if self._profile is not None else None
+		with timer("close glyph list over dependencies"):
+			log.info("Closing glyph list over %s: %d glyphs before",
+					 graph.tags, len(self.glyphs))
+			log.glyphs(self.glyphs, font=font)
+			glyphs = self.glyphs
+			self.glyphs = graph.closure(glyphs, reasons=self.closure_reasons,
+						    times=times)
+			log.info("Closed glyph list over %s: %d glyphs after",
+					 graph.tags, len(self.glyphs))
+			log.glyphs(self.glyphs, font=font)
+		if self._profile is not None:
+			for tag in graph.tags:
+				self._profile.closure[tag] = 0
+				self._profile.add_time('closure', tag, times.get(tag, 0))
+			for g in self.glyphs - glyphs:
+				tag = self.closure_reasons[g][1]
+				self._profile.closure[tag] += 1
+		del glyphs
+		# The dependencies of all retained glyphs were followed, whichever
+		# table reached them: e.g. the MATH variants of glyf components
 		self.glyphs_mathed = frozenset(self.glyphs)
-
-		for table in ('COLR', 'bsln'):
-			if table in font:
-				with timer("close glyph list over '%s'" % table):
-					log.info("Closing glyph list over '%s': %d glyphs before",
-							 table, len(self.glyphs))
-					log.glyphs(self.glyphs, font=font)
-					font[table].closure_glyphs(self)
-					self.glyphs.intersection_update(realGlyphs)
-					log.info("Closed glyph list over '%s': %d glyphs after",
-							 table, len(self.glyphs))
-					log.glyphs(self.glyphs, font=font)
-
-		if 'glyf' in font:
-			with timer("close glyph list over 'glyf'"):
-				log.info("Closing glyph list over 'glyf': %d glyphs before",
-						 len(self.glyphs))
-				log.glyphs(self.glyphs, font=font)
-				font['glyf'].closure_glyphs(self)
-				self.glyphs.intersection_update(realGlyphs)
-				log.info("Closed glyph list over 'glyf': %d glyphs after",
-						 len(self.glyphs))
-				log.glyphs(self.glyphs, font=font)
-		self.glyphs_glyfed = frozenset(self.glyphs)
-
-		if 'CFF ' in font:
-			with timer("close glyph list over 'CFF '"):
-				log.info("Closing glyph list over 'CFF ': %d glyphs before",
-						 len(self.glyphs))
-				log.glyphs(self.glyphs, font=font)
-				font['CFF '].closure_glyphs(self)
-				self.glyphs.intersection_update(realGlyphs)
-				log.info("Closed glyph list over 'CFF ': %d glyphs after",
-						 len(self.glyphs))
-				log.glyphs(self.glyphs, font=font)
-		self.glyphs_cffed = frozenset(self.glyphs)
+		self.glyphs_glyfed = self.glyphs_mathed
+		self.glyphs_cffed = self.glyphs_mathed
 
 		self.glyphs_retained = frozenset(self.glyphs)
 
@@ -2618,6 +3306,29 @@ class Subsetter(object):
 
 		del self.glyphs
 
+	def _add_closure_reasons(self, stage):
+		reasons = self.closure_reasons
+		for g in self.glyphs:
+			if g not in reasons:
+				reasons[g] = (None, stage)
+
+	def explain_glyph(self, glyph):
+		"""Return why 'glyph' was retained by the last call to subset():
+		the list of (glyph, reason) tuples from the glyph that was added
+		first, by the stage named by its reason ('requested', 'cmap',
+		'notdef', 'GSUB' or 'bsln'), to 'glyph', each depending on the one
+		before in the table named by its reason (see GlyphDependencyGraph).
+		Raises KeyError if 'glyph' was not retained."""
+		if glyph not in self.glyphs_retained:
+			raise KeyError(glyph)
+		path = []
+		while glyph is not None:
+			parent, reason = self.closure_reasons[glyph]
+			path.append((glyph, reason))
+			glyph = parent
+		path.reverse()
+		return path
+
 	def _subset_glyphs(self, font):
 		for tag in self._sort_tables(font):
 			clazz = ttLib.getTableClass(tag)
@@ -2625,7 +3336,7 @@ class Subsetter(object):
 			if tag.strip() in self.options.no_subset_tables:
 				log.info("%s subsetting not needed", tag)
 			elif hasattr(clazz, 'subset_glyphs'):
-				with timer("subset '%s'" % tag):
+				with timer("subset '%s'" % tag), self._profiled('subset_glyphs', tag):
 					table = font[tag]
 					self.glyphs = self.glyphs_retained
 					retain = table.subset_glyphs(self)
@@ -2646,7 +3357,7 @@ class Subsetter(object):
 			if not self.options.retain_gids:
 				glyphOrder = [g for g in glyphOrder if g in self.glyphs_retained]
 			else:
-				glyphOrder = [g for g in glyphOrder if font.getGlyphID(g) <= self.last_retained_order]
+				glyphOrder = glyphOrder[:self.last_retained_order + 1]
 
 			font.setGlyphOrder(glyphOrder)
 			font._buildReverseGlyphOrderDict()
@@ -2673,7 +3384,7 @@ class Subsetter(object):
 						log.info("%s usMaxContext updated: %d", tag, max_context)
 			clazz = ttLib.getTableClass(tag)
 			if hasattr(clazz, 'prune_post_subset'):
-				with timer("prune '%s'" % tag):
+				with timer("prune '%s'" % tag), self._profiled('prune_post', tag):
 					table = font[tag]
 					retain = table.prune_post_subset(font, self.options)
 				if not retain:
@@ -2688,11 +3399,251 @@ class Subsetter(object):
 		tags = sorted(font.keys(), key=lambda tag: tagOrder.get(tag, 0))
 		return [t for t in tags if t != 'GlyphOrder']
 
-	def subset(self, font):
-		self._prune_pre_subset(font)
-		self._closure_glyphs(font)
-		self._subset_glyphs(font)
-		self._prune_post_subset(font)
+	@contextmanager
+	def _profiled(self, stage, tag=None):
+		profile = self._profile
+		if profile is None:
+			yield
+			return
+		glyphs = getattr(self, 'glyphs', None)
+		count = len(glyphs) if stage == 'closure' and glyphs is not None else None
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			profile.add_time(stage, tag, time.perf_counter() - start)
+			if count is not None and tag is not None:
+				profile.closure[tag] = len(self.glyphs) - count
+
+	def _compile_tables(self, font):
+		done = set()
+		def compile(tag):
+			if tag in done:
+				return
+			done.add(tag)
+			for dep in ttLib.getTableClass(tag).dependencies:
+				if dep in font:
+					compile(dep)
+			with self._profiled('compile', tag):
+				data = font.getTableData(tag)
+			self._profile.tables.setdefault(tag, {})['size_after'] = len(data)
+		for tag in font.keys():
+			if tag != 'GlyphOrder':
+				compile(tag)
+
+	def subset(self, font, profile=False):
+		"""Subset 'font' in place to the glyphs, glyph IDs, Unicodes and
+		text populated.
+
+		If 'profile' is true, the tables are also compiled once subset, and
+		a JSON-serializable dict is returned with the time spent on each
+		stage ('prune_pre', 'closure', 'subset_glyphs', 'prune_post' and
+		'compile') and on each table in each stage, the number of glyphs
+		added by closing the glyph set over each table, and the compiled
+		size of each table before and after subsetting (None when the
+		font was not read from a file, or the table was dropped).
+
+		The tables compiled for the report are not kept: saving the font
+		compiles them again, and the 'compile' times are those of this
+		separate compile, not of the save.
+		"""
+		if profile:
+			self._profile = _SubsetProfile(font)
+		try:
+			with self._profiled('prune_pre'):
+				self._prune_pre_subset(font)
+			with self._profiled('closure'):
+				self._closure_glyphs(font)
+			with self._profiled('subset_glyphs'):
+				self._subset_glyphs(font)
+			with self._profiled('prune_post'):
+				self._prune_post_subset(font)
+			if profile:
+				with self._profiled('compile'):
+					self._compile_tables(font)
+				return self._profile.report(font, self)
+		finally:
+			self._profile = None
+
+
+class _SubsetProfile(object):
+
+	"""Times and sizes collected by Subsetter.subset(font, profile=True)."""
+
+	def __init__(self, font):
+		self.stages = {}
+		self.tables = {}
+		self.closure = {}
+		self.glyphs_before = len(font.getGlyphOrder())
+		reader = font.reader
+		for tag in font.keys():
+			if tag == 'GlyphOrder':
+				continue
+			size = None
+			if reader is not None and tag in reader.tables:
+				entry = reader.tables[tag]
+				size = getattr(entry, 'origLength', entry.length)
+			self.tables[tag] = {'size_before': size}
+
+	def add_time(self, stage, tag, seconds):
+		if tag is None:
+			self.stages[stage] = self.stages.get(stage, 0) + seconds
+		else:
+			times = self.tables.setdefault(tag, {}).setdefault('time', {})
+			times[stage] = times.get(stage, 0) + seconds
+
+	def report(self, font, subsetter):
+		tables = {}
+		for tag, info in sorted(self.tables.items()):
+			tables[tag] = {
+				'time': info.get('time', {}),
+				'size_before': info.get('size_before'),
+				'size_after': info.get('size_after') if tag in font else None,
+			}
+		sizes_before = [t['size_before'] for t in tables.values()]
+		return {
+			'stages': self.stages,
+			'tables': tables,
+			'closure': self.closure,
+			'glyphs': {
+				'before': self.glyphs_before,
+				'retained': len(subsetter.glyphs_retained),
+			},
+			'size': {
+				'before': sum(sizes_before) if None not in sizes_before else None,
+				'after': sum(t['size_after'] for t in tables.values()
+					     if t['size_after'] is not None),
+			},
+		}
+
+
+class PreparedFont(object):
+
+	"""A font prepared once for producing any number of subsets of it, as
+	done by a web font server slicing a font by Unicode ranges:
+
+		prepared = PreparedFont(font, options)
+		for unicodes in ranges:
+			subsetFont = prepared.subset(unicodes=unicodes)
+			save_font(subsetFont, outfile, options)
+
+	The font is pruned according to the options, and its tables are
+	decompiled, only once. The closure of each requested glyph set is
+	then computed on the (never modified) source tables, with the help
+	of precomputed indexes for the 'cmap' Unicode mappings and the 'glyf'
+	components. Each subset font gets cheap copies of the large tables
+	indexed by glyph ('glyf', 'cmap', 'hmtx', 'vmtx', 'post'), sharing
+	their data with the source, while its other tables are (lazily)
+	decompiled from the source tables compiled once after pruning. The
+	'GPOS' PairPos subtables are never decompiled in the subset fonts,
+	but built from an index of them (see PairPosIndex).
+
+	The 'font' passed in is pruned in place and owned by the PreparedFont
+	from then on: it must not be modified afterwards.
+	"""
+
+	def __init__(self, font, options=None):
+		if options is None:
+			options = Options()
+		self.options = options
+		self.font = font
+
+		Subsetter(options=options)._prune_pre_subset(font)
+
+		self.closure_indexes = {}
+		self.copied_tables = []
+		for tag in font.keys():
+			if tag == 'GlyphOrder': continue
+			clazz = ttLib.getTableClass(tag)
+			if hasattr(clazz, 'copy_for_subset'):
+				self.copied_tables.append(tag)
+			if hasattr(clazz, 'build_closure_index'):
+				with timer("index '%s'" % tag):
+					self.closure_indexes[tag] = font[tag].build_closure_index()
+		for tag in self.copied_tables:
+			font[tag]
+		font.getReverseGlyphMap()
+		# Keeps the glyph ID masks of the tables' coverages across subsets
+		self.closure_indexes['GlyphOrder'] = _GlyphIDs(font)
+		# Keeps the glyph dependencies looked up across subsets
+		self.closure_indexes['GlyphDependencies'] = GlyphDependencyGraph(
+			font, self.closure_indexes)
+
+		with timer("compile prepared tables"):
+			self._data = self._compile_tables()
+
+		# Tables subset with the help of an index are indexed and, in each
+		# subset font, decompiled lazily from the compiled data, so that
+		# the index can tell their parts by their offsets.
+		self.subset_indexes = {}
+		self._lazyFont = ttLib.TTFont(BytesIO(self._data), lazy=True)
+		self._lazyFont.setGlyphOrder(list(font.getGlyphOrder()))
+		for tag in self._lazyFont.reader.keys():
+			clazz = ttLib.getTableClass(tag)
+			if hasattr(clazz, 'build_subset_index'):
+				with timer("index '%s'" % tag):
+					self.subset_indexes[tag] = self._lazyFont[tag].build_subset_index()
+
+	def _compile_tables(self):
+		font = self.font
+		tags = [tag for tag in font.keys()
+			if tag != 'GlyphOrder' and tag not in self.copied_tables]
+		buf = BytesIO()
+		writer = ttLib.sfnt.SFNTWriter(buf, len(tags), font.sfntVersion)
+		# Bounds are recalculated when compiling each subset font; don't
+		# have 'maxp', 'hhea', etc. expand all the glyphs to do it here.
+		recalcBBoxes = font.recalcBBoxes
+		font.recalcBBoxes = False
+		try:
+			for tag in tags:
+				writer[tag] = font.getTableData(tag)
+		finally:
+			font.recalcBBoxes = recalcBBoxes
+		writer.close()
+		return buf.getvalue()
+
+	def _new_font(self, subsetter):
+		source = self.font
+		font = ttLib.TTFont(BytesIO(self._data),
+				    lazy=True,
+				    recalcBBoxes=source.recalcBBoxes,
+				    recalcTimestamp=source.recalcTimestamp)
+		font.setGlyphOrder(list(source.getGlyphOrder()))
+		for tag in self.copied_tables:
+			font[tag] = source[tag].copy_for_subset(subsetter)
+		# Load the tables that subsetting the source font directly would
+		# have loaded (and thus recompiled) too: those loaded in the source
+		# font when preparing it and closing over glyphs. They are decompiled
+		# against the source font, so that their lazily loaded parts still
+		# map glyph IDs with the source glyph order after the subset font's
+		# one changed.
+		for tag in font.reader.keys():
+			if tag in self.subset_indexes:
+				# The lazy font has the source glyph order too
+				table = ttLib.getTableClass(tag)(tag)
+				table.decompile(font.reader[tag], self._lazyFont)
+				font[tag] = table
+				continue
+			if not source.isLoaded(tag):
+				continue
+			table = ttLib.getTableClass(tag)(tag)
+			table.decompile(font.reader[tag], source)
+			font[tag] = table
+		return font
+
+	def subset(self, glyphs=[], gids=[], unicodes=[], text=""):
+		"""Return a new TTFont, subset to the given glyphs, glyph IDs,
+		Unicodes and text, like Subsetter.populate() and subset() would."""
+		subsetter = Subsetter(options=self.options)
+		subsetter.closure_indexes = self.closure_indexes
+		subsetter.subset_indexes = self.subset_indexes
+		subsetter.populate(glyphs=glyphs, gids=gids, unicodes=unicodes,
+				   text=text)
+		subsetter._closure_glyphs(self.font)
+		font = self._new_font(subsetter)
+		subsetter._subset_glyphs(font)
+		subsetter._prune_post_subset(font)
+		return font
 
 
 @timer("load font")
@@ -2766,6 +3717,51 @@ def parse_gids(s):
 def parse_glyphs(s):
 	return s.replace(',', ' ').split()
 
+def parse_batch(lines):
+	"""Parse the lines of a --batch file, and return a list of (name,
+	unicodes) pairs, one per non-empty line. Slices without a name are
+	named after their line number."""
+	slices = []
+	for lineno, line in enumerate(lines, 1):
+		line = line.split('#')[0]
+		name, sep, ranges = line.rpartition(':')
+		name = name.strip()
+		if not ranges.strip():
+			if name:
+				raise ValueError("line %d: slice '%s' has no Unicodes" % (lineno, name))
+			continue
+		slices.append((name or str(lineno), parse_unicodes(ranges)))
+	return slices
+
+def _subset_slice(prepared, outfile, glyphs, gids, unicodes, text):
+	font = prepared.subset(glyphs=glyphs, gids=gids, unicodes=unicodes, text=text)
+	save_font(font, outfile, prepared.options)
+	font.close()
+	return outfile
+
+def subset_batch(font, slices, options, workers=None):
+	"""Subset 'font' to each of the given slices, and save them.
+
+	'slices' is a list of (outfile, glyphs, gids, unicodes, text) tuples.
+	The font is prepared only once, see PreparedFont. If 'workers' is
+	greater than 1 (by default, the number of CPUs), the slices are subset
+	and saved by a pool of that many processes, forked from this one so
+	that they share the prepared font with it. This requires the 'fork'
+	start method of the multiprocessing module; elsewhere slices are
+	subset serially.
+
+	Returns the list of saved outfiles.
+	"""
+	import multiprocessing
+
+	with timer("prepare font"):
+		prepared = PreparedFont(font, options)
+
+	if workers is None:
+		workers = multiprocessing.cpu_count()
+	return parallelMap(lambda args: _subset_slice(prepared, *args), slices,
+			   workers, chunksize=1)
+
 def usage():
 	print("usage:", __usage__, file=sys.stderr)
 	print("Try pyftsubset --help for more information.\n", file=sys.stderr)
@@ -2789,13 +3785,14 @@ def main(args=None):
 							'glyphs', 'glyphs-file',
 							'text', 'text-file',
 							'unicodes', 'unicodes-file',
-							'output-file'])
+							'output-file', 'profile',
+							'batch', 'output-dir', 'workers'])
 	except options.OptionError as e:
 		usage()
 		print("ERROR:", e, file=sys.stderr)
 		return 2
 
-	if len(args) < 2:
+	if len(args) < 2 and not any(a.startswith('--batch=') for a in args):
 		usage()
 		return 1
 
@@ -2808,8 +3805,11 @@ def main(args=None):
 	fontfile = args[0]
 	args = args[1:]
 
-	subsetter = Subsetter(options=options)
 	outfile = None
+	profilefile = None
+	batchfile = None
+	outdir = None
+	workers = None
 	glyphs = []
 	gids = []
 	unicodes = []
@@ -2823,6 +3823,18 @@ def main(args=None):
 		if g.startswith('--output-file='):
 			outfile = g[14:]
 			continue
+		if g.startswith('--profile='):
+			profilefile = g[10:]
+			continue
+		if g.startswith('--batch='):
+			batchfile = g[8:]
+			continue
+		if g.startswith('--output-dir='):
+			outdir = g[13:]
+			continue
+		if g.startswith('--workers='):
+			workers = int(g[10:])
+			continue
 		if g.startswith('--text='):
 			text += g[7:]
 			continue
@@ -2862,15 +3874,21 @@ def main(args=None):
 			continue
 		glyphs.append(g)
 
+	if batchfile is not None and (outfile is not None or profilefile is not None):
+		usage()
+		print("ERROR: --batch can't be combined with --output-file and --profile",
+		      file=sys.stderr)
+		return 2
+
 	dontLoadGlyphNames = not options.glyph_names and not glyphs
 	font = load_font(fontfile, options, dontLoadGlyphNames=dontLoadGlyphNames)
 
+	basename, _ = splitext(fontfile)
+	if options.flavor is not None:
+		ext = "." + options.flavor.lower()
+	else:
+		ext = ".ttf" if font.sfntVersion == "\0\1\0\0" else ".otf"
 	if outfile is None:
-		basename, _ = splitext(fontfile)
-		if options.flavor is not None:
-			ext = "." + options.flavor.lower()
-		else:
-			ext = ".ttf" if font.sfntVersion == "\0\1\0\0" else ".otf"
 		outfile = basename + ".subset" + ext
 
 	with timer("compile glyph list"):
@@ -2887,11 +3905,44 @@ def main(args=None):
 	log.info("Glyphs: %s", glyphs)
 	log.info("Gids: %s", gids)
 
+	if batchfile is not None:
+		import os
+		with open(batchfile) as f:
+			try:
+				slices = parse_batch(f)
+			except ValueError as e:
+				print("ERROR: %s: %s" % (batchfile, e), file=sys.stderr)
+				return 2
+		if outdir is not None:
+			os.makedirs(outdir, exist_ok=True)
+			basename = os.path.join(outdir, os.path.basename(basename))
+		outfiles = subset_batch(
+			font,
+			[(basename + "." + name + ext, glyphs, gids,
+			  unicodes + slice_unicodes, text)
+			 for name, slice_unicodes in slices],
+			options,
+			workers=workers)
+		if options.verbose:
+			log.info("Input font:% 7d bytes: %s" % (os.path.getsize(fontfile), fontfile))
+			for outfile in outfiles:
+				log.info("Subset font:% 7d bytes: %s" % (os.path.getsize(outfile), outfile))
+		font.close()
+		return
+
+	subsetter = Subsetter(options=options)
 	subsetter.populate(glyphs=glyphs, gids=gids, unicodes=unicodes, text=text)
-	subsetter.subset(font)
+	report = subsetter.subset(font, profile=profilefile is not None)
 
+	start = time.perf_counter()
 	save_font(font, outfile, options)
 
+	if report is not None:
+		import json
+		report['stages']['save'] = time.perf_counter() - start
+		with open(profilefile, 'w') as f:
+			json.dump(report, f, indent=2, sort_keys=True)
+
 	if options.verbose:
 		import os
 		log.info("Input font:% 7d bytes: %s" % (os.path.getsize(fontfile), fontfile))
@@ -2906,8 +3957,12 @@ def main(args=None):
 __all__ = [
 	'Options',
 	'Subsetter',
+	'PreparedFont',
+	'GlyphDependencyGraph',
 	'load_font',
 	'save_font',
+	'subset_batch',
+	'parse_batch',
 	'parse_gids',
 	'parse_glyphs',
 	'parse_unicodes',
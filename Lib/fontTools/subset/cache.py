@@ -0,0 +1,181 @@
+"""An on-disk cache of subset fonts, shared by any number of processes.
+
+Each subset font is stored in a file named after a digest of the input
+font data, the subsetter options and the requested glyphs, glyph IDs and
+Unicodes, so that the same request made again returns the bytes produced
+the first time without loading, subsetting or compiling the font:
+
+	cache = SubsetCache("/var/cache/subsets", max_size=1 << 30)
+	data = cache.subset(fontData, options, text="Hello")
+
+Entries are written to a temporary file which is then renamed, so that
+readers never see partially written entries. The least recently used
+entries are deleted when the total size of the cache exceeds 'max_size'.
+"""
+
+from fontTools.misc.py23 import *
+from fontTools import version
+from fontTools.subset import Options, Subsetter, load_font, save_font
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+
+
+__all__ = ["SubsetCache", "font_digest"]
+
+
+log = logging.getLogger("fontTools.subset")
+
+
+# Options that don't change the subset font produced
+_ignored_options = frozenset(['verbose', 'timing', 'xml'])
+
+
+def font_digest(data):
+	"""Return the digest of the font data 'data', identifying the font in
+	the cache keys."""
+	return hashlib.sha256(data).hexdigest()
+
+
+def _canonical_options(options):
+	canonical = {}
+	for k,v in vars(options).items():
+		if k in _ignored_options:
+			continue
+		if isinstance(v, (list, tuple, set, frozenset)):
+			# All list options are sets of tags, name IDs, etc.
+			v = sorted(set(v), key=repr)
+		canonical[k] = v
+	return canonical
+
+
+def _canonical_unicodes(unicodes, text):
+	unicodes = set(unicodes)
+	if isinstance(text, bytes):
+		text = text.decode("utf_8")
+	text_utf32 = text.encode("utf-32-be")
+	unicodes.update(struct.unpack('>%dL' % (len(text_utf32)//4), text_utf32))
+	return sorted(unicodes)
+
+
+class SubsetCache(object):
+
+	"""A cache of subset fonts in the directory 'path', which is created
+	if needed. If 'max_size' is not None, the least recently used entries
+	are evicted after adding one, until their total size (in bytes) is at
+	most 'max_size'.
+
+	Output only depends on the key if the options don't recalculate the
+	font's modification timestamp ('recalc_timestamp').
+	"""
+
+	def __init__(self, path, max_size=None):
+		self.path = path
+		self.max_size = max_size
+		os.makedirs(path, exist_ok=True)
+
+	def key(self, digest, options, glyphs=[], gids=[], unicodes=[], text=""):
+		"""Return the cache key for subsetting the font whose font_digest()
+		is 'digest' with the given options, like Subsetter.populate() with
+		the given glyphs, glyph IDs, Unicodes and text would."""
+		request = {
+			'version': version,
+			'font': digest,
+			'options': _canonical_options(options),
+			'glyphs': sorted(set(glyphs)),
+			'gids': sorted(set(gids)),
+			'unicodes': _canonical_unicodes(unicodes, text),
+		}
+		data = json.dumps(request, sort_keys=True, separators=(',', ':'))
+		return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+	def _entry_path(self, key):
+		return os.path.join(self.path, key)
+
+	def get(self, key):
+		"""Return the data stored for 'key', or None."""
+		path = self._entry_path(key)
+		try:
+			with open(path, 'rb') as f:
+				data = f.read()
+		except FileNotFoundError:
+			return None
+		try:
+			# Mark the entry as recently used
+			os.utime(path)
+		except OSError:
+			pass  # evicted in the meantime
+		return data
+
+	def put(self, key, data):
+		"""Store 'data' for 'key', replacing any previous entry."""
+		fd, tmp = tempfile.mkstemp(prefix='.', dir=self.path)
+		try:
+			with os.fdopen(fd, 'wb') as f:
+				f.write(data)
+			os.replace(tmp, self._entry_path(key))
+		except BaseException:
+			try:
+				os.unlink(tmp)
+			except OSError:
+				pass
+			raise
+		if self.max_size is not None:
+			self.evict(self.max_size)
+
+	def evict(self, max_size):
+		"""Delete the least recently used entries until the total size of
+		the cache is at most 'max_size' bytes."""
+		entries = []
+		total = 0
+		with os.scandir(self.path) as it:
+			for entry in it:
+				# Skip files being written by put()
+				if entry.name.startswith('.'):
+					continue
+				try:
+					st = entry.stat()
+				except FileNotFoundError:
+					continue
+				entries.append((st.st_mtime, entry.name, st.st_size))
+				total += st.st_size
+		if total <= max_size:
+			return
+		entries.sort()
+		for _, name, size in entries:
+			try:
+				os.unlink(os.path.join(self.path, name))
+			except FileNotFoundError:
+				pass  # evicted by another process
+			log.debug("Evicted subset cache entry %s", name)
+			total -= size
+			if total <= max_size:
+				break
+
+	def subset(self, font_data, options=None, glyphs=[], gids=[], unicodes=[],
+		   text=""):
+		"""Return the data of the font 'font_data' subset to the given
+		glyphs, glyph IDs, Unicodes and text with the given options, as
+		saved by save_font(), from the cache if there."""
+		if options is None:
+			options = Options()
+		key = self.key(font_digest(font_data), options, glyphs=glyphs,
+			       gids=gids, unicodes=unicodes, text=text)
+		data = self.get(key)
+		if data is not None:
+			return data
+		font = load_font(BytesIO(font_data), options,
+				 dontLoadGlyphNames=not options.glyph_names and not glyphs)
+		subsetter = Subsetter(options=options)
+		subsetter.populate(glyphs=glyphs, gids=gids, unicodes=unicodes,
+				   text=text)
+		subsetter.subset(font)
+		buf = BytesIO()
+		save_font(font, buf, options)
+		font.close()
+		data = buf.getvalue()
+		self.put(key, data)
+		return data
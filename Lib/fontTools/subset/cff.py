@@ -1,4 +1,5 @@
 from fontTools.misc import psCharStrings
+from fontTools.cffLib.subroutinizer import subroutinize
 from fontTools import ttLib
 from fontTools.pens.basePen import NullPen
 from fontTools.misc.fixedTools import otRound
@@ -45,26 +46,25 @@ class _ClosureGlyphsT2Decompiler(psCharStrings.SimpleT2Decompiler):
 			self.components.add(accentGlyph)
 
 @_add_method(ttLib.getTableClass('CFF '))
-def closure_glyphs(self, s):
+def closure_dependencies(self, index=None):
 	cff = self.cff
+	if cff.major > 1:
+		# CFF2 charstrings can't do seac
+		return None
 	assert len(cff) == 1
 	font = cff[cff.keys()[0]]
 	glyphSet = font.CharStrings
 
-	decompose = s.glyphs
-	while decompose:
+	def dependencies(g):
+		if g not in glyphSet:
+			return ()
+		gl = glyphSet[g]
 		components = set()
-		for g in decompose:
-			if g not in glyphSet:
-				continue
-			gl = glyphSet[g]
-
-			subrs = getattr(gl.private, "Subrs", [])
-			decompiler = _ClosureGlyphsT2Decompiler(components, subrs, gl.globalSubrs)
-			decompiler.execute(gl)
-		components -= s.glyphs
-		s.glyphs.update(components)
-		decompose = components
+		subrs = getattr(gl.private, "Subrs", [])
+		decompiler = _ClosureGlyphsT2Decompiler(components, subrs, gl.globalSubrs)
+		decompiler.execute(gl)
+		return sorted(components)
+	return dependencies
 
 def _empty_charstring(font, glyphName, isCFF2, ignoreWidth=False):
 	c, fdSelectIndex = font.CharStrings.getItemAndSelector(glyphName)
@@ -461,7 +461,7 @@ def prune_post_subset(self, ttfFont, options):
 			del arr.file, arr.offsets
 
 	# Desubroutinize if asked for
-	if options.desubroutinize:
+	if options.desubroutinize or options.subroutinize:
 		self.desubroutinize()
 
 	# Drop hints if not needed
@@ -469,6 +469,10 @@ def prune_post_subset(self, ttfFont, options):
 		self.remove_hints()
 	elif not options.desubroutinize:
 		self.remove_unused_subroutines()
+
+	# Build new subroutines for the retained glyphs if asked for
+	if options.subroutinize:
+		subroutinize(cff)
 	return True
 
 
@@ -57,3 +57,4 @@ def debugmsg(msg):
 
 from fontTools.ttLib.ttFont import *
 from fontTools.ttLib.ttCollection import TTCollection
+from fontTools.ttLib.tableCache import TableCache
@@ -16,6 +16,8 @@ from fontTools.misc.py23 import *
 from fontTools.misc import sstruct
 from fontTools.ttLib import TTLibError
 import struct
+import mmap
+import os
 from collections import OrderedDict
 import logging
 
@@ -99,13 +101,16 @@ class SFNTReader(object):
 		return self.tables.keys()
 
 	def __getitem__(self, tag):
-		"""Fetch the raw table data."""
+		"""Fetch the raw table data. If the font file is memory-mapped,
+		a read-only memoryview of the mapped table is returned instead of
+		a bytes copy.
+		"""
 		entry = self.tables[Tag(tag)]
 		data = entry.loadData (self.file)
 		if self.checkChecksums:
 			if tag == 'head':
 				# Beh: we have to special-case the 'head' table.
-				checksum = calcChecksum(data[:8] + b'\0\0\0\0' + data[12:])
+				checksum = calcChecksum(bytes(data[:8]) + b'\0\0\0\0' + data[12:])
 			else:
 				checksum = calcChecksum(data)
 			if self.checkChecksums > 1:
@@ -120,7 +125,13 @@ class SFNTReader(object):
 		del self.tables[Tag(tag)]
 
 	def close(self):
-		self.file.close()
+		try:
+			self.file.close()
+		except BufferError:
+			# A memory-mapped file can't be closed while table data still
+			# references it; the mapping is released when the last of
+			# those memoryviews is garbage-collected.
+			pass
 
 	def __deepcopy__(self, memo):
 		"""Overrides the default deepcopy of SFNTReader object, to make it work
@@ -154,6 +165,10 @@ ZLIB_COMPRESSION_LEVEL = 6
 # The Python bindings are available at https://pypi.python.org/pypi/zopfli
 USE_ZOPFLI = False
 
+# size of the chunks of table data fed to the zlib compressor when writing
+# WOFF 1.0 tables, so that the compressed table is never held in memory
+ZLIB_CHUNK_SIZE = 1 << 16
+
 # mapping between zlib's compression levels and zopfli's 'numiterations'.
 # Use lower values for files over several MB in size or it will be too slow
 ZOPFLI_LEVELS = {
@@ -255,7 +270,7 @@ class SFNTWriter(object):
 		entry.tag = tag
 		entry.offset = self.nextTableOffset
 		if tag == 'head':
-			entry.checkSum = calcChecksum(data[:8] + b'\0\0\0\0' + data[12:])
+			entry.checkSum = calcChecksum(bytes(data[:8]) + b'\0\0\0\0' + data[12:])
 			self.headTable = data
 			entry.uncompressed = True
 		else:
@@ -473,8 +488,12 @@ class DirectoryEntry(object):
 			return "<%s at %x>" % (self.__class__.__name__, id(self))
 
 	def loadData(self, file):
-		file.seek(self.offset)
-		data = file.read(self.length)
+		if isinstance(file, mmap.mmap):
+			# zero-copy slice of the memory-mapped file
+			data = memoryview(file)[self.offset:self.offset + self.length]
+		else:
+			file.seek(self.offset)
+			data = file.read(self.length)
 		assert len(data) == self.length
 		if hasattr(self.__class__, 'decodeData'):
 			data = self.decodeData(data)
@@ -524,6 +543,41 @@ class WOFFDirectoryEntry(DirectoryEntry):
 			assert len(data) == self.origLength
 		return data
 
+	def saveData(self, file, data):
+		"""Compress the table data incrementally with zlib, writing the
+		compressed chunks to the file as they come. If the compressed data
+		would not be smaller than the original, the original is written.
+		Zopfli can only compress whole tables, so it uses encodeData.
+		"""
+		level = self.zlibCompressionLevel
+		if self.uncompressed or (USE_ZOPFLI and level != 0):
+			return super(WOFFDirectoryEntry, self).saveData(file, data)
+		if not (0 <= level <= 9):
+			raise ValueError('Bad compression level: %s' % level)
+		import zlib
+		self.origLength = len(data)
+		file.seek(self.offset)
+		compressor = zlib.compressobj(level)
+		view = memoryview(data)
+		length = 0
+		for i in range(0, self.origLength, ZLIB_CHUNK_SIZE):
+			chunk = compressor.compress(view[i:i + ZLIB_CHUNK_SIZE])
+			if length + len(chunk) >= self.origLength:
+				break
+			file.write(chunk)
+			length += len(chunk)
+		else:
+			chunk = compressor.flush()
+			if length + len(chunk) < self.origLength:
+				file.write(chunk)
+				self.length = length + len(chunk)
+				return
+		# Encode uncompressed, overwriting what was written so far
+		# (always less than the original length)
+		file.seek(self.offset)
+		file.write(data)
+		self.length = self.origLength
+
 	def encodeData(self, data):
 		self.origLength = len(data)
 		if not self.uncompressed:
@@ -580,7 +634,7 @@ def calcChecksum(data):
 	"""
 	remainder = len(data) % 4
 	if remainder:
-		data += b"\0" * (4 - remainder)
+		data = bytes(data) + b"\0" * (4 - remainder)
 	value = 0
 	blockSize = 4096
 	assert blockSize % 4 == 0
@@ -590,6 +644,16 @@ def calcChecksum(data):
 		value = (value + sum(longs)) & 0xffffffff
 	return value
 
+def mapFile(file):
+	"""Return a read-only memory map of the whole of 'file', which must
+	be a file object backed by a real file descriptor.
+	"""
+	fileno = file.fileno()
+	# mmap can't map an empty file
+	if os.fstat(fileno).st_size == 0:
+		raise TTLibError("Not a TrueType or OpenType font (not enough data)")
+	return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
 def readTTCHeader(file):
 	file.seek(0)
 	data = file.read(ttcHeaderSize)
@@ -0,0 +1,138 @@
+"""A cache of decompiled tables, to share them between TTFont instances."""
+
+from fontTools.misc.py23 import *
+from collections import OrderedDict
+import hashlib
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+# Tables that hand the glyph order over to the font only once, and thus
+# can't be shared between fonts.
+_uncacheableTables = frozenset(["post", "CFF "])
+
+# Tables whose decompiled form only depends on their own data, and not on
+# the glyph order of the font.
+_glyphOrderIndependentTables = frozenset([
+	"head", "hhea", "vhea", "maxp", "name", "OS/2", "CFF2",
+	"cvt ", "fpgm", "prep", "gasp", "DSIG", "fvar", "avar", "STAT", "meta",
+	"ltag",
+])
+
+
+class TableCache(object):
+
+	"""A size-bounded, least-recently-used cache of decompiled tables, that
+	can be shared by TTFont instances through their 'tableCache' argument:
+
+		cache = TableCache(maxSize=64)
+		font1 = TTFont(path1, tableCache=cache)
+		font2 = TTFont(path2, tableCache=cache)
+
+	When a font is about to decompile a table, it looks up a table with the
+	same tag and binary data in the cache first, and if found, uses that
+	table object instead. The key is a digest of the table data, plus a
+	digest of the glyph order for the tables whose decompiled form depends
+	on it (e.g. 'cmap', 'GSUB' or 'glyf'), so that fonts only share tables
+	that decompile to the same thing. The 'post' and 'CFF ' tables, which
+	the fonts get their glyph order from, are never cached.
+
+	Note that the fonts then share the very same table objects: modifying a
+	table of one font modifies it for all fonts that got it from the cache.
+	Use only if the tables are not modified, or you know what you are doing.
+
+	'maxSize' is the maximum number of tables kept; when exceeded, the least
+	recently used ones are evicted. If None, the cache is unbounded.
+
+	The 'hits', 'misses' and 'evictions' attributes count the lookups that
+	found a table, those that didn't, and the tables evicted.
+	"""
+
+	def __init__(self, maxSize=128):
+		if maxSize is not None and maxSize < 0:
+			raise ValueError("maxSize must be None or >= 0: %r" % maxSize)
+		self.maxSize = maxSize
+		self._tables = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	@staticmethod
+	def makeKey(tag, data, glyphOrderDigest=None):
+		"""Return the cache key for a table with the given tag and binary
+		data. 'glyphOrderDigest' (see digestGlyphOrder) is ignored for the
+		tables that don't depend on the glyph order."""
+		tag = Tag(tag)
+		if tag in _glyphOrderIndependentTables:
+			glyphOrderDigest = None
+		return (tag, len(data), hashlib.sha1(data).digest(), glyphOrderDigest)
+
+	@staticmethod
+	def isCacheable(tag):
+		return Tag(tag) not in _uncacheableTables
+
+	@staticmethod
+	def dependsOnGlyphOrder(tag):
+		return Tag(tag) not in _glyphOrderIndependentTables
+
+	@staticmethod
+	def digestGlyphOrder(glyphOrder):
+		digest = hashlib.sha1()
+		for glyphName in glyphOrder:
+			digest.update(tobytes(glyphName, encoding="utf-8"))
+			digest.update(b"\0")
+		return digest.digest()
+
+	def get(self, key, default=None):
+		try:
+			table = self._tables[key]
+		except KeyError:
+			self.misses += 1
+			return default
+		self.hits += 1
+		self._tables.move_to_end(key)
+		return table
+
+	def __setitem__(self, key, table):
+		# Tables may decompile parts of themselves lazily, from the font that
+		# loaded them (e.g. 'gvar', or 'GSUB' with TTFont(lazy=True)). They
+		# are fully decompiled before being cached, so that they neither need
+		# that font once it is closed nor keep it in memory.
+		ensureDecompiled = getattr(table, "ensureDecompiled", None)
+		if ensureDecompiled is not None:
+			ensureDecompiled()
+		self._tables[key] = table
+		self._tables.move_to_end(key)
+		if self.maxSize is not None:
+			while len(self._tables) > self.maxSize:
+				evictedKey, _ = self._tables.popitem(last=False)
+				self.evictions += 1
+				log.debug("evicted '%s' table from cache", evictedKey[0])
+
+	def __contains__(self, key):
+		return key in self._tables
+
+	def __len__(self):
+		return len(self._tables)
+
+	def clear(self):
+		"""Remove all tables from the cache; the statistics are kept."""
+		self._tables.clear()
+
+	def getStats(self):
+		"""Return a dict with the current number of tables and the hits,
+		misses and evictions counts."""
+		return {
+			"size": len(self._tables),
+			"maxSize": self.maxSize,
+			"hits": self.hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+		}
+
+	def __repr__(self):
+		return "<%s size=%d maxSize=%r hits=%d misses=%d evictions=%d>" % (
+			self.__class__.__name__, len(self._tables), self.maxSize,
+			self.hits, self.misses, self.evictions)
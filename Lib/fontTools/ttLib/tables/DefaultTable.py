@@ -5,6 +5,11 @@ class DefaultTable(object):
 
 	dependencies = []
 
+	# Set to True by subclasses whose decompile() can work directly on a
+	# memoryview of a memory-mapped font file (see TTFont's 'mmap' argument).
+	# All other tables receive a bytes copy of their data.
+	acceptsMemoryView = False
+
 	def __init__(self, tag=None):
 		if tag is None:
 			tag = getClassTag(self.__class__)
@@ -7,11 +7,17 @@ from fontTools.misc.fixedTools import (
     otRound,
 )
 from fontTools.misc.textTools import safeEval
+from bisect import bisect_left
+from math import floor
 import array
 import io
 import logging
 import struct
 import sys
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 
 # https://www.microsoft.com/typography/otspec/otvarcommonformats.htm
@@ -34,11 +40,288 @@ TUPLE_INDEX_MASK = 0x0fff
 log = logging.getLogger(__name__)
 
 
+def _isNumber(value):
+	return type(value) is int or type(value) is float
+
+
+def _fitsDeltaArray(value):
+	return type(value) is float or -0x80000000 <= value <= 0x7FFFFFFF
+
+
+# For fewer deltas, the overhead of setting up the NumPy arrays outweighs
+# the speedup.
+_numpyMinDeltas = 64
+
+
+def _toNumpy(a):
+	return numpy.frombuffer(a, dtype=numpy.float64 if a.typecode == "d" else numpy.intc)
+
+
+def _scaleDeltaArray(a, scalar):
+	if numpy is not None and len(a) >= _numpyMinDeltas:
+		return array.array("d", (_toNumpy(a) * scalar).tobytes())
+	return array.array("d", [v * scalar for v in a])
+
+
+def _roundDeltaArray(a):
+	if numpy is not None and len(a) >= _numpyMinDeltas:
+		rounded = numpy.floor(_toNumpy(a) + 0.5)
+		if numpy.all(numpy.abs(rounded) <= 0x7FFFFFFF):  # also False for NaN
+			return array.array("i", rounded.astype(numpy.intc).tobytes())
+	# same as otRound
+	return array.array("i", [floor(v + 0.5) for v in a])
+
+
+def _addDeltaArrays(a, b):
+	if a.typecode == b.typecode == "i":
+		if numpy is not None and len(a) >= _numpyMinDeltas:
+			result = _toNumpy(a).astype(numpy.int64) + _toNumpy(b)
+			if numpy.all(numpy.abs(result) <= 0x7FFFFFFF):
+				return array.array("i", result.astype(numpy.intc).tobytes())
+		return array.array("i", [u + v for u, v in zip(a, b)])
+	if numpy is not None and len(a) >= _numpyMinDeltas:
+		return array.array("d", (_toNumpy(a) + _toNumpy(b)).tobytes())
+	return array.array("d", [u + v for u, v in zip(a, b)])
+
+
+class SparseDeltas(object):
+
+	"""The deltas of a TupleVariation, as a list of (x, y) tuples ('gvar')
+	or numbers ('cvar') with None where a point has no explicit delta.
+
+	Only the explicit deltas are stored: their sorted point indices in the
+	'points' array, and their values in the parallel 'x' and 'y' arrays ('y'
+	is None for numbers). The value arrays hold integers, or floats as soon
+	as any delta is a float. Deltas of any other type are kept in a plain
+	list instead, in which case 'points', 'x' and 'y' are None.
+	"""
+
+	def __init__(self, deltas=()):
+		self.length = 0
+		self.points = array.array("I")
+		self.x = array.array("i")
+		self.y = None
+		self._list = None
+		if isinstance(deltas, SparseDeltas):
+			self.length = deltas.length
+			if deltas.points is None:
+				self._setList(deltas._list)
+			else:
+				self.points = deltas.points[:]
+				self.x = deltas.x[:]
+				self.y = deltas.y[:] if deltas.y is not None else None
+		else:
+			self._fromIterable(deltas)
+
+	@classmethod
+	def fromArrays(cls, length, points, x, y=None):
+		"""Return the deltas of 'length' points with the values 'x' (and 'y')
+		at the point indices 'points'. Later deltas for the same point
+		override earlier ones, and points out of range are ignored."""
+		if not isinstance(points, range) or points != range(length):
+			if not all(0 <= p < length for p in points) or \
+					not all(p < q for p, q in zip(points, points[1:])):
+				deltas = [None] * length
+				values = x if y is None else zip(x, y)
+				for p, value in zip(points, values):
+					if 0 <= p < length:
+						deltas[p] = value
+				return cls(deltas)
+		self = cls()
+		self.length = length
+		if len(points) == 0:
+			return self
+		self.points = array.array("I", points)
+		self.x = array.array("i", x)
+		if y is not None:
+			self.y = array.array("i", y)
+		return self
+
+	def _fromIterable(self, deltas):
+		from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+		if isinstance(deltas, GlyphCoordinates):
+			a = deltas.array
+			typecode = "d" if a.typecode == "d" else "i"
+			self.length = len(deltas)
+			self.points = array.array("I", range(self.length))
+			self.x = array.array(typecode, a[0::2])
+			self.y = array.array(typecode, a[1::2])
+			return
+		deltas = list(deltas)
+		self.length = len(deltas)
+		points = []
+		xs = []
+		ys = []
+		isFloat = False
+		for i, delta in enumerate(deltas):
+			if delta is None:
+				continue
+			if type(delta) is tuple and len(delta) == 2 and not (points and not ys):
+				x, y = delta
+				if not (_isNumber(x) and _isNumber(y)):
+					break
+				ys.append(y)
+				isFloat = isFloat or type(x) is float or type(y) is float
+			elif _isNumber(delta) and not ys:
+				x = delta
+				isFloat = isFloat or type(x) is float
+			else:
+				break
+			points.append(i)
+			xs.append(x)
+		else:
+			if not points:
+				return
+			typecode = "d" if isFloat else "i"
+			try:
+				self.points = array.array("I", points)
+				self.x = array.array(typecode, xs)
+				self.y = array.array(typecode, ys) if ys else None
+				return
+			except OverflowError:
+				pass
+		self._setList(deltas)
+
+	def _setList(self, deltas):
+		self.length = len(deltas)
+		self.points = self.x = self.y = None
+		self._list = list(deltas)
+
+	def _ensureFloat(self):
+		if self.x.typecode != "d":
+			self.x = array.array("d", self.x)
+			if self.y is not None:
+				self.y = array.array("d", self.y)
+
+	def tolist(self):
+		"""Return the deltas as a list, with None for inferred points."""
+		if self.points is None:
+			return self._list[:]
+		result = [None] * self.length
+		if self.y is None:
+			for p, x in zip(self.points, self.x):
+				result[p] = x
+		else:
+			for p, x, y in zip(self.points, self.x, self.y):
+				result[p] = (x, y)
+		return result
+
+	def __len__(self):
+		return self.length
+
+	def __iter__(self):
+		return iter(self.tolist())
+
+	def __repr__(self):
+		return repr(self.tolist())
+
+	def __eq__(self, other):
+		if isinstance(other, SparseDeltas):
+			if self.points is not None and other.points is not None:
+				return (self.length == other.length and
+				        self.points == other.points and
+				        self.x == other.x and self.y == other.y)
+			return self.tolist() == other.tolist()
+		if isinstance(other, list):
+			return self.tolist() == other
+		return NotImplemented
+
+	def __contains__(self, value):
+		if self.points is not None and value is None:
+			return len(self.points) < self.length
+		return value in self.tolist()
+
+	def _index(self, index):
+		if index < 0:
+			index += self.length
+		if not 0 <= index < self.length:
+			raise IndexError("delta index out of range")
+		return index
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(self.length))]
+		if self.points is None:
+			return self._list[index]
+		index = self._index(index)
+		pos = bisect_left(self.points, index)
+		if pos == len(self.points) or self.points[pos] != index:
+			return None
+		if self.y is None:
+			return self.x[pos]
+		return (self.x[pos], self.y[pos])
+
+	def __setitem__(self, index, value):
+		if isinstance(index, slice):
+			indices = range(*index.indices(self.length))
+			values = list(value)
+			if len(values) != len(indices):
+				raise ValueError(
+					"cannot change the number of deltas: expected %d, found %d"
+					% (len(indices), len(values)))
+			for i, v in zip(indices, values):
+				self[i] = v
+			return
+		if self.points is not None and not self._setDelta(self._index(index), value):
+			self._setList(self.tolist())
+		if self.points is None:
+			self._list[index] = value
+
+	def _setDelta(self, index, value):
+		points = self.points
+		pos = bisect_left(points, index)
+		found = pos < len(points) and points[pos] == index
+		if value is None:
+			if found:
+				del points[pos]
+				del self.x[pos]
+				if self.y is not None:
+					del self.y[pos]
+				if not points:
+					self.x = array.array("i")
+					self.y = None
+			return True
+		if type(value) is tuple and len(value) == 2:
+			if points and self.y is None:
+				return False
+			values = value
+		elif points and self.y is not None:
+			return False
+		else:
+			values = (value,)
+		if not all(_isNumber(v) and _fitsDeltaArray(v) for v in values):
+			return False
+		if any(type(v) is float for v in values):
+			self._ensureFloat()
+		if not points and len(values) == 2:
+			self.y = array.array(self.x.typecode)
+		if found:
+			self.x[pos] = values[0]
+			if len(values) == 2:
+				self.y[pos] = values[1]
+		else:
+			points.insert(pos, index)
+			self.x.insert(pos, values[0])
+			if len(values) == 2:
+				self.y.insert(pos, values[1])
+		return True
+
+
 class TupleVariation(object):
 
 	def __init__(self, axes, coordinates):
 		self.axes = axes.copy()
-		self.coordinates = coordinates[:]
+		self.coordinates = coordinates
+
+	@property
+	def coordinates(self):
+		"""The deltas, as a list-like SparseDeltas. Assigning any sequence
+		of deltas stores a copy of them."""
+		return self._coordinates
+
+	@coordinates.setter
+	def coordinates(self, coordinates):
+		self._coordinates = SparseDeltas(coordinates)
 
 	def __repr__(self):
 		axes = ",".join(sorted(["%s=%s" % (name, value) for (name, value) in self.axes.items()]))
@@ -48,6 +331,8 @@ class TupleVariation(object):
 		return self.coordinates == other.coordinates and self.axes == other.axes
 
 	def getUsedPoints(self):
+		if self.coordinates.points is not None:
+			return set(self.coordinates.points)
 		result = set()
 		for i, point in enumerate(self.coordinates):
 			if point is not None:
@@ -60,6 +345,8 @@ class TupleVariation(object):
 		If the result is False, the TupleVariation can be omitted from the font
 		without making any visible difference.
 		"""
+		if self.coordinates.points is not None:
+			return len(self.coordinates.points) > 0
 		return any(c is not None for c in self.coordinates)
 
 	def toXML(self, writer, axisTags):
@@ -299,6 +586,14 @@ class TupleVariation(object):
 		return (result, pos)
 
 	def compileDeltas(self, points):
+		deltas = self.coordinates
+		if deltas.points is not None and set(deltas.points).issubset(points):
+			if deltas.y is None:
+				if deltas.x.typecode == "d":
+					raise TypeError("invalid type of delta: %s" % float)
+				return self.compileDeltaValues_(deltas.x.tolist())
+			return (self.compileDeltaValues_(deltas.x.tolist()) +
+			        self.compileDeltaValues_(deltas.y.tolist()))
 		deltaX = []
 		deltaY = []
 		for p in sorted(list(points)):
@@ -453,6 +748,11 @@ class TupleVariation(object):
 		""" Return 2 if coordinates are (x, y) as in gvar, 1 if single values
 		as in cvar, or 0 if empty.
 		"""
+		deltas = self.coordinates
+		if deltas.points is not None:
+			if not deltas.points:
+				return 0
+			return 1 if deltas.y is None else 2
 		firstDelta = next((c for c in self.coordinates if c is not None), None)
 		if firstDelta is None:
 			return 0  # empty or has no impact
@@ -468,6 +768,12 @@ class TupleVariation(object):
 	def scaleDeltas(self, scalar):
 		if scalar == 1.0:
 			return  # no change
+		deltas = self.coordinates
+		if deltas.points is not None and type(scalar) is float:
+			deltas.x = _scaleDeltaArray(deltas.x, scalar)
+			if deltas.y is not None:
+				deltas.y = _scaleDeltaArray(deltas.y, scalar)
+			return
 		coordWidth = self.getCoordWidth()
 		self.coordinates = [
 			None
@@ -479,6 +785,18 @@ class TupleVariation(object):
 		]
 
 	def roundDeltas(self):
+		deltas = self.coordinates
+		if deltas.points is not None:
+			if deltas.x.typecode == "i":
+				return  # already integers
+			try:
+				x = _roundDeltaArray(deltas.x)
+				if deltas.y is not None:
+					deltas.y = _roundDeltaArray(deltas.y)
+				deltas.x = x
+				return
+			except OverflowError:
+				pass
 		coordWidth = self.getCoordWidth()
 		self.coordinates = [
 			None
@@ -502,17 +820,22 @@ class TupleVariation(object):
 					"Expected len(origCoords) == %d; found %d"
 					% (len(self.coordinates), len(origCoords))
 				)
-			self.coordinates = iup_delta(self.coordinates, origCoords, endPts)
+			self.coordinates = iup_delta(self.coordinates.tolist(), origCoords, endPts)
 
-	def optimize(self, origCoords, endPts, tolerance=0.5, isComposite=False):
+	def optimize(self, origCoords, endPts, tolerance=0.5, isComposite=False,
+			deltaOpt=None):
+		"""Leave out the deltas that can be inferred, if that makes the
+		variation smaller. 'deltaOpt' is the result of iup_delta_optimize
+		for the deltas, if already known; see iup_delta_optimize_glyphs."""
 		from fontTools.varLib.iup import iup_delta_optimize
 
 		if None in self.coordinates:
 			return  # already optimized
 
-		deltaOpt = iup_delta_optimize(
-		    self.coordinates, origCoords, endPts, tolerance=tolerance
-		)
+		if deltaOpt is None:
+			deltaOpt = iup_delta_optimize(
+			    self.coordinates.tolist(), origCoords, endPts, tolerance=tolerance
+			)
 		if None in deltaOpt:
 			if isComposite and all(d is None for d in deltaOpt):
 				# Fix for macOS composites
@@ -541,6 +864,18 @@ class TupleVariation(object):
 			raise ValueError(
 				"cannot sum TupleVariation deltas with different lengths"
 			)
+		if (deltas1.points is not None and deltas2.points is not None and
+				deltas1.y is not None and deltas2.y is not None and
+				len(deltas1.points) == len(deltas2.points) == length):
+			# gvar deltas without inferred points: sum the arrays at once
+			try:
+				x = _addDeltaArrays(deltas1.x, deltas2.x)
+				deltas1.y = _addDeltaArrays(deltas1.y, deltas2.y)
+				deltas1.x = x
+				return self
+			except OverflowError:
+				pass
+		deltas1 = deltas1.tolist()
 		# 'None' values have different meanings in gvar vs cvar TupleVariations:
 		# within the gvar, when deltas are not provided explicitly for some points,
 		# they need to be inferred; whereas for the 'cvar' table, if deltas are not
@@ -566,6 +901,7 @@ class TupleVariation(object):
 				elif d1 is None and d2 is not None:
 					deltas1[i] = d2
 				# elif d2 is None do nothing
+		self.coordinates = deltas1
 		return self
 
 
@@ -710,23 +1046,17 @@ def decompileTupleVariation_(pointCount, sharedTuples, sharedPoints,
 	else:
 		points = sharedPoints
 
-	deltas = [None] * pointCount
-
 	if tableTag == "cvar":
 		deltas_cvt, pos = TupleVariation.decompileDeltas_(
 			len(points), tupleData, pos)
-		for p, delta in zip(points, deltas_cvt):
-			if 0 <= p < pointCount:
-				deltas[p] = delta
+		deltas = SparseDeltas.fromArrays(pointCount, points, deltas_cvt)
 
 	elif tableTag == "gvar":
 		deltas_x, pos = TupleVariation.decompileDeltas_(
 			len(points), tupleData, pos)
 		deltas_y, pos = TupleVariation.decompileDeltas_(
 			len(points), tupleData, pos)
-		for p, x, y in zip(points, deltas_x, deltas_y):
-			if 0 <= p < pointCount:
-				deltas[p] = (x, y)
+		deltas = SparseDeltas.fromArrays(pointCount, points, deltas_x, deltas_y)
 
 	return TupleVariation(axes, deltas)
 
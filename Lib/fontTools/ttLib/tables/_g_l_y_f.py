@@ -8,6 +8,7 @@ from fontTools import version
 from fontTools.misc.textTools import safeEval, pad
 from fontTools.misc.arrayTools import calcBounds, calcIntBounds, pointInRect
 from fontTools.misc.bezierTools import calcQuadraticBounds
+from fontTools.misc.parallelTools import parallelMap
 from fontTools.misc.fixedTools import (
 	fixedToFloat as fi2fl,
 	floatToFixed as fl2fi,
@@ -25,6 +26,10 @@ import logging
 import os
 from fontTools.misc import xmlWriter
 from fontTools.misc.filenames import userNameToFileName
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 log = logging.getLogger(__name__)
 
@@ -54,6 +59,19 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 	# no padding, except for when padding would allow to use short loca offsets.
 	padding = 1
 
+	# If True, the coordinates of simple glyphs are packed with the optimal
+	# (dynamic programming) algorithm, which can produce slightly smaller data
+	# than the default greedy one, but is slower.
+	optimizeSize = False
+
+	# If greater than 1, compile() compiles the glyphs in a pool of this many
+	# processes; see compileGlyphs().
+	workers = None
+
+	# glyph data is kept as slices of the table data until expanded, so
+	# with a memory-mapped font compact glyphs don't copy anything.
+	acceptsMemoryView = True
+
 	def decompile(self, data, ttFont):
 		loca = ttFont['loca']
 		pos = int(loca[0])
@@ -87,15 +105,43 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 	def compile(self, ttFont):
 		if not hasattr(self, "glyphOrder"):
 			self.glyphOrder = ttFont.getGlyphOrder()
+		dataList, locations = self.compileGlyphs(
+			ttFont.recalcBBoxes, workers=self.workers)
+		data = bytesjoin(dataList)
+		if 'loca' in ttFont:
+			ttFont['loca'].set(locations)
+		if 'maxp' in ttFont:
+			ttFont['maxp'].numGlyphs = len(self.glyphs)
+		if not data:
+		# As a special case when all glyph in the font are empty, add a zero byte
+		# to the table, so that OTS doesn’t reject it, and to make the table work
+		# on Windows as well.
+		# See https://github.com/khaledhosny/ots/issues/52
+			data = b"\0"
+		return data
+
+	def compileGlyphs(self, recalcBBoxes=True, workers=None):
+		"""Compile the glyphs in glyph order, and return a (dataList, locations)
+		tuple: the compiled data of each glyph, padded according to the
+		'padding' attribute, and the 'loca' offsets.
+
+		If 'workers' is greater than 1, the glyphs are compiled in chunks by
+		a pool of that many processes. This requires the 'fork' start method
+		of the multiprocessing module; elsewhere glyphs are compiled serially.
+		"""
 		padding = self.padding
 		assert padding in (0, 1, 2, 4)
+		if workers is not None and workers > 1:
+			glyphDataList = self._compileGlyphsInParallel(recalcBBoxes, workers)
+		else:
+			glyphDataList = [
+				self.glyphs[glyphName].compile(self, recalcBBoxes)
+				for glyphName in self.glyphOrder
+			]
 		locations = []
 		currentLocation = 0
 		dataList = []
-		recalcBBoxes = ttFont.recalcBBoxes
-		for glyphName in self.glyphOrder:
-			glyph = self.glyphs[glyphName]
-			glyphData = glyph.compile(self, recalcBBoxes)
+		for glyphData in glyphDataList:
 			if padding > 1:
 				glyphData = pad(glyphData, size=padding)
 			locations.append(currentLocation)
@@ -117,18 +163,24 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 					currentLocation += len(glyphData)
 				locations[len(dataList)] = currentLocation
 
-		data = bytesjoin(dataList)
-		if 'loca' in ttFont:
-			ttFont['loca'].set(locations)
-		if 'maxp' in ttFont:
-			ttFont['maxp'].numGlyphs = len(self.glyphs)
-		if not data:
-		# As a special case when all glyph in the font are empty, add a zero byte
-		# to the table, so that OTS doesn’t reject it, and to make the table work
-		# on Windows as well.
-		# See https://github.com/khaledhosny/ots/issues/52
-			data = b"\0"
-		return data
+		return dataList, locations
+
+	def _compileGlyphsInParallel(self, recalcBBoxes, workers):
+		glyphOrder = self.glyphOrder
+		glyphs = self.glyphs
+		glyphDataList = parallelMap(
+			lambda glyphName: glyphs[glyphName].compile(self, recalcBBoxes),
+			glyphOrder, workers)
+		if recalcBBoxes:
+			# the bounding boxes were recalculated in the worker processes
+			for glyphName, glyphData in zip(glyphOrder, glyphDataList):
+				glyph = self.glyphs[glyphName]
+				if hasattr(glyph, "data"):
+					glyph.data = glyphData
+				elif glyph.numberOfContours:
+					glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax = \
+						struct.unpack(">4h", glyphData[2:10])
+		return glyphDataList
 
 	def toXML(self, writer, ttFont, splitGlyphs=False):
 		notice = (
@@ -445,9 +497,11 @@ _flagSignBytes = {
 
 def flagBest(x, y, onCurve):
 	"""For a given x,y delta pair, returns the flag that packs this pair
-	most efficiently, as well as the number of byte cost of such flag."""
+	most efficiently, as well as the number of byte cost of such flag.
+	'onCurve' can also be the point's original flag, of which the bits in
+	keepFlags are retained."""
 
-	flag = flagOnCurve if onCurve else 0
+	flag = onCurve & keepFlags
 	cost = 0
 	# do x
 	if x == 0:
@@ -477,7 +531,7 @@ def flagFits(newFlag, oldFlag, mask):
 	return newBytes == oldBytes or abs(newBytes) > abs(oldBytes)
 
 def flagSupports(newFlag, oldFlag):
-	return ((oldFlag & flagOnCurve) == (newFlag & flagOnCurve) and
+	return ((oldFlag & keepFlags) == (newFlag & keepFlags) and
 		flagFits(newFlag, oldFlag, flagXsame|flagXShort) and
 		flagFits(newFlag, oldFlag, flagYsame|flagYShort))
 
@@ -523,6 +577,13 @@ class Glyph(object):
 			return
 		self.data = data
 
+	def __getstate__(self):
+		state = self.__dict__
+		if isinstance(state.get("data"), memoryview):
+			# views of a memory-mapped font can't be copied or pickled
+			state = dict(state, data=state["data"].tobytes())
+		return state
+
 	def compact(self, glyfTable, recalcBBoxes=True):
 		data = self.compile(glyfTable, recalcBBoxes)
 		self.__dict__.clear()
@@ -554,6 +615,8 @@ class Glyph(object):
 			if recalcBBoxes:
 				# must unpack glyph in order to recalculate bounding box
 				self.expand(glyfTable)
+			elif isinstance(self.data, memoryview):
+				return self.data.tobytes()
 			else:
 				return self.data
 		if self.numberOfContours == 0:
@@ -564,7 +627,8 @@ class Glyph(object):
 		if self.isComposite():
 			data = data + self.compileComponents(glyfTable)
 		else:
-			data = data + self.compileCoordinates()
+			optimizeSize = getattr(glyfTable, "optimizeSize", False)
+			data = data + self.compileCoordinates(optimizeSize)
 		return data
 
 	def toXML(self, writer, ttFont):
@@ -701,6 +765,11 @@ class Glyph(object):
 		self.program.fromBytecode(data[:instructionLength])
 		data = data[instructionLength:]
 		nCoordinates = self.endPtsOfContours[-1] + 1
+		if numpy is not None and nCoordinates >= _numpyMinCoordinates:
+			result = _decompileCoordinatesNumpy(nCoordinates, data)
+			if result is not None:
+				self.coordinates, self.flags = result
+				return
 		flags, xCoordinates, yCoordinates = \
 				self.decompileCoordinatesRaw(nCoordinates, data)
 
@@ -798,7 +867,7 @@ class Glyph(object):
 			data = data + struct.pack(">h", len(instructions)) + instructions
 		return data
 
-	def compileCoordinates(self):
+	def compileCoordinates(self, optimizeSize=False):
 		assert len(self.coordinates) == len(self.flags)
 		data = []
 		endPtsOfContours = array.array("h", self.endPtsOfContours)
@@ -814,9 +883,10 @@ class Glyph(object):
 			deltas.toInt()
 		deltas.absoluteToRelative()
 
-		# TODO(behdad): Add a configuration option for this?
-		deltas = self.compileDeltasGreedy(self.flags, deltas)
-		#deltas = self.compileDeltasOptimal(self.flags, deltas)
+		if optimizeSize:
+			deltas = self.compileDeltasOptimal(self.flags, deltas)
+		else:
+			deltas = self.compileDeltasGreedy(self.flags, deltas)
 
 		data.extend(deltas)
 		return bytesjoin(data)
@@ -1260,6 +1330,83 @@ class Glyph(object):
 		result = self.__eq__(other)
 		return result if result is NotImplemented else not result
 
+
+# For smaller glyphs, the overhead of setting up the NumPy arrays outweighs
+# the speedup.
+_numpyMinCoordinates = 16
+
+
+def _decompileCoordinatesNumpy(nCoordinates, data):
+	"""Decode the flags and coordinates of a simple glyph like
+	Glyph.decompileCoordinatesRaw and Glyph.decompileCoordinates do, using
+	NumPy to expand the flag repeats, split the x and y coordinate streams
+	and sum up the deltas in bulk.
+
+	Returns a (GlyphCoordinates, flags) tuple, or None if the data is
+	malformed or the coordinates don't fit in 16 bits; the caller then falls
+	back to the pure-Python code, which reports the problem.
+	"""
+	if nCoordinates <= 0:
+		return None
+	# The flag runs must be parsed sequentially, but there are at most as
+	# many flag bytes as points, and usually far fewer with repeats.
+	flagBytes = bytearray(data[:2*nCoordinates])
+	runFlags = []
+	runLengths = []
+	i = j = 0
+	try:
+		while j < nCoordinates:
+			flag = flagBytes[i]
+			i += 1
+			repeat = 1
+			if flag & flagRepeat:
+				repeat = flagBytes[i] + 1
+				i += 1
+			runFlags.append(flag)
+			runLengths.append(repeat)
+			j += repeat
+	except IndexError:
+		return None
+	if j != nCoordinates:
+		return None  # "bad glyph flags"
+
+	flags = numpy.repeat(numpy.array(runFlags, dtype=numpy.uint8), runLengths)
+	buf = numpy.frombuffer(data, dtype=numpy.uint8)[i:].astype(numpy.int32)
+	pos = 0
+	deltas = []
+	for isShort, isSame in ((flagXShort, flagXsame), (flagYShort, flagYsame)):
+		short = (flags & isShort) != 0
+		same = (flags & isSame) != 0
+		long_ = ~(short | same)
+		sizes = numpy.where(short, 1, numpy.where(same, 0, 2))
+		ends = numpy.cumsum(sizes)
+		dataLen = int(ends[-1])
+		if pos + dataLen > len(buf):
+			return None
+		starts = pos + ends - sizes
+		delta = numpy.zeros(nCoordinates, dtype=numpy.int32)
+		shortValues = buf[starts[short]]
+		delta[short] = numpy.where(same[short], shortValues, -shortValues)
+		longStarts = starts[long_]
+		longValues = (buf[longStarts] << 8) | buf[longStarts + 1]
+		delta[long_] = numpy.where(
+			longValues >= 0x8000, longValues - 0x10000, longValues)
+		deltas.append(numpy.cumsum(delta))
+		pos += dataLen
+	if len(buf) - pos >= 4:
+		log.warning("too much glyph data: %d excess bytes", len(buf) - pos)
+
+	points = numpy.empty(2*nCoordinates, dtype=numpy.int32)
+	points[0::2], points[1::2] = deltas
+	if points.min() < -0x8000 or points.max() > 0x7FFF:
+		return None
+	coordinates = GlyphCoordinates()
+	coordinates._a.frombytes(points.astype(numpy.int16).tobytes())
+	# discard all flags except "keepFlags"
+	flags = array.array("B", (flags & keepFlags).tobytes())
+	return coordinates, flags
+
+
 class GlyphComponent(object):
 
 	def __init__(self):
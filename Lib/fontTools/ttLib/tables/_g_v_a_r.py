@@ -4,6 +4,7 @@ from fontTools.misc import sstruct
 from fontTools.misc.textTools import safeEval
 from fontTools.ttLib import TTLibError
 from . import DefaultTable
+from collections import UserDict
 import array
 import itertools
 import logging
@@ -40,6 +41,61 @@ GVAR_HEADER_FORMAT = """
 GVAR_HEADER_SIZE = sstruct.calcsize(GVAR_HEADER_FORMAT)
 
 
+class _LazyGlyphVariations(UserDict):
+	"""Dict mapping glyph names to lists of TupleVariation, where the
+	variations of each glyph are only decompiled on first access.
+
+	Values that have not been accessed yet are kept as the raw glyph
+	variation data, so that table__g_v_a_r.compile can reuse the original
+	bytes of glyphs that were never touched.
+	"""
+
+	def __init__(self, ttFont, axisTags, sharedCoords, rawSharedCoords):
+		UserDict.__init__(self)
+		self.font = ttFont
+		self.axisTags = axisTags
+		self.sharedCoords = sharedCoords
+		self.rawSharedCoords = rawSharedCoords
+
+	def __getitem__(self, glyphName):
+		variations = self.data[glyphName]
+		if not isinstance(variations, list):
+			variations = self.data[glyphName] = self._decompileGlyph(
+				glyphName, variations)
+		return variations
+
+	def _decompileGlyph(self, glyphName, gvarData):
+		if len(gvarData) < 4:
+			# no variations; don't bother loading the glyph
+			return []
+		glyph = self.font["glyf"][glyphName]
+		numPointsInGlyph = table__g_v_a_r.getNumPoints_(glyph)
+		try:
+			return decompileGlyph_(
+				numPointsInGlyph, self.sharedCoords, self.axisTags, gvarData)
+		except Exception:
+			log.error(
+				"Failed to decompile deltas for glyph '%s' (%d points)",
+				glyphName, numPointsInGlyph,
+			)
+			raise
+
+	def getRawData(self, glyphName):
+		"""Return the original compiled variation data of the glyph, or
+		None if it has already been decompiled."""
+		variations = self.data[glyphName]
+		return None if isinstance(variations, list) else variations
+
+	def hasRawData(self):
+		return any(not isinstance(v, list) for v in self.data.values())
+
+	def ensureDecompiled(self):
+		for glyphName in self.data:
+			self[glyphName]
+		# the font is no longer needed
+		self.font = None
+
+
 class table__g_v_a_r(DefaultTable.DefaultTable):
 	dependencies = ["fvar", "glyf"]
 
@@ -50,8 +106,19 @@ class table__g_v_a_r(DefaultTable.DefaultTable):
 
 	def compile(self, ttFont):
 		axisTags = [axis.axisTag for axis in ttFont["fvar"].axes]
-		sharedTuples =  tv.compileSharedTuples(
-			axisTags, itertools.chain(*self.variations.values()))
+		variations = self.variations
+		sharedTuples = None
+		if (isinstance(variations, _LazyGlyphVariations) and
+				variations.hasRawData()):
+			if variations.axisTags == axisTags:
+				# Keep the original shared tuples, as the data of the glyphs
+				# that were never decompiled refers to them by index.
+				sharedTuples = variations.rawSharedCoords
+			else:
+				variations.ensureDecompiled()
+		if sharedTuples is None:
+			sharedTuples = tv.compileSharedTuples(
+				axisTags, itertools.chain(*variations.values()))
 		sharedTupleIndices = {coord:i for i, coord in enumerate(sharedTuples)}
 		sharedTupleSize = sum([len(c) for c in sharedTuples])
 		compiledGlyphs = self.compileGlyphs_(
@@ -82,7 +149,14 @@ class table__g_v_a_r(DefaultTable.DefaultTable):
 
 	def compileGlyphs_(self, ttFont, axisTags, sharedCoordIndices):
 		result = []
+		lazyVariations = isinstance(self.variations, _LazyGlyphVariations)
 		for glyphName in ttFont.getGlyphOrder():
+			if lazyVariations and glyphName in self.variations:
+				rawData = self.variations.getRawData(glyphName)
+				if rawData is not None:
+					# glyph was never accessed: reuse its original bytes
+					result.append(bytes(rawData) + b"\0" * (len(rawData) % 2))
+					continue
 			glyph = ttFont["glyf"][glyphName]
 			pointCount = self.getNumPoints_(glyph)
 			variations = self.variations.get(glyphName, [])
@@ -99,22 +173,23 @@ class table__g_v_a_r(DefaultTable.DefaultTable):
 		offsets = self.decompileOffsets_(data[GVAR_HEADER_SIZE:], tableFormat=(self.flags & 1), glyphCount=self.glyphCount)
 		sharedCoords = tv.decompileSharedTuples(
 			axisTags, self.sharedTupleCount, data, self.offsetToSharedTuples)
-		self.variations = {}
+		coordSize = len(axisTags) * 2
+		rawSharedCoords = [
+			bytes(data[offset : offset + coordSize])
+			for offset in range(
+				self.offsetToSharedTuples,
+				self.offsetToSharedTuples + self.sharedTupleCount * coordSize,
+				coordSize)]
+		self.variations = _LazyGlyphVariations(
+			ttFont, axisTags, sharedCoords, rawSharedCoords)
 		offsetToData = self.offsetToGlyphVariationData
 		for i in range(self.glyphCount):
 			glyphName = glyphs[i]
-			glyph = ttFont["glyf"][glyphName]
-			numPointsInGlyph = self.getNumPoints_(glyph)
 			gvarData = data[offsetToData + offsets[i] : offsetToData + offsets[i + 1]]
-			try:
-				self.variations[glyphName] = decompileGlyph_(
-					numPointsInGlyph, sharedCoords, axisTags, gvarData)
-			except Exception:
-				log.error(
-					"Failed to decompile deltas for glyph '%s' (%d points)",
-					glyphName, numPointsInGlyph,
-				)
-				raise
+			# glyph variations are decompiled lazily, on first access
+			self.variations.data[glyphName] = gvarData
+		if ttFont.lazy is False: # Be lazy for None and True
+			self.variations.ensureDecompiled()
 
 	@staticmethod
 	def decompileOffsets_(data, tableFormat, glyphCount):
@@ -160,6 +235,10 @@ class table__g_v_a_r(DefaultTable.DefaultTable):
 		if sys.byteorder != "big": packed.byteswap()
 		return (packed.tobytes(), tableFormat)
 
+	def ensureDecompiled(self):
+		if isinstance(self.variations, _LazyGlyphVariations):
+			self.variations.ensureDecompiled()
+
 	def toXML(self, writer, ttFont):
 		writer.simpletag("version", value=self.version)
 		writer.newline()
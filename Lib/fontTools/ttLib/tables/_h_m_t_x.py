@@ -19,6 +19,7 @@ class table__h_m_t_x(DefaultTable.DefaultTable):
 	sideBearingName = 'lsb'
 	numberOfMetricsName = 'numberOfHMetrics'
 	longMetricFormat = 'Hh'
+	acceptsMemoryView = True
 
 	def decompile(self, data, ttFont):
 		numGlyphs = ttFont['maxp'].numGlyphs
@@ -40,7 +41,8 @@ class table__h_m_t_x(DefaultTable.DefaultTable):
 		metrics = struct.unpack(metricsFmt, data[:4 * numberOfMetrics])
 		data = data[4 * numberOfMetrics:]
 		numberOfSideBearings = numGlyphs - numberOfMetrics
-		sideBearings = array.array("h", data[:2 * numberOfSideBearings])
+		sideBearings = array.array("h")
+		sideBearings.frombytes(data[:2 * numberOfSideBearings])
 		data = data[2 * numberOfSideBearings:]
 
 		if sys.byteorder != "big": sideBearings.byteswap()
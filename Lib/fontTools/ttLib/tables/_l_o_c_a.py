@@ -11,6 +11,7 @@ log = logging.getLogger(__name__)
 class table__l_o_c_a(DefaultTable.DefaultTable):
 
 	dependencies = ['glyf']
+	acceptsMemoryView = True
 
 	def decompile(self, data, ttFont):
 		longFormat = ttFont['head'].indexToLocFormat
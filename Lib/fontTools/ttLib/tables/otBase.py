@@ -1,5 +1,6 @@
 from fontTools.misc.py23 import *
 from .DefaultTable import DefaultTable
+from collections import UserList
 import sys
 import array
 import struct
@@ -33,6 +34,8 @@ class BaseTTXConverter(DefaultTable):
 	we use for OpenType tables, which is necessarily subtly different.
 	"""
 
+	acceptsMemoryView = True
+
 	def decompile(self, data, font):
 		from . import otTables
 		reader = OTTableReader(data, tableTag=self.tableTag)
@@ -53,20 +56,25 @@ class BaseTTXConverter(DefaultTable):
 						each writer representing a table, and the writer.items list containing
 						the child data strings and writers.
 			call the getAllData method
-				call _doneWriting, which removes duplicates
+				call _doneWriting, which removes duplicates, and joins the consecutive data strings of each table
 				call _gatherTables. This traverses the tables, adding unique occurences to a flat list of tables
-				Traverse the flat list of tables, calling getDataLength on each to update their position
-				Traverse the flat list of tables again, calling getData each get the data in the table, now that
+				Traverse the flat list of tables, adding up their lengths to update their position
+				Traverse the flat list of tables again, to get the data in the table, now that
 				pos's and offset are known.
 
-				If a lookup subtable overflows an offset, we have to start all over.
+				If a lookup subtable overflows an offset, we split the subtable
+				or promote lookups to Extension type, then recompile only the
+				lookups that changed into the existing writer tree, and assemble
+				the data again. If that isn't possible, we start all over.
 		"""
 		overflowRecord = None
+		writer = None
 
 		while True:
 			try:
-				writer = OTTableWriter(tableTag=self.tableTag)
-				self.table.compile(writer, font)
+				if writer is None:
+					writer = OTTableWriter(tableTag=self.tableTag)
+					self.table.compile(writer, font)
 				return writer.getAllData()
 
 			except OTLOffsetOverflowError as e:
@@ -78,6 +86,7 @@ class BaseTTXConverter(DefaultTable):
 				log.info("Attempting to fix OTLOffsetOverflowError %s", e)
 				lastItem = overflowRecord
 
+				lookupsBefore = self._getLookupsState()
 				ok = 0
 				if overflowRecord.itemName is None:
 					from .otTables import fixLookupOverFlows
@@ -94,6 +103,63 @@ class BaseTTXConverter(DefaultTable):
 					if not ok:
 						raise
 
+				lookupsAfter = self._getLookupsState()
+				if lookupsBefore is None or lookupsAfter is None or \
+						len(lookupsBefore) != len(lookupsAfter):
+					writer = None
+					continue
+				changed = set(i for i, (before, after) in
+					enumerate(zip(lookupsBefore, lookupsAfter)) if before != after)
+				if overflowRecord.LookupListIndex is not None:
+					changed.add(overflowRecord.LookupListIndex)
+				if not self._recompileLookups(writer, font, sorted(changed)):
+					writer = None
+
+	def _getLookupsState(self):
+		"""Return, for each lookup, a tuple identifying its type and subtables,
+		to tell which lookups an overflow fix changed; or None if the table
+		has no LookupList."""
+		lookupList = getattr(self.table, "LookupList", None)
+		if lookupList is None:
+			return None
+		return [
+			(lookup.LookupType, tuple(id(st) for st in lookup.SubTable))
+			for lookup in lookupList.Lookup
+		]
+
+	def _recompileLookups(self, writer, font, lookupIndices):
+		"""Replace the writers of the given lookups, in the writer tree rooted
+		at 'writer', with newly compiled ones. Return False if the tree doesn't
+		have the expected shape."""
+		if not lookupIndices:
+			return False
+		for lookupListWriter in writer.items:
+			if getattr(lookupListWriter, "name", None) == "LookupList":
+				break
+		else:
+			return False
+		lookups = self.table.LookupList.Lookup
+		items = list(lookupListWriter.items)
+		positions = [i for i, item in enumerate(items) if hasattr(item, "getData")]
+		if len(positions) != len(lookups):
+			return False
+		for lookupIndex in lookupIndices:
+			pos = positions[lookupIndex]
+			oldWriter = items[pos]
+			subWriter = lookupListWriter.getSubWriter()
+			subWriter.longOffset = oldWriter.longOffset
+			subWriter.name = oldWriter.name
+			subWriter.repeatIndex = lookupIndex
+			lookups[lookupIndex].compile(subWriter, font)
+			items[pos] = subWriter
+		lookupListWriter.items = items
+		return True
+
+	def ensureDecompiled(self):
+		"""Decompile all the subtables that were loaded lazily, so that the
+		table no longer refers to the font it was loaded from."""
+		self.table.ensureDecompiled(recurse=True)
+
 	def toXML(self, writer, font):
 		self.table.toXML2(writer, font)
 
@@ -134,6 +200,15 @@ class OTTableReader(object):
 		offset = self.offset + offset
 		return self.__class__(self.data, self.localState, offset, self.tableTag)
 
+	def __deepcopy__(self, memo):
+		# The data is never modified, so share it instead of copying it;
+		# it may also be a memoryview of a memory-mapped font, which can't
+		# be copied.
+		from copy import deepcopy
+		other = self.copy()
+		other.localState = deepcopy(self.localState, memo)
+		return other
+
 	def readUShort(self):
 		pos = self.pos
 		newpos = pos + 2
@@ -144,7 +219,8 @@ class OTTableReader(object):
 	def readUShortArray(self, count):
 		pos = self.pos
 		newpos = pos + count * 2
-		value = array.array("H", self.data[pos:newpos])
+		value = array.array("H")
+		value.frombytes(self.data[pos:newpos])
 		if sys.byteorder != "big": value.byteswap()
 		self.pos = newpos
 		return value
@@ -194,7 +270,7 @@ class OTTableReader(object):
 	def readTag(self):
 		pos = self.pos
 		newpos = pos + 4
-		value = Tag(self.data[pos:newpos])
+		value = Tag(bytes(self.data[pos:newpos]))
 		assert len(value) == 4, value
 		self.pos = newpos
 		return value
@@ -202,7 +278,7 @@ class OTTableReader(object):
 	def readData(self, count):
 		pos = self.pos
 		newpos = pos + count
-		value = self.data[pos:newpos]
+		value = bytes(self.data[pos:newpos])
 		self.pos = newpos
 		return value
 
@@ -279,7 +355,13 @@ class OTTableWriter(object):
 
 	def __hash__(self):
 		# only works after self._doneWriting() has been called
-		return hash(self.items)
+		try:
+			return self._hash
+		except AttributeError:
+			# The hash of the items tuple isn't cached by Python, and would be
+			# computed again over the whole subtree for each parent table.
+			self._hash = hash(self.items)
+			return self._hash
 
 	def __ne__(self, other):
 		result = self.__eq__(other)
@@ -309,16 +391,64 @@ class OTTableWriter(object):
 		if isExtension:
 			internedTables = {}
 
-		items = self.items
+		# The writer tree may be assembled more than once, after an offset
+		# overflow was fixed (see BaseTTXConverter.compile).
+		# While at it, join consecutive data strings, and compute the length
+		# of the table, for the final assembly in getAllData().
+		items = list(self.items)
+		packedItems = []
+		subTables = []
+		data = []
+		length = 0
 		for i in range(len(items)):
 			item = items[i]
-			if hasattr(item, "getCountData"):
-				items[i] = item.getCountData()
+			if isinstance(item, bytes):
+				data.append(item)
+				length += len(item)
+			elif hasattr(item, "getCountData"):
+				items[i] = item = item.getCountData()
+				data.append(item)
+				length += len(item)
 			elif hasattr(item, "getData"):
 				item._doneWriting(internedTables)
 				if not dontShare:
 					items[i] = item = internedTables.setdefault(item, item)
+				subTables.append((i, item))
+				if data:
+					packedItems.append(b"".join(data))
+					data = []
+				packedItems.append(item)
+				length += 4 if item.longOffset else 2
+			else:
+				item = tobytes(item)
+				data.append(item)
+				length += len(item)
+		if data:
+			packedItems.append(b"".join(data))
 		self.items = tuple(items)
+		self.__dict__.pop("_hash", None)
+		self._subTables = subTables
+		self._packedItems = packedItems
+		self._packedLength = length
+
+	def _getPackedData(self):
+		"""Same as self.getData(), using the items as joined by
+		self._doneWriting()."""
+		items = list(self._packedItems)
+		pos = self.pos
+		for i, item in enumerate(items):
+			if hasattr(item, "getData"):
+				if item.longOffset:
+					items[i] = packULong(item.pos - pos)
+				else:
+					try:
+						items[i] = packUShort(item.pos - pos)
+					except struct.error:
+						# provide data to fix overflow problem.
+						overflowErrorRecord = self.getOverflowErrorRecord(item)
+
+						raise OTLOffsetOverflowError(overflowErrorRecord)
+		return bytesjoin(items)
 
 	def _gatherTables(self, tables, extTables, done):
 		# Convert table references in self.items tree to a flat
@@ -332,8 +462,6 @@ class OTTableWriter(object):
 		done[id(self)] = True
 
 		numItems = len(self.items)
-		iRange = list(range(numItems))
-		iRange.reverse()
 
 		isExtension = hasattr(self, "Extension")
 
@@ -358,11 +486,7 @@ class OTTableWriter(object):
 				# We're a new parent of item
 				pass
 
-		for i in iRange:
-			item = self.items[i]
-			if not hasattr(item, "getData"):
-				continue
-
+		for i, item in reversed(self._subTables):
 			if sortCoverageLast and (i==1) and item.name == 'Coverage':
 				# we've already 'gathered' it above
 				continue
@@ -387,22 +511,23 @@ class OTTableWriter(object):
 		extTables.reverse()
 		# Gather all data in two passes: the absolute positions of all
 		# subtable are needed before the actual data can be assembled.
+		# The data strings in each table are joined once, in the first pass.
 		pos = 0
 		for table in tables:
 			table.pos = pos
-			pos = pos + table.getDataLength()
+			pos = pos + table._packedLength
 
 		for table in extTables:
 			table.pos = pos
-			pos = pos + table.getDataLength()
+			pos = pos + table._packedLength
 
 		data = []
 		for table in tables:
-			tableData = table.getData()
+			tableData = table._getPackedData()
 			data.append(tableData)
 
 		for table in extTables:
-			tableData = table.getData()
+			tableData = table._getPackedData()
 			data.append(tableData)
 
 		return bytesjoin(data)
@@ -547,13 +672,18 @@ class BaseTable(object):
 
 		raise AttributeError(attr)
 
-	def ensureDecompiled(self):
+	def ensureDecompiled(self, recurse=False):
 		reader = self.__dict__.get("reader")
 		if reader:
 			del self.reader
 			font = self.font
 			del self.font
 			self.decompile(reader, font)
+		if recurse:
+			for name, value in list(self.__dict__.items()):
+				decompiled = _ensureDecompiled(value)
+				if decompiled is not value:
+					self.__dict__[name] = decompiled
 
 	@classmethod
 	def getRecordSize(cls, reader):
@@ -788,6 +918,24 @@ class BaseTable(object):
 		return self.__dict__ == other.__dict__
 
 
+def _ensureDecompiled(value):
+	# Decompile the lazily loaded tables in 'value', and return it, or a
+	# plain list of its items if it is a lazily loaded list.
+	if isinstance(value, BaseTable):
+		value.ensureDecompiled(recurse=True)
+	elif isinstance(value, ValueRecord):
+		for v in vars(value).values():
+			_ensureDecompiled(v)
+	elif isinstance(value, (list, UserList)):
+		if not isinstance(value, list):
+			value = list(value)
+		for i, item in enumerate(value):
+			decompiled = _ensureDecompiled(item)
+			if decompiled is not item:
+				value[i] = decompiled
+	return value
+
+
 class FormatSwitchingBaseTable(BaseTable):
 
 	"""Minor specialization of BaseTable, for tables that have multiple
@@ -1,6 +1,7 @@
 from fontTools.misc.py23 import *
 from fontTools.ttLib.ttFont import TTFont
 from fontTools.ttLib.sfnt import readTTCHeader, writeTTCHeader
+from fontTools.ttLib.tableCache import TableCache
 import struct
 import logging
 
@@ -14,9 +15,10 @@ class TTCollection(object):
 
 	If shareTables is True, then different fonts in the collection
 	might point to the same table object if the data for the table was
-	the same in the font file.  Note, however, that this might result
-	in suprises and incorrect behavior if the different fonts involved
-	have different GlyphOrder.  Use only if you know what you are doing.
+	the same in the font file.  Tables that depend on the glyph order are
+	only shared between fonts with the same GlyphOrder.  Note, however,
+	that modifying a shared table modifies it in all the fonts that
+	point to it.  Use only if you know what you are doing.
 	"""
 
 	def __init__(self, file=None, shareTables=False, **kwargs):
@@ -29,11 +31,11 @@ class TTCollection(object):
 		if not hasattr(file, "read"):
 			file = open(file, "rb")
 
-		tableCache = {} if shareTables else None
+		tableCache = TableCache(maxSize=None) if shareTables else None
 
 		header = readTTCHeader(file)
 		for i in range(header.numFonts):
-			font = TTFont(file, fontNumber=i, _tableCache=tableCache, **kwargs)
+			font = TTFont(file, fontNumber=i, tableCache=tableCache, **kwargs)
 			fonts.append(font)
 			
 	def __enter__(self):
@@ -1,11 +1,14 @@
 from fontTools.misc import xmlWriter
 from fontTools.misc.py23 import *
 from fontTools.misc.loggingTools import deprecateArgument
+from fontTools.misc.parallelTools import parallelMap
 from fontTools.ttLib import TTLibError
 from fontTools.ttLib.sfnt import SFNTReader, SFNTWriter
 import os
 import logging
 import itertools
+import hashlib
+import pickle
 
 log = logging.getLogger(__name__)
 
@@ -21,6 +24,7 @@ class TTFont(object):
 			sfntVersion="\000\001\000\000", flavor=None, checkChecksums=False,
 			verbose=None, recalcBBoxes=True, allowVID=False, ignoreDecompileErrors=False,
 			recalcTimestamp=True, fontNumber=-1, lazy=None, quiet=None,
+			mmap=False, reuseUnmodifiedTables=False, tableCache=None,
 			_tableCache=None):
 
 		"""The constructor can be called with a few different arguments.
@@ -78,6 +82,25 @@ class TTFont(object):
 		If lazy is set to True, many data structures are loaded lazily, upon
 		access only.  If it is set to False, many data structures are loaded
 		immediately.  The default is lazy=None which is somewhere in between.
+
+		If mmap is set to True, the font file is memory-mapped instead of being
+		read into memory, and the raw data of the tables is handed to the
+		decompilers as zero-copy memoryview slices of the mapping, so that only
+		the pages of the file that are actually accessed get loaded. The 'file'
+		argument must then be a path or a file object with a fileno().
+
+		If reuseUnmodifiedTables is set to True, a fingerprint of each table is
+		taken right after it is decompiled, and upon save the original binary
+		data is written out again for the tables whose decompiled objects (and
+		the glyph order and the tables they depend on) are unchanged, instead
+		of compiling them. This speeds up saving fonts of which many tables
+		are only read, at the cost of fingerprinting each table on load.
+
+		The 'tableCache' argument can be a fontTools.ttLib.TableCache instance
+		shared by several fonts: tables whose binary data (and glyph order,
+		where relevant) match a table that was decompiled before are then
+		taken from the cache instead of being decompiled again. The cached
+		table objects are shared, so they should not be modified.
 		"""
 
 		for name in ("verbose", "quiet"):
@@ -87,8 +110,10 @@ class TTFont(object):
 			setattr(self, name, val)
 
 		self.lazy = lazy
+		self.mmap = mmap
 		self.recalcBBoxes = recalcBBoxes
 		self.recalcTimestamp = recalcTimestamp
+		self._tableFingerprints = {} if reuseUnmodifiedTables else None
 		self.tables = {}
 		self.reader = None
 
@@ -125,7 +150,16 @@ class TTFont(object):
 			closeStream = False
 			file.seek(0)
 
-		if not self.lazy:
+		if self.mmap:
+			from fontTools.ttLib.sfnt import mapFile
+			self._mappedFileName = getattr(file, "name", None)
+			try:
+				mapped = mapFile(file)
+			finally:
+				if closeStream:
+					file.close()
+			file = mapped
+		elif not self.lazy:
 			# read input file in memory and wrap a stream around it to allow overwriting
 			file.seek(0)
 			tmp = BytesIO(file.read())
@@ -135,11 +169,28 @@ class TTFont(object):
 			if closeStream:
 				file.close()
 			file = tmp
-		self._tableCache = _tableCache
+		self._tableCache = tableCache if tableCache is not None else _tableCache
 		self.reader = SFNTReader(file, checkChecksums, fontNumber=fontNumber)
 		self.sfntVersion = self.reader.sfntVersion
 		self.flavor = self.reader.flavor
 		self.flavorData = self.reader.flavorData
+		if self._tableFingerprints is not None:
+			self._loadGlyphOrderForFingerprints()
+
+	def _loadGlyphOrderForFingerprints(self):
+		# Table fingerprints include the glyph order, so load it upfront:
+		# the tables it is derived from ('post', 'CFF ') modify themselves
+		# when handing it out, so they are only fingerprinted afterwards.
+		fingerprints = self._tableFingerprints
+		self._tableFingerprints = None
+		try:
+			self.getGlyphOrder()
+		except (KeyError, TTLibError):
+			log.debug("can't load glyph order for fingerprinting tables")
+		finally:
+			self._tableFingerprints = fingerprints
+		for tag, table in self.tables.items():
+			fingerprints[tag] = (table, _tableFingerprint(table, self))
 
 	def __enter__(self):
 		return self
@@ -152,24 +203,45 @@ class TTFont(object):
 		if self.reader is not None:
 			self.reader.close()
 
-	def save(self, file, reorderTables=True):
+	def save(self, file, reorderTables=True, workers=None):
 		"""Save the font to disk. Similarly to the constructor,
 		the 'file' argument can be either a pathname or a writable
 		file object.
+
+		If 'workers' is greater than 1, the loaded tables that no other table
+		depends on (e.g. GSUB, GPOS, gvar, cmap) are compiled concurrently in
+		a pool of that many processes, after the tables they depend on have
+		been compiled in this process. This requires the 'fork' start method
+		of the multiprocessing module; elsewhere tables are compiled serially.
+
+		When the output file is seekable and empty (e.g. a pathname), the
+		tables are written to it as soon as they are compiled, and the table
+		directory and checksums are patched in at the end, so that only the
+		tables compiled ahead of their position in the file are held in
+		memory. Otherwise the font is assembled in memory first.
 		"""
 		if not hasattr(file, "write"):
-			if self.lazy and self.reader.file.name == file:
+			if self.lazy and getattr(self.reader.file, "name", None) == file:
 				raise TTLibError(
 					"Can't overwrite TTFont when 'lazy' attribute is True")
+			if self.mmap and self.reader is not None and self._mappedFileName == file:
+				raise TTLibError(
+					"Can't overwrite TTFont when 'mmap' attribute is True")
 			closeStream = True
 			file = open(file, "wb")
 		else:
 			# assume "file" is a writable file object
 			closeStream = False
 
+		if _isEmptySeekableStream(file):
+			self._saveStreaming(file, reorderTables, workers)
+			if closeStream:
+				file.close()
+			return
+
 		tmp = BytesIO()
 
-		writer_reordersTables = self._save(tmp)
+		writer_reordersTables = self._save(tmp, workers=workers)
 
 		if (reorderTables is None or writer_reordersTables or
 				(reorderTables is False and self.reader is None)):
@@ -193,7 +265,79 @@ class TTFont(object):
 		if closeStream:
 			file.close()
 
-	def _save(self, file, tableCache=None):
+	def _saveStreaming(self, file, reorderTables=True, workers=None):
+		"""Write the font directly to 'file', which must be seekable, each
+		table in its final position in the file as soon as it is compiled.
+		"""
+		if self.recalcTimestamp and 'head' in self:
+			self['head']  # make sure 'head' is loaded so the recalculation is actually done
+
+		tags = list(self.keys())
+		if "GlyphOrder" in tags:
+			tags.remove("GlyphOrder")
+		unmodified = self._getUnmodifiedTables()
+		writer = SFNTWriter(file, len(tags), self.sfntVersion, self.flavor, self.flavorData)
+		unmodified, glyfPadding = self._setWriterGlyfTable(writer, unmodified)
+		try:
+			self._writeTablesStreaming(writer, tags, unmodified, reorderTables, workers)
+		finally:
+			if glyfPadding is not None:
+				self['glyf'].padding = glyfPadding
+
+	def _writeTablesStreaming(self, writer, tags, unmodified, reorderTables, workers):
+		if workers is not None and workers > 1:
+			compiled = self._compileTablesInParallel(tags, unmodified, workers)
+		else:
+			compiled = {}
+
+		if (reorderTables is None or writer.reordersTables() or
+				(reorderTables is False and self.reader is None)):
+			# same order as _save(): each table after the tables it depends on
+			done = []
+			for tag in tags:
+				self._writeTable(tag, writer, done, unmodified=unmodified,
+						compiled=compiled)
+		else:
+			if reorderTables is False:
+				# sort tables using the original font's order
+				tableOrder = list(self.reader.keys())
+			else:
+				# use the recommended order from the OpenType specification
+				tableOrder = None
+			done = []
+			for tag in sortedTagList(tags, tableOrder):
+				# the tables this one depends on are compiled first, and kept
+				# in 'compiled' until their turn comes to be written
+				self._compileTable(tag, done, compiled, unmodified)
+				log.debug("writing '%s' table to disk", tag)
+				writer[tag] = compiled.pop(tag)
+
+		writer.close()
+
+	def _compileTable(self, tag, done, compiled, unmodified=()):
+		"""Internal helper function for self._saveStreaming(). Store the
+		data of the 'tag' table in the 'compiled' dict, after that of the
+		tables it depends on, unless already done.
+		"""
+		if tag in done:
+			return
+		tableClass = getTableClass(tag)
+		for masterTable in tableClass.dependencies:
+			if masterTable not in done:
+				if masterTable in self:
+					self._compileTable(masterTable, done, compiled, unmodified)
+				else:
+					done.append(masterTable)
+		done.append(tag)
+		if tag in compiled:
+			return
+		if tag in unmodified:
+			log.debug("reusing unmodified '%s' table data", tag)
+			compiled[tag] = self.reader[tag]
+		else:
+			compiled[tag] = self.getTableData(tag)
+
+	def _save(self, file, tableCache=None, workers=None):
 		"""Internal function, to be shared by save() and TTCollection.save()"""
 
 		if self.recalcTimestamp and 'head' in self:
@@ -203,17 +347,48 @@ class TTFont(object):
 		if "GlyphOrder" in tags:
 			tags.remove("GlyphOrder")
 		numTables = len(tags)
+		unmodified = self._getUnmodifiedTables()
 		# write to a temporary stream to allow saving to unseekable streams
 		writer = SFNTWriter(file, numTables, self.sfntVersion, self.flavor, self.flavorData)
+		unmodified, glyfPadding = self._setWriterGlyfTable(writer, unmodified)
 
-		done = []
-		for tag in tags:
-			self._writeTable(tag, writer, done, tableCache)
+		try:
+			if workers is not None and workers > 1:
+				compiled = self._compileTablesInParallel(tags, unmodified, workers)
+			else:
+				compiled = {}
 
-		writer.close()
+			done = []
+			for tag in tags:
+				self._writeTable(tag, writer, done, tableCache, unmodified, compiled)
+
+			writer.close()
+		finally:
+			if glyfPadding is not None:
+				self['glyf'].padding = glyfPadding
 
 		return writer.reordersTables()
 
+	def _setWriterGlyfTable(self, writer, unmodified):
+		"""Internal helper function for self.save(). Let a writer that
+		transforms the 'glyf' table (i.e. a WOFF2 writer) use the loaded
+		'glyf' table object rather than decompile its data again; the table
+		is then compiled with the 4-byte padding the writer requires.
+
+		Return the set of unmodified tables, which no longer includes the
+		recompiled 'glyf', 'loca' and 'head' tables, and the padding to
+		restore after writing (or None).
+		"""
+		if (not hasattr(writer, "setGlyfTable") or not self.isLoaded("glyf")
+				or "loca" not in self or "head" not in self):
+			return unmodified, None
+		glyf = self["glyf"]
+		if not writer.setGlyfTable(glyf):
+			return unmodified, None
+		padding = glyf.padding
+		glyf.padding = 4
+		return unmodified - {"glyf", "loca", "head"}, padding
+
 	def saveXML(self, fileOrPath, newlinestr=None, **kwargs):
 		"""Export the font as TTX (an XML-based text file), or as a series of text
 		files when splitTables is true. In the latter case, the 'fileOrPath'
@@ -379,11 +554,21 @@ class TTFont(object):
 				import traceback
 				log.debug("Reading '%s' table from disk", tag)
 				data = self.reader[tag]
+				tableClass = getTableClass(tag)
+				if isinstance(data, memoryview) and not tableClass.acceptsMemoryView:
+					data = data.tobytes()
+				cacheKey = None
 				if self._tableCache is not None:
-					table = self._tableCache.get((Tag(tag), data))
+					cacheKey = self._getTableCacheKey(tag, data)
+				if cacheKey is not None:
+					table = self._tableCache.get(cacheKey)
 					if table is not None:
+						log.debug("Reusing cached '%s' table", tag)
+						self.tables[tag] = table
+						if self._tableFingerprints is not None:
+							self._tableFingerprints[tag] = (
+								table, _tableFingerprint(table, self))
 						return table
-				tableClass = getTableClass(tag)
 				table = tableClass(tag)
 				self.tables[tag] = table
 				log.debug("Decompiling '%s' table", tag)
@@ -401,9 +586,12 @@ class TTFont(object):
 					table = DefaultTable(tag)
 					table.ERROR = file.getvalue()
 					self.tables[tag] = table
-					table.decompile(data, self)
-				if self._tableCache is not None:
-					self._tableCache[(Tag(tag), data)] = table
+					table.decompile(bytes(data), self)
+				if cacheKey is not None:
+					self._tableCache[cacheKey] = table
+				if self._tableFingerprints is not None:
+					self._tableFingerprints[tag] = (
+						table, _tableFingerprint(table, self))
 				return table
 			else:
 				raise KeyError("'%s' table not found" % tag)
@@ -411,6 +599,21 @@ class TTFont(object):
 	def __setitem__(self, tag, table):
 		self.tables[Tag(tag)] = table
 
+	def _getTableCacheKey(self, tag, data):
+		from fontTools.ttLib.tableCache import TableCache
+		if not TableCache.isCacheable(tag):
+			return None
+		if not TableCache.dependsOnGlyphOrder(tag):
+			return TableCache.makeKey(tag, data)
+		glyphOrder = self.getGlyphOrder()
+		# the glyph order list may be modified in place (see
+		# _getGlyphNamesFromCmap), so keep a copy to compare against
+		cached = getattr(self, "_glyphOrderDigest", None)
+		if cached is None or cached[0] != glyphOrder:
+			cached = self._glyphOrderDigest = (
+				list(glyphOrder), TableCache.digestGlyphOrder(glyphOrder))
+		return TableCache.makeKey(tag, data, cached[1])
+
 	def __delitem__(self, tag):
 		if tag not in self:
 			raise KeyError("'%s' table not found" % tag)
@@ -615,7 +818,89 @@ class TTFont(object):
 		for glyphID in range(len(glyphOrder)):
 			d[glyphOrder[glyphID]] = glyphID
 
-	def _writeTable(self, tag, writer, done, tableCache=None):
+	def _getUnmodifiedTables(self):
+		"""Return the set of tags of the loaded tables whose original binary
+		data can be written out as is, because neither the table nor the
+		tables it depends on were modified since they were decompiled.
+		Always empty unless reuseUnmodifiedTables was passed to the
+		constructor.
+		"""
+		if not self._tableFingerprints or self.reader is None:
+			return set()
+		modified = {}
+
+		def isModified(tag):
+			if tag in modified:
+				return modified[tag]
+			modified[tag] = True  # guard against dependency cycles
+			if tag not in self._tableFingerprints or tag not in self.reader:
+				return True
+			if tag == "head" and self.recalcTimestamp:
+				return True
+			table, fingerprint = self._tableFingerprints[tag]
+			if self.tables.get(tag) is not table or fingerprint is None:
+				return True
+			dependencies = list(getTableClass(tag).dependencies)
+			dependencies.extend(_compileDependencies.get(tag, []))
+			if any(self.isLoaded(dep) and isModified(dep) for dep in dependencies):
+				return True
+			result = modified[tag] = _tableFingerprint(table, self) != fingerprint
+			return result
+
+		return {tag for tag in self.tables if not isModified(tag)}
+
+	def _compileTablesInParallel(self, tags, unmodified, workers):
+		"""Compile the loaded tables among 'tags' using a pool of 'workers'
+		processes, and return a dict mapping tags to compiled table data.
+
+		Compiling a table may update the tables that depend on it (e.g.
+		'glyf' sets the 'loca' offsets), and such changes made in a worker
+		process would be lost. So the tables that others depend on are
+		compiled here first, and only then the remaining ones are handed
+		to the worker processes, which are forked from this one and thus
+		share the font with it. The tables that recalculate some of their
+		own values when compiled are left out, for the caller to compile
+		in this process.
+		"""
+		loaded = [tag for tag in tags
+			if self.isLoaded(tag) and tag not in unmodified]
+		masters = set()
+		for tag in tags:
+			masters.update(getTableClass(tag).dependencies)
+			masters.update(_compileDependencies.get(tag, []))
+
+		compiled = {}
+		def compileMaster(tag):
+			if tag in compiled:
+				return
+			for masterTable in getTableClass(tag).dependencies:
+				if self.isLoaded(masterTable):
+					compileMaster(masterTable)
+			compiled[tag] = self.getTableData(tag)
+		for tag in loaded:
+			if tag in masters:
+				compileMaster(tag)
+
+		pooled = [tag for tag in loaded
+			if tag not in masters and tag not in _compileRecalcTables]
+		if len(pooled) < 2:
+			return compiled
+		if self.reader is not None:
+			# start with the largest tables, which likely take longest
+			pooled.sort(
+				key=lambda tag: self.reader.tables[tag].length
+					if tag in self.reader else 0,
+				reverse=True)
+		# make sure the glyph name to ID mapping isn't rebuilt in each worker
+		self.getReverseGlyphMap()
+
+		results = parallelMap(self.getTableData, pooled, workers, chunksize=1,
+			initializer=lambda: _initCompileWorker(self))
+		compiled.update(zip(pooled, results))
+		return compiled
+
+	def _writeTable(self, tag, writer, done, tableCache=None, unmodified=(),
+			compiled=None):
 		"""Internal helper function for self.save(). Keeps track of
 		inter-table dependencies.
 		"""
@@ -625,11 +910,18 @@ class TTFont(object):
 		for masterTable in tableClass.dependencies:
 			if masterTable not in done:
 				if masterTable in self:
-					self._writeTable(masterTable, writer, done, tableCache)
+					self._writeTable(
+						masterTable, writer, done, tableCache, unmodified, compiled)
 				else:
 					done.append(masterTable)
 		done.append(tag)
-		tabledata = self.getTableData(tag)
+		if tag in unmodified:
+			log.debug("reusing unmodified '%s' table data", tag)
+			tabledata = self.reader[tag]
+		elif compiled and tag in compiled:
+			tabledata = compiled[tag]
+		else:
+			tabledata = self.getTableData(tag)
 		if tableCache is not None:
 			entry = tableCache.get((Tag(tag), tabledata))
 			if entry is not None:
@@ -693,6 +985,80 @@ class TTFont(object):
 		return self["cmap"].getBestCmap(cmapPreferences=cmapPreferences)
 
 
+# Tables whose compile() reads other tables that aren't listed among their
+# 'dependencies' (which only determine the compile order).
+_compileDependencies = {
+	"OS/2": ["cmap"],
+}
+
+
+# Tables whose compile() updates values of the table itself (e.g. 'hhea'
+# recalculates the maximum advance width). Changes made in a worker process
+# would be lost, so TTFont._compileTablesInParallel leaves them to the saving
+# process.
+_compileRecalcTables = frozenset([
+	"head", "hhea", "vhea", "maxp", "OS/2", "hdmx", "name", "EBLC", "sbix",
+	"VORG",
+])
+
+
+def _initCompileWorker(font):
+	reader = font.reader
+	if reader is None:
+		return
+	file = reader.file
+	if hasattr(file, "fileno") and getattr(file, "name", None):
+		# Tables that aren't loaded yet may be read while compiling. The
+		# file object's position is shared with the other processes, so
+		# read from a file object of our own.
+		try:
+			reader.file = open(file.name, "rb")
+		except (IOError, TypeError):
+			pass
+
+
+class _FingerprintStream(object):
+
+	def __init__(self):
+		self.hash = hashlib.sha1()
+
+	def write(self, data):
+		self.hash.update(data)
+
+
+def _reduceOpaque(obj):
+	# Objects the decompiled tables refer to, but which aren't part of
+	# their content, are pickled as a token identifying them.
+	return (_reduceOpaque, (obj.__class__.__name__, id(obj)))
+
+
+def _reduceReader(reader):
+	# Readers of not yet decompiled (lazy) data: the data never changes,
+	# so it is identified by its identity and position only.
+	return (_reduceReader, (id(reader.data), reader.offset, reader.pos))
+
+
+def _tableFingerprint(table, ttFont):
+	"""Return a digest of the decompiled contents of 'table' along with
+	the font's glyph order (if already loaded), which compile() uses to
+	map glyph names to glyph IDs. Return None if it can't be computed.
+	"""
+	from fontTools.ttLib.tables.otBase import OTTableReader
+	import copyreg
+
+	stream = _FingerprintStream()
+	pickler = pickle.Pickler(stream, protocol=pickle.HIGHEST_PROTOCOL)
+	pickler.dispatch_table = copyreg.dispatch_table.copy()
+	pickler.dispatch_table[TTFont] = _reduceOpaque
+	pickler.dispatch_table[OTTableReader] = _reduceReader
+	try:
+		pickler.dump((getattr(ttFont, "glyphOrder", None), table))
+	except Exception as e:
+		log.debug("can't fingerprint '%s' table: %s", table.tableTag, e)
+		return None
+	return stream.hash.digest()
+
+
 class _TTGlyphSet(object):
 
 	"""Generic dict-like GlyphSet class that pulls metrics from hmtx and
@@ -953,6 +1319,18 @@ TTFTableOrder = ["head", "hhea", "maxp", "OS/2", "hmtx", "LTSH", "VDMX",
 OTFTableOrder = ["head", "hhea", "maxp", "OS/2", "name", "cmap", "post",
 				"CFF "]
 
+def _isEmptySeekableStream(file):
+	try:
+		if not file.seekable():
+			return False
+		pos = file.tell()
+		end = file.seek(0, 2)
+		file.seek(pos)
+	except (AttributeError, IOError, ValueError):
+		return False
+	return pos == end == 0
+
+
 def sortedTagList(tagList, tableOrder=None):
 	"""Return a sorted copy of tagList, sorted according to the OpenType
 	specification, or according to a custom tableOrder. If given and not
@@ -188,6 +188,27 @@ class WOFF2Writer(SFNTWriter):
 
 		# make empty TTFont to store data while normalising and transforming tables
 		self.ttFont = TTFont(recalcBBoxes=False, recalcTimestamp=False)
+		self.glyfTableSet = False
+
+	def setGlyfTable(self, glyfTable):
+		"""Transform the glyphs of the given (decompiled) 'glyf' table object
+		directly, instead of decompiling the 'glyf' table data again. The
+		'glyf' and 'loca' table data passed in afterwards must have been
+		compiled from it with a 'padding' of 4.
+
+		Return False, and don't use the table, if the 'glyf' table is not to
+		be transformed.
+		"""
+		if "glyf" not in self.flavorData.transformedTables:
+			return False
+		table = WOFF2GlyfTable()
+		table.glyphs = glyfTable.glyphs
+		table.glyphOrder = glyfTable.glyphOrder
+		table.padding = 4
+		self.ttFont.setGlyphOrder(glyfTable.glyphOrder)
+		self.ttFont.tables[Tag('glyf')] = table
+		self.glyfTableSet = True
+		return True
 
 	def __setitem__(self, tag, data):
 		"""Associate new entry named 'tag' with raw table data."""
@@ -203,6 +224,8 @@ class WOFF2Writer(SFNTWriter):
 		entry.flags = getKnownTagIndex(entry.tag)
 		# WOFF2 table data are written to disk only on close(), after all tags
 		# have been specified
+		if isinstance(data, memoryview):
+			data = data.tobytes()
 		entry.data = data
 
 		self.tables[tag] = entry
@@ -230,6 +253,7 @@ class WOFF2Writer(SFNTWriter):
 			isTrueType
 			and "glyf" in self.flavorData.transformedTables
 			and "glyf" in self.tables
+			and not self.glyfTableSet
 		):
 			self._normaliseGlyfAndLoca(padding=4)
 		self._setHeadTransformFlag()
@@ -298,6 +322,12 @@ class WOFF2Writer(SFNTWriter):
 		self.ttFont.tables[tag] = table
 		table.decompile(data, self.ttFont)
 
+	def _decompileGlyf(self):
+		""" Decompile the 'glyf' table, unless set with setGlyfTable(). """
+		if not self.ttFont.isLoaded('glyf'):
+			for tag in ('loca', 'glyf'):
+				self._decompileTable(tag)
+
 	def _compileTable(self, tag):
 		""" Compile table and store it in its 'data' attribute. """
 		self.tables[tag].data = self.ttFont[tag].compile(self.ttFont)
@@ -345,15 +375,18 @@ class WOFF2Writer(SFNTWriter):
 		if tag == "loca":
 			data = b""
 		elif tag == "glyf":
-			for tag in ('maxp', 'head', 'loca', 'glyf'):
+			for tag in ('maxp', 'head'):
 				self._decompileTable(tag)
+			self._decompileGlyf()
 			glyfTable = self.ttFont['glyf']
 			data = glyfTable.transform(self.ttFont)
 		elif tag == "hmtx":
 			if "glyf" not in self.tables:
 				return
-			for tag in ("maxp", "head", "hhea", "loca", "glyf", "hmtx"):
+			for tag in ("maxp", "head", "hhea"):
 				self._decompileTable(tag)
+			self._decompileGlyf()
+			self._decompileTable("hmtx")
 			hmtxTable = self.ttFont["hmtx"]
 			data = hmtxTable.transform(self.ttFont)  # can be None
 		else:
@@ -926,6 +959,7 @@ class WOFF2GlyfTable(getTableClass('glyf')):
 	def _encodeTriplets(self, glyph):
 		assert len(glyph.coordinates) == len(glyph.flags)
 		coordinates = glyph.coordinates.copy()
+		coordinates.toInt()
 		coordinates.absoluteToRelative()
 
 		flags = array.array('B')
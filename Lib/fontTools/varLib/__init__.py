@@ -21,6 +21,7 @@ API *will* change in near future.
 from fontTools.misc.py23 import *
 from fontTools.misc.fixedTools import otRound
 from fontTools.misc.arrayTools import Vector
+from fontTools.misc.parallelTools import parallelMap
 from fontTools.ttLib import TTFont, newTable
 from fontTools.ttLib.tables._f_v_a_r import Axis, NamedInstance
 from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
@@ -228,7 +229,19 @@ def _add_stat(font, axes):
 	stat.ElidedFallbackNameID = 2
 
 
-def _add_gvar(font, masterModel, master_ttfs, tolerance=0.5, optimize=True):
+def _deltaCoordinates(deltas):
+	# GlyphCoordinates of the flat array 'deltas', with integers if
+	# they all fit, as GlyphCoordinates arithmetic would give.
+	if all(d.is_integer() and -0x8000 <= d <= 0x7FFF for d in deltas):
+		coords = GlyphCoordinates()
+		coords.array.extend(int(d) for d in deltas)
+	else:
+		coords = GlyphCoordinates(typecode="d")
+		coords.array.extend(deltas)
+	return coords
+
+def _add_gvar(font, masterModel, master_ttfs, tolerance=0.5, optimize=True,
+		workers=None):
 	if tolerance < 0:
 		raise ValueError("`tolerance` must be a positive number.")
 
@@ -239,6 +252,7 @@ def _add_gvar(font, masterModel, master_ttfs, tolerance=0.5, optimize=True):
 
 	# use hhea.ascent of base master as default vertical origin when vmtx is missing
 	baseAscent = font['hhea'].ascent
+	glyphs = []
 	for glyph in font.getGlyphOrder():
 
 		isComposite = glyf[glyph].isComposite()
@@ -247,57 +261,73 @@ def _add_gvar(font, masterModel, master_ttfs, tolerance=0.5, optimize=True):
 			m["glyf"].getCoordinatesAndControls(glyph, m, defaultVerticalOrigin=baseAscent)
 			for m in master_ttfs
 		]
-		model, allData = masterModel.getSubModel(allData)
 
-		allCoords = [d[0] for d in allData]
-		allControls = [d[1] for d in allData]
+		allControls = [d[1] for d in allData if d is not None]
 		control = allControls[0]
 		if not models.allEqual(allControls):
 			log.warning("glyph %s has incompatible masters; skipping" % glyph)
 			continue
 		del allControls
 
-		# Update gvar
-		gvar.variations[glyph] = []
-		deltas = model.getDeltas(allCoords)
-		supports = model.supports
-		assert len(deltas) == len(supports)
+		# Only the coordinates are needed to build the variations
+		allCoords = [d[0].array if d is not None else None for d in allData]
+		glyphs.append((glyph, allCoords, control.endPts, isComposite))
+
+	def buildGlyphVariations(glyph):
+		_, allCoords, endPts, isComposite = glyph
+		return _buildGlyphVariations(masterModel, allCoords, endPts, isComposite,
+					     tolerance, optimize)
+	allVariations = parallelMap(buildGlyphVariations, glyphs, workers)
+	for (glyph, _, _, _), variations in zip(glyphs, allVariations):
+		gvar.variations[glyph] = variations
+
+
+def _buildGlyphVariations(masterModel, allCoords, endPts, isComposite,
+			  tolerance, optimize):
+	# Build the TupleVariations of a glyph from the flat coordinate arrays
+	# of its masters (None for masters without the glyph).
+	model, allCoords = masterModel.getSubModel(allCoords)
 
-		# Prepare for IUP optimization
-		origCoords = deltas[0]
-		endPts = control.endPts
+	variations = []
+	deltas = [_deltaCoordinates(d) for d in model.getDeltaArrays(allCoords)]
+	supports = model.supports
+	assert len(deltas) == len(supports)
 
-		for i,(delta,support) in enumerate(zip(deltas[1:], supports[1:])):
-			if all(abs(v) <= tolerance for v in delta.array) and not isComposite:
-				continue
-			var = TupleVariation(support, delta)
-			if optimize:
-				delta_opt = iup_delta_optimize(delta, origCoords, endPts, tolerance=tolerance)
+	# Prepare for IUP optimization
+	origCoords = deltas[0]
 
-				if None in delta_opt:
-					"""In composite glyphs, there should be one 0 entry
-					to make sure the gvar entry is written to the font.
+	for i,(delta,support) in enumerate(zip(deltas[1:], supports[1:])):
+		if all(abs(v) <= tolerance for v in delta.array) and not isComposite:
+			continue
+		var = TupleVariation(support, delta)
+		if optimize:
+			delta_opt = iup_delta_optimize(delta, origCoords, endPts, tolerance=tolerance)
 
-					This is to work around an issue with macOS 10.14 and can be
-					removed once the behaviour of macOS is changed.
+			if None in delta_opt:
+				"""In composite glyphs, there should be one 0 entry
+				to make sure the gvar entry is written to the font.
 
-					https://github.com/fonttools/fonttools/issues/1381
-					"""
-					if all(d is None for d in delta_opt):
-						delta_opt = [(0, 0)] + [None] * (len(delta_opt) - 1)
-					# Use "optimized" version only if smaller...
-					var_opt = TupleVariation(support, delta_opt)
+				This is to work around an issue with macOS 10.14 and can be
+				removed once the behaviour of macOS is changed.
 
-					axis_tags = sorted(support.keys()) # Shouldn't matter that this is different from fvar...?
-					tupleData, auxData, _ = var.compile(axis_tags, [], None)
-					unoptimized_len = len(tupleData) + len(auxData)
-					tupleData, auxData, _ = var_opt.compile(axis_tags, [], None)
-					optimized_len = len(tupleData) + len(auxData)
+				https://github.com/fonttools/fonttools/issues/1381
+				"""
+				if all(d is None for d in delta_opt):
+					delta_opt = [(0, 0)] + [None] * (len(delta_opt) - 1)
+				# Use "optimized" version only if smaller...
+				var_opt = TupleVariation(support, delta_opt)
 
-					if optimized_len < unoptimized_len:
-						var = var_opt
+				axis_tags = sorted(support.keys()) # Shouldn't matter that this is different from fvar...?
+				tupleData, auxData, _ = var.compile(axis_tags, [], None)
+				unoptimized_len = len(tupleData) + len(auxData)
+				tupleData, auxData, _ = var_opt.compile(axis_tags, [], None)
+				optimized_len = len(tupleData) + len(auxData)
 
-			gvar.variations[glyph].append(var)
+				if optimized_len < unoptimized_len:
+					var = var_opt
+
+		variations.append(var)
+	return variations
 
 
 def _remove_TTHinting(font):
@@ -440,26 +470,47 @@ def _add_VHVAR(font, masterModel, master_ttfs, axisTags, tableFields):
 	font[tableTag] = VHVAR
 	return
 
+def _getAllDeltasAndSupports(masterModel, allItems):
+	# Like masterModel.getDeltasAndSupports() for each list of master
+	# values in allItems, computing the deltas of all lists that have the
+	# same masters at once.
+	itemsBySubModel = {}
+	for i,items in enumerate(allItems):
+		key = tuple(v is not None for v in items)
+		itemsBySubModel.setdefault(key, []).append(i)
+	result = [None] * len(allItems)
+	for indices in itemsBySubModel.values():
+		model, _ = masterModel.getSubModel(allItems[indices[0]])
+		masterArrays = [[allItems[i][m] for i in indices]
+				for m,v in enumerate(allItems[indices[0]]) if v is not None]
+		deltaArrays = model.getDeltaArrays(masterArrays)
+		for k,i in enumerate(indices):
+			result[i] = ([d[k] for d in deltaArrays], model.supports)
+	return result
+
 def _get_advance_metrics(font, masterModel, master_ttfs,
 		axisTags, glyphOrder, advMetricses, vOrigMetricses=None):
 
-	vhAdvanceDeltasAndSupports = {}
 	vOrigDeltasAndSupports = {}
-	for glyph in glyphOrder:
-		vhAdvances = [metrics[glyph][0] if glyph in metrics else None for metrics in advMetricses]
-		vhAdvanceDeltasAndSupports[glyph] = masterModel.getDeltasAndSupports(vhAdvances)
+	allVhAdvances = [
+		[metrics[glyph][0] if glyph in metrics else None for metrics in advMetricses]
+		for glyph in glyphOrder]
+	vhAdvanceDeltasAndSupports = dict(zip(glyphOrder,
+		_getAllDeltasAndSupports(masterModel, allVhAdvances)))
 
 	singleModel = models.allEqual(id(v[1]) for v in vhAdvanceDeltasAndSupports.values())
 
 	if vOrigMetricses:
 		singleModel = False
-		for glyph in glyphOrder:
-			# We need to supply a vOrigs tuple with non-None default values
-			# for each glyph. vOrigMetricses contains values only for those
-			# glyphs which have a non-default vOrig.
-			vOrigs = [metrics[glyph] if glyph in metrics else defaultVOrig
-				for metrics, defaultVOrig in vOrigMetricses]
-			vOrigDeltasAndSupports[glyph] = masterModel.getDeltasAndSupports(vOrigs)
+		# We need to supply a vOrigs tuple with non-None default values
+		# for each glyph. vOrigMetricses contains values only for those
+		# glyphs which have a non-default vOrig.
+		allVOrigs = [
+			[metrics[glyph] if glyph in metrics else defaultVOrig
+			 for metrics, defaultVOrig in vOrigMetricses]
+			for glyph in glyphOrder]
+		vOrigDeltasAndSupports = dict(zip(glyphOrder,
+			_getAllDeltasAndSupports(masterModel, allVOrigs)))
 
 	directStore = None
 	if singleModel:
@@ -690,7 +741,7 @@ _DesignSpaceData = namedtuple(
 )
 
 
-def _add_CFF2(varFont, model, master_fonts):
+def _add_CFF2(varFont, model, master_fonts, subroutinize=False):
 	from .cff import merge_region_fonts
 	glyphOrder = varFont.getGlyphOrder()
 	if "CFF2" not in varFont:
@@ -699,6 +750,9 @@ def _add_CFF2(varFont, model, master_fonts):
 	ordered_fonts_list = model.reorderMasters(master_fonts, model.reverseMapping)
 	# re-ordering the master list simplifies building the CFF2 data item lists.
 	merge_region_fonts(varFont, model, ordered_fonts_list, glyphOrder)
+	if subroutinize:
+		from fontTools.cffLib.subroutinizer import subroutinize as _subroutinize
+		_subroutinize(varFont['CFF2'].cff)
 
 
 def load_designspace(designspace):
@@ -857,13 +911,22 @@ def set_default_weight_width_slant(font, location):
 			font["post"].italicAngle = italicAngle
 
 
-def build(designspace, master_finder=lambda s:s, exclude=[], optimize=True):
+def build(designspace, master_finder=lambda s:s, exclude=[], optimize=True,
+		subroutinize=False, workers=None):
 	"""
 	Build variation font from a designspace file.
 
 	If master_finder is set, it should be a callable that takes master
 	filename as found in designspace file and map it to master font
 	binary as to be opened (eg. .ttf or .otf).
+
+	If subroutinize is True, new subroutines are built for the merged CFF2
+	charstrings (see fontTools.cffLib.subroutinizer).
+
+	If workers is greater than 1, the glyph variations of the 'gvar' table
+	are built by a pool of that many processes. This requires the 'fork'
+	start method of the multiprocessing module; elsewhere they are built
+	serially.
 	"""
 	if hasattr(designspace, "sources"):  # Assume a DesignspaceDocument
 		pass
@@ -915,13 +978,13 @@ def build(designspace, master_finder=lambda s:s, exclude=[], optimize=True):
 	if 'GDEF' not in exclude or 'GPOS' not in exclude:
 		_merge_OTL(vf, model, master_fonts, axisTags)
 	if 'gvar' not in exclude and 'glyf' in vf:
-		_add_gvar(vf, model, master_fonts, optimize=optimize)
+		_add_gvar(vf, model, master_fonts, optimize=optimize, workers=workers)
 	if 'cvar' not in exclude and 'glyf' in vf:
 		_merge_TTHinting(vf, model, master_fonts)
 	if 'GSUB' not in exclude and ds.rules:
 		_add_GSUB_feature_variations(vf, ds.axes, ds.internal_axis_supports, ds.rules, ds.rulesProcessingLast)
 	if 'CFF2' not in exclude and ('CFF ' in vf or 'CFF2' in vf):
-		_add_CFF2(vf, model, master_fonts)
+		_add_CFF2(vf, model, master_fonts, subroutinize=subroutinize)
 		if "post" in vf:
 			# set 'post' to format 2 to keep the glyph names dropped from CFF2
 			post = vf["post"]
@@ -1035,6 +1098,18 @@ def main(args=None):
 		action='store_false',
 		help='do not perform IUP optimization'
 	)
+	parser.add_argument(
+		'--subroutinize',
+		action='store_true',
+		help='build subroutines for the CFF2 charstrings'
+	)
+	parser.add_argument(
+		'--workers',
+		metavar='N',
+		type=int,
+		default=None,
+		help='build the glyph variations with N processes'
+	)
 	parser.add_argument(
 		'--master-finder',
 		default='master_ttf_interpolatable/{stem}.ttf',
@@ -1073,7 +1148,9 @@ def main(args=None):
 		designspace_filename,
 		finder,
 		exclude=options.exclude,
-		optimize=options.optimize
+		optimize=options.optimize,
+		subroutinize=options.subroutinize,
+		workers=options.workers
 	)
 
 	outfile = options.outfile
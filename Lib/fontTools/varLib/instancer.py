@@ -46,6 +46,15 @@ advance what the default value for that axis is, one can pass a `None` value:
 
 From the console script, this is equivalent to passing `wght=drop` as input.
 
+To make many full instances of the same variable font, the `PreparedInstancer`
+class decodes the variation data once, and then makes each instance from the
+precomputed deltas, without copying the variable font:
+
+| >>> prepared = instancer.PreparedInstancer(varfont)
+| >>> for wght in (300, 400, 700):
+| ...     instance = prepared.instantiate({"wght": wght, "wdth": 100})
+| ...     instance.save("MyFont-%d.ttf" % wght)
+
 This module is similar to fontTools.varLib.mutator, which it's intended to supersede.
 Note that, unlike varLib.mutator, when an axis is not mentioned in the input
 location, the varLib.instancer will keep the axis and the corresponding deltas,
@@ -73,7 +82,8 @@ from fontTools.misc.fixedTools import (
     MAX_F2DOT14,
 )
 from fontTools.varLib.models import supportScalar, normalizeValue, piecewiseLinearMap
-from fontTools.ttLib import TTFont
+from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.sfnt import SFNTWriter
 from fontTools.ttLib.tables.TupleVariation import TupleVariation
 from fontTools.ttLib.tables import _g_l_y_f
 from fontTools import varLib
@@ -84,9 +94,12 @@ from fontTools import subset  # noqa: F401
 from fontTools.varLib import builder
 from fontTools.varLib.mvar import MVAR_ENTRIES
 from fontTools.varLib.merger import MutatorMerger
+from fontTools.varLib.iup import iup_delta_optimize_glyphs
 from contextlib import contextmanager
+import array
 import collections
-from copy import deepcopy
+from copy import copy, deepcopy
+from io import BytesIO
 import logging
 from itertools import islice
 import os
@@ -315,7 +328,9 @@ def limitTupleVariationAxisRange(var, axisTag, axisRange):
         return [var, newVar]
 
 
-def instantiateGvarGlyph(varfont, glyphname, axisLimits, optimize=True):
+def _instantiateGvarGlyph(varfont, glyphname, axisLimits):
+    # Returns the glyph's instantiated coordinates, endPts and remaining
+    # TupleVariations to optimize, or None if none remain.
     glyf = varfont["glyf"]
     coordinates, ctrl = glyf.getCoordinatesAndControls(glyphname, varfont)
     endPts = ctrl.endPts
@@ -347,24 +362,49 @@ def instantiateGvarGlyph(varfont, glyphname, axisLimits, optimize=True):
     if not tupleVarStore:
         if glyphname in gvar.variations:
             del gvar.variations[glyphname]
-        return
+        return None
 
-    if optimize:
+    return coordinates, endPts, tupleVarStore
+
+
+def _optimizeGvarGlyphs(varfont, glyphs, workers=None):
+    # IUP-optimize the TupleVariations of the (glyphname, coordinates, endPts,
+    # tupleVarStore) tuples in 'glyphs', with a pool of 'workers' processes if
+    # greater than 1.
+    glyf = varfont["glyf"]
+    variations = []
+    for glyphname, coordinates, endPts, tupleVarStore in glyphs:
         isComposite = glyf[glyphname].isComposite()
         for var in tupleVarStore:
-            var.optimize(coordinates, endPts, isComposite)
+            if None not in var.coordinates:
+                variations.append((var, coordinates, endPts, isComposite))
+
+    optimized = iup_delta_optimize_glyphs(
+        [
+            (var.coordinates.tolist(), coordinates, endPts)
+            for var, coordinates, endPts, _ in variations
+        ],
+        tolerance=0.5,
+        workers=workers,
+    )
+    for (var, coordinates, endPts, isComposite), deltaOpt in zip(
+        variations, optimized
+    ):
+        var.optimize(coordinates, endPts, isComposite=isComposite, deltaOpt=deltaOpt)
 
 
-def instantiateGvar(varfont, axisLimits, optimize=True):
-    log.info("Instantiating glyf/gvar tables")
+def instantiateGvarGlyph(varfont, glyphname, axisLimits, optimize=True):
+    glyph = _instantiateGvarGlyph(varfont, glyphname, axisLimits)
+    if glyph is not None and optimize:
+        _optimizeGvarGlyphs(varfont, [(glyphname,) + glyph])
 
-    gvar = varfont["gvar"]
-    glyf = varfont["glyf"]
+
+def _glyphNamesByComponentDepth(glyf):
     # Get list of glyph names sorted by component depth.
     # If a composite glyph is processed before its base glyph, the bounds may
     # be calculated incorrectly because deltas haven't been applied to the
     # base glyph yet.
-    glyphnames = sorted(
+    return sorted(
         glyf.glyphOrder,
         key=lambda name: (
             glyf[name].getCompositeMaxpValues(glyf).maxComponentDepth
@@ -373,8 +413,21 @@ def instantiateGvar(varfont, axisLimits, optimize=True):
             name,
         ),
     )
-    for glyphname in glyphnames:
-        instantiateGvarGlyph(varfont, glyphname, axisLimits, optimize=optimize)
+
+
+def instantiateGvar(varfont, axisLimits, optimize=True, workers=None):
+    log.info("Instantiating glyf/gvar tables")
+
+    gvar = varfont["gvar"]
+    glyf = varfont["glyf"]
+    glyphs = []
+    for glyphname in _glyphNamesByComponentDepth(glyf):
+        glyph = _instantiateGvarGlyph(varfont, glyphname, axisLimits)
+        if glyph is not None and optimize:
+            glyphs.append((glyphname,) + glyph)
+
+    if glyphs:
+        _optimizeGvarGlyphs(varfont, glyphs, workers=workers)
 
     if not gvar.variations:
         del varfont["gvar"]
@@ -657,21 +710,25 @@ def instantiateOTL(varfont, axisLimits):
         if "GPOS" in varfont:
             varfont["GPOS"].table.remap_device_varidxes(varIndexMapping)
     else:
-        # Downgrade GDEF.
-        del gdef.VarStore
-        gdef.Version = 0x00010002
-        if gdef.MarkGlyphSetsDef is None:
-            del gdef.MarkGlyphSetsDef
-            gdef.Version = 0x00010000
-
-        if not (
-            gdef.LigCaretList
-            or gdef.MarkAttachClassDef
-            or gdef.GlyphClassDef
-            or gdef.AttachList
-            or (gdef.Version >= 0x00010002 and gdef.MarkGlyphSetsDef)
-        ):
-            del varfont["GDEF"]
+        _downgradeGDEF(varfont)
+
+
+def _downgradeGDEF(varfont):
+    gdef = varfont["GDEF"].table
+    del gdef.VarStore
+    gdef.Version = 0x00010002
+    if gdef.MarkGlyphSetsDef is None:
+        del gdef.MarkGlyphSetsDef
+        gdef.Version = 0x00010000
+
+    if not (
+        gdef.LigCaretList
+        or gdef.MarkAttachClassDef
+        or gdef.GlyphClassDef
+        or gdef.AttachList
+        or (gdef.Version >= 0x00010002 and gdef.MarkGlyphSetsDef)
+    ):
+        del varfont["GDEF"]
 
 
 def instantiateFeatureVariations(varfont, axisLimits):
@@ -1074,6 +1131,10 @@ def pruningUnusedNames(varfont):
 
     yield
 
+    _pruneUnusedNames(varfont, origNameIDs)
+
+
+def _pruneUnusedNames(varfont, origNameIDs):
     log.info("Pruning name table")
     exclude = origNameIDs - getVariationNameIDs(varfont)
     varfont["name"].names[:] = [
@@ -1175,7 +1236,7 @@ def populateAxisDefaults(varfont, axisLimits):
 
 
 def instantiateVariableFont(
-    varfont, axisLimits, inplace=False, optimize=True, overlap=True
+    varfont, axisLimits, inplace=False, optimize=True, overlap=True, workers=None
 ):
     """ Instantiate variable font, either fully or partially.
 
@@ -1204,6 +1265,9 @@ def instantiateVariableFont(
             using a non-zero fill rule. Thus we always set these flags on all glyphs
             to maximise cross-compatibility of the generated instance. You can disable
             this by setting `overalap` to False.
+        workers (int): if greater than 1, the remaining 'gvar' table's deltas are
+            IUP-optimized by a pool of that many processes (see
+            fontTools.misc.parallelTools.parallelMap).
     """
     sanityCheckVariableTables(varfont)
 
@@ -1217,7 +1281,7 @@ def instantiateVariableFont(
         varfont = deepcopy(varfont)
 
     if "gvar" in varfont:
-        instantiateGvar(varfont, normalizedLimits, optimize=optimize)
+        instantiateGvar(varfont, normalizedLimits, optimize=optimize, workers=workers)
 
     if "cvar" in varfont:
         instantiateCvar(varfont, normalizedLimits)
@@ -1260,6 +1324,459 @@ def instantiateVariableFont(
     return varfont
 
 
+class _ItemVariationStoreDeltas(dict):
+    """The deltas of an ItemVariationStore at a location, keyed by VariationIndex
+    ((outer << 16) + inner), computed as they are looked up."""
+
+    def __init__(self, varData, scalars):
+        self.varData = varData
+        self.scalars = scalars
+
+    def __missing__(self, varIdx):
+        regionIndices, items = self.varData[varIdx >> 16]
+        scalars = self.scalars
+        delta = 0
+        for regionIndex, d in zip(regionIndices, items[varIdx & 0xFFFF]):
+            scalar = scalars[regionIndex]
+            if scalar:
+                delta += d * scalar
+        self[varIdx] = delta
+        return delta
+
+
+class _PreparedItemVariationStore(object):
+    def __init__(self, itemVarStore, fvarAxes):
+        self.regions = [
+            region.get_support(fvarAxes) for region in itemVarStore.VarRegionList.Region
+        ]
+        self.varData = [
+            (varData.VarRegionIndex, varData.Item) for varData in itemVarStore.VarData
+        ]
+
+    def getDeltas(self, location):
+        scalars = [supportScalar(location, support) for support in self.regions]
+        return _ItemVariationStoreDeltas(self.varData, scalars)
+
+
+def _updateExtents(extents, advance, sideBearing, size):
+    otherSideBearing = advance - sideBearing - size
+    extent = sideBearing + size
+    if extents is None:
+        return sideBearing, otherSideBearing, extent
+    return (
+        min(extents[0], sideBearing),
+        min(extents[1], otherSideBearing),
+        max(extents[2], extent),
+    )
+
+
+class _FontBounds(object):
+    """Accumulates the values that the 'maxp', 'hhea' and 'vhea' tables recalculate
+    from the glyphs' bounding boxes and metrics when compiled."""
+
+    def __init__(self):
+        self.bounds = None
+        self.allXMinIsLsb = True
+        # (minLeftSideBearing, minRightSideBearing, xMaxExtent)
+        self.hExtents = None
+        # (minTopSideBearing, minBottomSideBearing, yMaxExtent)
+        self.vExtents = None
+
+    def addGlyph(self, glyph, hMetrics, vMetrics=None):
+        if not glyph.numberOfContours:
+            return
+        xMin, yMin, xMax, yMax = glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax
+        if self.bounds is None:
+            self.bounds = (xMin, yMin, xMax, yMax)
+        else:
+            bounds = self.bounds
+            self.bounds = (
+                min(bounds[0], xMin),
+                min(bounds[1], yMin),
+                max(bounds[2], xMax),
+                max(bounds[3], yMax),
+            )
+        advance, lsb = hMetrics
+        if lsb != xMin:
+            self.allXMinIsLsb = False
+        self.hExtents = _updateExtents(self.hExtents, advance, lsb, xMax - xMin)
+        if vMetrics is not None:
+            advance, tsb = vMetrics
+            self.vExtents = _updateExtents(self.vExtents, advance, tsb, yMax - yMin)
+
+    def apply(self, font):
+        head = font["head"]
+        head.xMin, head.yMin, head.xMax, head.yMax = self.bounds or (0, 0, 0, 0)
+        if self.allXMinIsLsb:
+            head.flags = head.flags | 0x2
+        else:
+            head.flags = head.flags & ~0x2
+        if "hhea" in font:
+            hhea = font["hhea"]
+            hhea.advanceWidthMax = max(adv for adv, _ in font["hmtx"].metrics.values())
+            (
+                hhea.minLeftSideBearing,
+                hhea.minRightSideBearing,
+                hhea.xMaxExtent,
+            ) = self.hExtents or (0, 0, 0)
+        if "vhea" in font and "vmtx" in font:
+            vhea = font["vhea"]
+            vhea.advanceHeightMax = max(adv for adv, _ in font["vmtx"].metrics.values())
+            (
+                vhea.minTopSideBearing,
+                vhea.minBottomSideBearing,
+                vhea.yMaxExtent,
+            ) = self.vExtents or (0, 0, 0)
+
+
+def _copyGlyph(glyph):
+    # Return a copy of the expanded 'glyph' whose coordinates and component
+    # offsets can be set without modifying 'glyph'.
+    newGlyph = _g_l_y_f.Glyph()
+    newGlyph.__dict__.update(glyph.__dict__)
+    if glyph.isComposite():
+        newGlyph.components = [copy(c) for c in glyph.components]
+    return newGlyph
+
+
+class PreparedInstancer(object):
+    """Make any number of full instances (i.e. static fonts) of a variable font.
+
+    The 'gvar', 'cvar' and 'MVAR' tables and the GDEF VarStore are decoded once,
+    and the deltas of the 'gvar' points to be inferred by interpolation are
+    computed once, so that making an instance only takes summing the deltas
+    scaled at its location. The tables that are the same in all instances are
+    kept compiled, and are shared by the instances rather than copied.
+
+    The instances are the same as those made by `instantiateVariableFont`, except
+    that the axes not given a coordinate are pinned at their default, and that the
+    glyph coordinates may differ by one unit where the rounding of the inferred
+    'gvar' deltas, interpolated before rather than after being scaled, differs.
+    Restricting the range of axes (i.e. partial instancing) is not supported.
+
+    The 'varfont' must not be modified while the PreparedInstancer is in use.
+
+    Args:
+        varfont: a TTFont instance, which must contain at least an 'fvar' table.
+            Note that variable fonts with 'CFF2' table are not supported yet.
+        overlap (bool): whether to set the `OVERLAP_SIMPLE` and `OVERLAP_COMPOUND`
+            flags in the 'glyf' table, as `instantiateVariableFont` does.
+    """
+
+    def __init__(self, varfont, overlap=True):
+        sanityCheckVariableTables(varfont)
+
+        fvar = varfont["fvar"]
+        self.fvarAxes = fvar.axes
+        self.axes = {
+            a.axisTag: (a.minValue, a.defaultValue, a.maxValue) for a in fvar.axes
+        }
+        self.avarSegments = varfont["avar"].segments if "avar" in varfont else {}
+        self.glyphOrder = varfont.getGlyphOrder()
+        self.recalcBBoxes = varfont.recalcBBoxes
+        self.recalcTimestamp = varfont.recalcTimestamp
+        self.flavor = varfont.flavor
+        self.flavorData = varfont.flavorData
+
+        # the unique regions of the 'gvar' and 'cvar' tuple variations
+        self._regions = []
+        self._regionIndices = {}
+
+        maxpData = None
+        self._varGlyphs = None
+        if "glyf" in varfont:
+            maxpData = self._prepareGlyphs(varfont, overlap)
+
+        self._cvtValues = None
+        if "cvar" in varfont:
+            self._cvtValues = varfont["cvt "].values
+            self._cvarDeltas = [
+                (self._getRegionIndex(var.axes), var.coordinates)
+                for var in varfont["cvar"].variations
+            ]
+
+        self._mvarStore = None
+        if "MVAR" in varfont:
+            mvar = varfont["MVAR"].table
+            self._mvarStore = _PreparedItemVariationStore(mvar.VarStore, fvar.axes)
+            self._mvarRecords = [
+                (MVAR_ENTRIES[rec.ValueTag], rec.VarIdx)
+                for rec in mvar.ValueRecord
+                if rec.ValueTag in MVAR_ENTRIES
+            ]
+
+        self._gdefStore = None
+        if (
+            "GDEF" in varfont
+            and varfont["GDEF"].table.Version >= 0x00010003
+            and varfont["GDEF"].table.VarStore
+        ):
+            self._gdefStore = _PreparedItemVariationStore(
+                varfont["GDEF"].table.VarStore, fvar.axes
+            )
+
+        self._featureVariationsTags = [
+            tableTag
+            for tableTag in ("GPOS", "GSUB")
+            if tableTag in varfont
+            and hasattr(varfont[tableTag].table, "FeatureVariations")
+        ]
+
+        self._origNameIDs = getVariationNameIDs(varfont)
+
+        self._data = self._compileStaticTables(varfont, maxpData)
+
+    def _getRegionIndex(self, axes):
+        key = frozenset(axes.items())
+        index = self._regionIndices.get(key)
+        if index is None:
+            index = self._regionIndices[key] = len(self._regions)
+            self._regions.append(dict(axes))
+        return index
+
+    def _prepareGlyphs(self, varfont, overlap):
+        glyf = varfont["glyf"]
+        gvar = varfont["gvar"].variations if "gvar" in varfont else {}
+        self._glyfAttributes = {
+            k: v for k, v in vars(glyf).items() if k not in ("glyphs", "glyphOrder")
+        }
+
+        # The glyphs and metrics of the default instance, as instantiateGvar sets
+        # them at a location where all the deltas are zero.
+        font = TTFont()
+        font.setGlyphOrder(self.glyphOrder)
+        defaultGlyf = font["glyf"] = newTable("glyf")
+        defaultGlyf.glyphOrder = self.glyphOrder
+        defaultGlyf.glyphs = {}
+        hmtx = font["hmtx"] = newTable("hmtx")
+        hmtx.metrics = dict(varfont["hmtx"].metrics)
+        vmtx = None
+        if "vmtx" in varfont:
+            vmtx = font["vmtx"] = newTable("vmtx")
+            vmtx.metrics = dict(varfont["vmtx"].metrics)
+
+        glyphs = []
+        varyingGlyphs = set()
+        for glyphName in _glyphNamesByComponentDepth(glyf):
+            coordinates, ctrl = glyf.getCoordinatesAndControls(glyphName, varfont)
+            glyph = defaultGlyf.glyphs[glyphName] = deepcopy(glyf[glyphName])
+            deltas = []
+            for var in gvar.get(glyphName, ()):
+                var = TupleVariation(var.axes, var.coordinates)
+                var.calcInferredDeltas(coordinates, ctrl.endPts)
+                deltas.append(
+                    (
+                        self._getRegionIndex(var.axes),
+                        [v for delta in var.coordinates for v in delta],
+                    )
+                )
+            # composite glyphs' bounds vary with those of their components
+            if deltas or (
+                glyph.isComposite()
+                and any(c.glyphName in varyingGlyphs for c in glyph.components)
+            ):
+                varyingGlyphs.add(glyphName)
+            glyphs.append((glyphName, coordinates, deltas))
+
+        if overlap:
+            setMacOverlapFlags(defaultGlyf)
+        for glyphName, coordinates, _ in glyphs:
+            defaultGlyf.setCoordinates(glyphName, coordinates, font)
+
+        # The data of the glyphs that are the same in all instances, and the
+        # default glyphs to be copied and set the coordinates of otherwise.
+        self._glyphData = {}
+        self._varGlyphs = []
+        self._defaultGlyphs = {}
+        self._defaultBounds = _FontBounds()
+        for glyphName, coordinates, deltas in glyphs:
+            glyph = defaultGlyf.glyphs[glyphName]
+            if glyphName in varyingGlyphs:
+                self._varGlyphs.append((glyphName, coordinates, deltas))
+                self._defaultGlyphs[glyphName] = glyph
+            else:
+                self._glyphData[glyphName] = glyph.compile(
+                    defaultGlyf, recalcBBoxes=False
+                )
+                self._defaultBounds.addGlyph(
+                    glyph,
+                    hmtx.metrics[glyphName],
+                    vmtx.metrics[glyphName] if vmtx is not None else None,
+                )
+        self._hMetrics = hmtx.metrics
+        self._vMetrics = vmtx.metrics if vmtx is not None else None
+
+        if self.recalcBBoxes and "maxp" in varfont:
+            # maxp values don't vary, only depend on the glyphs' structure
+            font["head"] = deepcopy(varfont["head"])
+            font["maxp"] = deepcopy(varfont["maxp"])
+            return font["maxp"].compile(font)
+        return None
+
+    def _compileStaticTables(self, varfont, maxpData):
+        excluded = {"GlyphOrder", "fvar", "avar", "gvar", "cvar", "MVAR", "HVAR", "VVAR"}
+        if self._varGlyphs is not None:
+            excluded.update(("glyf", "loca", "hmtx", "vmtx"))
+        if self._cvtValues is not None:
+            excluded.add("cvt ")
+        tags = [tag for tag in varfont.keys() if tag not in excluded]
+
+        buf = BytesIO()
+        writer = SFNTWriter(buf, len(tags), varfont.sfntVersion)
+        for tag in tags:
+            if tag == "maxp" and maxpData is not None:
+                writer[tag] = maxpData
+            else:
+                writer[tag] = varfont.getTableData(tag)
+        writer.close()
+        return buf.getvalue()
+
+    def _normalizeLocation(self, axisLimits):
+        badLimits = set(axisLimits.keys()).difference(self.axes)
+        if badLimits:
+            raise ValueError("Cannot limit: {} not present in fvar".format(badLimits))
+
+        location = {}
+        normalizedLocation = {}
+        for axisTag, triple in self.axes.items():
+            value = axisLimits.get(axisTag)
+            if value is None:
+                value = triple[1]
+            elif isinstance(value, tuple):
+                raise NotImplementedError(
+                    f"Unsupported range {axisTag}={value[0]:g}:{value[1]:g}; "
+                    "PreparedInstancer only makes full instances"
+                )
+            location[axisTag] = value
+            normalizedLocation[axisTag] = normalize(
+                value, triple, self.avarSegments.get(axisTag)
+            )
+        return location, normalizedLocation
+
+    def instantiate(self, axisLimits):
+        """Return a new TTFont of the full instance at the given location.
+
+        Args:
+            axisLimits: a dict keyed by axis tags (str) containing the coordinates
+                (float) of the instance along the axes. If an axis is missing, or
+                its value is `None`, the default coordinate as per 'fvar' table
+                for that axis is used.
+        """
+        location, normalizedLocation = self._normalizeLocation(axisLimits)
+
+        log.info("Normalized location: %s", normalizedLocation)
+
+        font = TTFont(
+            BytesIO(self._data),
+            recalcBBoxes=False,
+            recalcTimestamp=self.recalcTimestamp,
+        )
+        font.setGlyphOrder(list(self.glyphOrder))
+        font.flavor = self.flavor
+        font.flavorData = self.flavorData
+
+        scalars = [
+            supportScalar(normalizedLocation, axes) for axes in self._regions
+        ]
+
+        if self._varGlyphs is not None:
+            self._instantiateGlyphs(font, scalars)
+
+        if self._cvtValues is not None:
+            cvt = font["cvt "] = newTable("cvt ")
+            cvt.values = array.array("h", self._cvtValues)
+            deltas = [0] * len(cvt.values)
+            for regionIndex, varDeltas in self._cvarDeltas:
+                scalar = scalars[regionIndex]
+                if not scalar:
+                    continue
+                for i, d in enumerate(varDeltas):
+                    if d is not None:
+                        deltas[i] += d * scalar
+            setCvarDeltas(cvt, deltas)
+
+        if self._mvarStore is not None:
+            deltas = self._mvarStore.getDeltas(normalizedLocation)
+            for (tableTag, itemName), varIdx in self._mvarRecords:
+                delta = deltas[varIdx]
+                if delta != 0:
+                    table = font[tableTag]
+                    setattr(table, itemName, getattr(table, itemName) + otRound(delta))
+
+        if self._gdefStore is not None:
+            merger = MutatorMerger(
+                font, self._gdefStore.getDeltas(normalizedLocation), deleteVariations=True
+            )
+            merger.mergeTables(font, [font], ["GDEF", "GPOS"])
+            _downgradeGDEF(font)
+
+        for tableTag in self._featureVariationsTags:
+            _instantiateFeatureVariations(
+                font[tableTag].table, self.fvarAxes, normalizedLocation
+            )
+            font[tableTag].prune_lookups()
+
+        if "STAT" in font:
+            instantiateSTAT(font, location)
+        _pruneUnusedNames(font, self._origNameIDs)
+
+        varLib.set_default_weight_width_slant(font, location)
+
+        return font
+
+    def _instantiateGlyphs(self, font, scalars):
+        glyf = font["glyf"] = newTable("glyf")
+        glyf.__dict__.update(self._glyfAttributes)
+        glyf.glyphOrder = font.getGlyphOrder()
+        glyphs = glyf.glyphs = {
+            glyphName: _g_l_y_f.Glyph(data)
+            for glyphName, data in self._glyphData.items()
+        }
+        font["loca"] = newTable("loca")
+        hmtx = font["hmtx"] = newTable("hmtx")
+        hmtx.metrics = dict(self._hMetrics)
+        vmtx = None
+        if self._vMetrics is not None:
+            vmtx = font["vmtx"] = newTable("vmtx")
+            vmtx.metrics = dict(self._vMetrics)
+
+        # in order of component depth, as in instantiateGvar
+        for glyphName, coordinates, deltas in self._varGlyphs:
+            glyphs[glyphName] = _copyGlyph(self._defaultGlyphs[glyphName])
+            defaultDeltas = None
+            for regionIndex, varDeltas in deltas:
+                scalar = scalars[regionIndex]
+                if not scalar:
+                    continue
+                if defaultDeltas is None:
+                    defaultDeltas = [d * scalar for d in varDeltas]
+                else:
+                    defaultDeltas = [
+                        a + d * scalar for a, d in zip(defaultDeltas, varDeltas)
+                    ]
+            if defaultDeltas is not None:
+                deltaCoordinates = _g_l_y_f.GlyphCoordinates(typecode="d")
+                deltaCoordinates.array.extend(defaultDeltas)
+                coordinates = coordinates + deltaCoordinates
+            glyf.setCoordinates(glyphName, coordinates, font)
+
+        # Composite glyphs expand their components to compute their bounds;
+        # the unchanged glyphs are compiled faster from their data.
+        for glyphName, data in self._glyphData.items():
+            if data and not hasattr(glyphs[glyphName], "data"):
+                glyphs[glyphName] = _g_l_y_f.Glyph(data)
+
+        if self.recalcBBoxes:
+            bounds = copy(self._defaultBounds)
+            for glyphName, _, _ in self._varGlyphs:
+                bounds.addGlyph(
+                    glyphs[glyphName],
+                    hmtx.metrics[glyphName],
+                    vmtx.metrics[glyphName] if vmtx is not None else None,
+                )
+            bounds.apply(font)
+
+
 def splitAxisLocationAndRanges(axisLimits, rangeType=AxisRange):
     location, axisRanges = {}, {}
     for axisTag, value in axisLimits.items():
@@ -1339,6 +1856,13 @@ def parseArgs(args):
         action="store_false",
         help="Don't perform IUP optimization on the remaining gvar TupleVariations",
     )
+    parser.add_argument(
+        "--workers",
+        metavar="N",
+        type=int,
+        default=None,
+        help="IUP-optimize the remaining gvar TupleVariations with N processes",
+    )
     parser.add_argument(
         "--no-overlap-flag",
         dest="overlap",
@@ -1391,6 +1915,7 @@ def main(args=None):
         inplace=True,
         optimize=options.optimize,
         overlap=options.overlap,
+        workers=options.workers,
     )
 
     outfile = (
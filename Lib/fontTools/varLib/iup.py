@@ -1,3 +1,10 @@
+from fontTools.misc.parallelTools import parallelMap
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
 def iup_segment(coords, rc1, rd1, rc2, rd2):
 	# rc1 = reference coord 1
 	# rd1 = reference delta 1
@@ -87,13 +94,85 @@ def iup_delta(delta, coords, ends):
 # Optimizer
 
 def can_iup_in_between(deltas, coords, i, j, tolerance):
+	"""Return whether the deltas of the points between i and j (i < j) are
+	within 'tolerance' of the deltas interpolated from points i and j, as
+	iup_segment() computes them."""
 	assert j - i >= 2
-	interp = list(iup_segment(coords[i+1:j], coords[i], deltas[i], coords[j], deltas[j]))
-	deltas = deltas[i+1:j]
+	(cx1, cy1), (cx2, cy2) = coords[i], coords[j]
+	(dx1, dy1), (dx2, dy2) = deltas[i], deltas[j]
 
-	assert len(deltas) == len(interp)
-
-	return all(abs(complex(x-p, y-q)) <= tolerance for (x,y),(p,q) in zip(deltas, interp))
+	# Same as iup_segment(), for each axis
+	if cx1 == cx2:
+		sx = None
+		px = dx1 if dx1 == dx2 else 0
+	else:
+		if cx1 > cx2:
+			cx1, cx2, dx1, dx2 = cx2, cx1, dx2, dx1
+		sx = (dx2 - dx1) / (cx2 - cx1)
+	if cy1 == cy2:
+		sy = None
+		py = dy1 if dy1 == dy2 else 0
+	else:
+		if cy1 > cy2:
+			cy1, cy2, dy1, dy2 = cy2, cy1, dy2, dy1
+		sy = (dy2 - dy1) / (cy2 - cy1)
+
+	# Stop at the first point that can't be interpolated
+	for k in range(i+1, j):
+		x, y = coords[k]
+		dx, dy = deltas[k]
+		if sx is not None:
+			if x <= cx1:
+				px = dx1
+			elif x >= cx2:
+				px = dx2
+			else:
+				px = dx1 + (x - cx1) * sx
+		if sy is not None:
+			if y <= cy1:
+				py = dy1
+			elif y >= cy2:
+				py = dy2
+			else:
+				py = dy1 + (y - cy1) * sy
+		if abs(complex(dx - px, dy - py)) > tolerance:
+			return False
+	return True
+
+# With NumPy, the points j that _iup_contour_optimize_dp() looks back to are
+# first checked all at once, if there are at least that many.
+_numpyMinLookback = 32
+
+def _iup_candidates_numpy(deltaArray, coordsArray, js, i, tolerance):
+	"""Return the points in 'js' (an array of indices, all < i-1) for which
+	the points right after them and right before i can be interpolated
+	within 'tolerance', the first points can_iup_in_between() checks.  The
+	tolerance is widened by a tiny bit, since numpy.hypot() may round
+	differently from abs(complex()); can_iup_in_between() is exact."""
+	c1 = coordsArray[js]
+	d1 = deltaArray[js]
+	c2 = coordsArray[i]
+	d2 = deltaArray[i]
+	# Same as iup_segment(), for each axis
+	swap = c1 > c2
+	lowC = numpy.where(swap, c2, c1)
+	highC = numpy.where(swap, c1, c2)
+	lowD = numpy.where(swap, d2, d1)
+	highD = numpy.where(swap, d1, d2)
+	equal = lowC == highC
+	keep = numpy.ones(len(js), dtype=bool)
+	# The scales of equal coordinates are not used
+	with numpy.errstate(divide='ignore', invalid='ignore'):
+		scale = (highD - lowD) / (highC - lowC)
+		for ks in (js + 1, numpy.full(len(js), i - 1)):
+			c = coordsArray[ks]
+			d = deltaArray[ks]
+			p = numpy.where(c <= lowC, lowD,
+					numpy.where(c >= highC, highD, lowD + (c - lowC) * scale))
+			p = numpy.where(equal, numpy.where(d1 == d2, d1, 0.), p)
+			distance = numpy.hypot(d[:,0] - p[:,0], d[:,1] - p[:,1])
+			keep &= distance <= tolerance * (1 + 1e-9) + 1e-9
+	return js[keep]
 
 def _iup_contour_bound_forced_set(delta, coords, tolerance=0):
 	"""The forced set is a conservative set of points on the contour that must be encoded
@@ -171,32 +250,51 @@ def _iup_contour_optimize_dp(delta, coords, forced={}, tolerance=0, lookback=Non
 	Note that solution always encodes last point explicitly.  Higher-level is responsible
 	for removing that restriction.
 
-	As major speedup, we stop looking further whenever we see a "forced" point."""
+	As major speedup, we stop looking further whenever we see a "forced" point, or when
+	no point further back has a cost low enough to improve on the best encoding found."""
 
 	n = len(delta)
 	if lookback is None:
 		lookback = n
+	useNumpy = numpy is not None and min(n, lookback) >= _numpyMinLookback
+	if useNumpy:
+		deltaArray = numpy.array(delta, dtype=numpy.float64)
+		coordsArray = numpy.array(coords, dtype=numpy.float64)
 	costs = {-1:0}
 	chain = {-1:None}
+	# costList[j+1] is costs[j], for taking the minimum of a range of costs
+	costList = [0]
+	lastForced = -2
 	for i in range(0, n):
 		best_cost = costs[i-1] + 1
 
 		costs[i] = best_cost
 		chain[i] = i - 1
+		costList.append(best_cost)
 
+		if i - 2 in forced:
+			lastForced = i - 2
 		if i - 1 in forced:
 			continue
 
-		for j in range(i-2, max(i-lookback, -2), -1):
+		# Look back from i-2 to the last forced point, within lookback
+		stop = max(i - lookback, -2, lastForced - 1)
+		if stop >= i - 2 or min(costList[stop+2:i]) + 1 >= best_cost:
+			continue
+		candidates = range(i-2, stop, -1)
+		if useNumpy and len(candidates) >= _numpyMinLookback:
+			candidates = _iup_candidates_numpy(
+				deltaArray, coordsArray, numpy.arange(i-2, stop, -1), i,
+				tolerance).tolist()
+		for j in candidates:
 
 			cost = costs[j] + 1
 
 			if cost < best_cost and can_iup_in_between(delta, coords, j, i, tolerance):
-				costs[i] = best_cost = cost
+				costs[i] = costList[i+1] = best_cost = cost
 				chain[i] = j
-
-			if j in forced:
-				break
+				if j - 1 == stop or min(costList[stop+2:j+1]) + 1 >= best_cost:
+					break
 
 	return chain, costs
 
@@ -298,3 +396,14 @@ def iup_delta_optimize(delta, coords, ends, tolerance=0.):
 		start = end+1
 
 	return out
+
+def iup_delta_optimize_glyphs(glyphs, tolerance=0., workers=None):
+	"""Return the list of iup_delta_optimize(delta, coords, ends, tolerance)
+	for each (delta, coords, ends) tuple in 'glyphs'.
+
+	If 'workers' is greater than 1, the glyphs are optimized by a pool of
+	that many processes, see fontTools.misc.parallelTools.parallelMap.
+	"""
+	return parallelMap(
+		lambda glyph: iup_delta_optimize(*glyph, tolerance=tolerance),
+		glyphs, workers)
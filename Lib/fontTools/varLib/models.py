@@ -6,6 +6,11 @@ __all__ = ['nonNone', 'allNone', 'allEqual', 'allEqualTo', 'subList',
 	   'VariationModel']
 
 from .errors import VariationModelError
+import array
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 
 def nonNone(lst):
@@ -211,6 +216,7 @@ class VariationModel(object):
 		self.mapping = [self.locations.index(l) for l in locations]
 		self.reverseMapping = [locations.index(l) for l in self.locations]
 
+		self._supportArrays = None
 		self._computeMasterSupports(keyFunc.axisPoints)
 		self._subModels = {}
 
@@ -347,15 +353,14 @@ class VariationModel(object):
 					box[axis] = triple
 			supports.append(box)
 
+		self.supports = supports
+		# Walk over previous masters now, populate deltaWeight
+		for i,scalars in enumerate(self.getScalarsForLocations(locations)):
 			deltaWeight = {}
-			# Walk over previous masters now, populate deltaWeight
-			for j,m in enumerate(locations[:i]):
-				scalar = supportScalar(loc, supports[j])
+			for j,scalar in enumerate(scalars[:i]):
 				if scalar:
 					deltaWeight[j] = scalar
 			deltaWeights.append(deltaWeight)
-
-		self.supports = supports
 		self.deltaWeights = deltaWeights
 
 	def getDeltas(self, masterValues):
@@ -369,6 +374,33 @@ class VariationModel(object):
 			out.append(delta)
 		return out
 
+	def getDeltaArrays(self, masterArrays):
+		"""Like getDeltas(), for 'masterArrays' holding one sequence of
+		numbers per master, all of the same length; for example the flat
+		coordinates of a glyph in each master. Returns an array.array('d')
+		of deltas per master, in the order of self.supports.
+
+		With NumPy, the deltas of all numbers are computed at once. They
+		are subtracted in the same order as by getDeltas(), so that the
+		results are the same.
+		"""
+		assert len(masterArrays) == len(self.deltaWeights)
+		mapping = self.reverseMapping
+		out = []
+		if numpy is None:
+			for i,weights in enumerate(self.deltaWeights):
+				delta = [float(v) for v in masterArrays[mapping[i]]]
+				for j,weight in weights.items():
+					delta = [d - o * weight for d,o in zip(delta, out[j])]
+				out.append(delta)
+			return [array.array('d', delta) for delta in out]
+		for i,weights in enumerate(self.deltaWeights):
+			delta = numpy.array(masterArrays[mapping[i]], dtype=numpy.float64)
+			for j,weight in weights.items():
+				delta -= out[j] * weight
+			out.append(delta)
+		return [array.array('d', delta.tobytes()) for delta in out]
+
 	def getDeltasAndSupports(self, items):
 		model, items = self.getSubModel(items)
 		return model.getDeltas(items), model.supports
@@ -376,6 +408,61 @@ class VariationModel(object):
 	def getScalars(self, loc):
 		return [supportScalar(loc, support) for support in self.supports]
 
+	def _getSupportArrays(self):
+		# The supports as regions x N arrays of the axis indices, lower,
+		# peak and upper values of the axes that participate, in the order
+		# supportScalar() multiplies their scalars, padded with an axis
+		# that is always at its peak.
+		if self._supportArrays is not None:
+			return self._supportArrays
+		axes = sorted({axis for support in self.supports for axis in support})
+		axisIndices = {axis:i for i,axis in enumerate(axes)}
+		padding = (len(axes), 0., 0., 0.)
+		regions = []
+		for support in self.supports:
+			region = []
+			for axis,(lower,peak,upper) in support.items():
+				# Same as the OpenType-specific cases of supportScalar()
+				if peak == 0.:
+					continue
+				if lower > peak or peak > upper:
+					continue
+				if lower < 0. and upper > 0.:
+					continue
+				region.append((axisIndices[axis], lower, peak, upper))
+			regions.append(region)
+		width = max((len(region) for region in regions), default=0)
+		table = numpy.array(
+			[region + [padding] * (width - len(region)) for region in regions],
+			dtype=numpy.float64).reshape(len(regions), width, 4)
+		self._supportArrays = (axes, table[:,:,0].astype(numpy.intp),
+				       table[:,:,1], table[:,:,2], table[:,:,3])
+		return self._supportArrays
+
+	def getScalarsForLocations(self, locations):
+		"""Returns the list of getScalars(loc) for each location in
+		'locations'. With NumPy, the scalars for all locations and supports
+		are computed at once.
+		"""
+		if numpy is None:
+			return [self.getScalars(loc) for loc in locations]
+		axes, axisIndices, lowers, peaks, uppers = self._getSupportArrays()
+		values = numpy.array(
+			[[loc.get(axis, 0.) for axis in axes] + [0.] for loc in locations],
+			dtype=numpy.float64).reshape(len(locations), len(axes) + 1)
+		scalars = numpy.ones((len(locations), len(self.supports)))
+		with numpy.errstate(divide='ignore', invalid='ignore'):
+			for k in range(axisIndices.shape[1]):
+				v = values[:, axisIndices[:, k]]
+				lower, peak, upper = lowers[:, k], peaks[:, k], uppers[:, k]
+				scalar = numpy.where(v < peak,
+						     (v - lower) / (peak - lower),
+						     (v - upper) / (peak - upper))
+				scalar[(v <= lower) | (upper <= v)] = 0.
+				scalar[v == peak] = 1.
+				scalars *= scalar
+		return scalars.tolist()
+
 	@staticmethod
 	def interpolateFromDeltasAndScalars(deltas, scalars):
 		v = None
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Benchmark the IUP delta optimizer of fontTools.varLib.iup against the
+plain dynamic programming it replaced, checking that both produce the same
+output.
+
+Usage:
+    benchmark-iup.py [FONT ...] [--tolerance 0.5] [--jitter 1] [--workers N]
+
+The deltas of each glyph variation in the 'gvar' table of the fonts (binary
+or TTX) are optimized, once as stored and once with random offsets of up to
+'jitter' font units added, so that fewer points can be interpolated. Without
+fonts, the fonts with a 'gvar' table in the fontTools test suite are used.
+"""
+
+import argparse
+import os
+import random
+import time
+
+from fontTools.ttLib import TTFont
+from fontTools.varLib import iup
+
+
+# The optimizer before it was sped up, as reference
+
+def can_iup_in_between(deltas, coords, i, j, tolerance):
+    assert j - i >= 2
+    interp = list(iup.iup_segment(coords[i+1:j], coords[i], deltas[i], coords[j], deltas[j]))
+    deltas = deltas[i+1:j]
+    assert len(deltas) == len(interp)
+    return all(abs(complex(x-p, y-q)) <= tolerance for (x,y),(p,q) in zip(deltas, interp))
+
+
+def iup_contour_optimize_dp(delta, coords, forced={}, tolerance=0, lookback=None):
+    n = len(delta)
+    if lookback is None:
+        lookback = n
+    costs = {-1:0}
+    chain = {-1:None}
+    for i in range(0, n):
+        best_cost = costs[i-1] + 1
+        costs[i] = best_cost
+        chain[i] = i - 1
+        if i - 1 in forced:
+            continue
+        for j in range(i-2, max(i-lookback, -2), -1):
+            cost = costs[j] + 1
+            if cost < best_cost and can_iup_in_between(delta, coords, j, i, tolerance):
+                costs[i] = best_cost = cost
+                chain[i] = j
+            if j in forced:
+                break
+    return chain, costs
+
+
+def iup_contour_optimize(delta, coords, tolerance=0.):
+    n = len(delta)
+    if all(abs(complex(*p)) <= tolerance for p in delta):
+        return [None] * n
+    if n == 1:
+        return delta
+    d0 = delta[0]
+    if all(d0 == d for d in delta):
+        return [d0] + [None] * (n-1)
+    forced = iup._iup_contour_bound_forced_set(delta, coords, tolerance)
+    if forced:
+        k = (n-1) - max(forced)
+        delta = iup._rot_list(delta, k)
+        coords = iup._rot_list(coords, k)
+        forced = iup._rot_set(forced, k, n)
+        chain, costs = iup_contour_optimize_dp(delta, coords, forced, tolerance)
+        solution = set()
+        i = n - 1
+        while i is not None:
+            solution.add(i)
+            i = chain[i]
+        delta = [delta[i] if i in solution else None for i in range(n)]
+        delta = iup._rot_list(delta, -k)
+    else:
+        chain, costs = iup_contour_optimize_dp(delta+delta, coords+coords, forced, tolerance, n)
+        best_sol, best_cost = None, n+1
+        for start in range(n-1, 2*n-1):
+            solution = set()
+            i = start
+            while i > start - n:
+                solution.add(i % n)
+                i = chain[i]
+            if i == start - n:
+                cost = costs[start] - costs[start - n]
+                if cost <= best_cost:
+                    best_sol, best_cost = solution, cost
+        delta = [delta[i] if i in best_sol else None for i in range(n)]
+    return delta
+
+
+def iup_delta_optimize(delta, coords, ends, tolerance=0.):
+    n = len(coords)
+    ends = ends + [n-4, n-3, n-2, n-1]
+    out = []
+    start = 0
+    for end in ends:
+        out.extend(iup_contour_optimize(delta[start:end+1], coords[start:end+1], tolerance))
+        start = end+1
+    return out
+
+
+def test_corpus():
+    tests = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Tests")
+    for root, dirs, files in os.walk(tests):
+        for name in sorted(files):
+            if name.endswith(".ttx"):
+                path = os.path.join(root, name)
+                with open(path, encoding="utf-8") as f:
+                    data = f.read()
+                # only complete fonts
+                if all("<%s>" % tag in data for tag in ("head", "hmtx", "glyf", "gvar")):
+                    yield path
+
+
+def load_font(path):
+    if path.endswith(".ttx"):
+        font = TTFont()
+        font.importXML(path)
+        return font
+    return TTFont(path)
+
+
+def collect_deltas(paths, jitter, rng):
+    jobs = []
+    for path in paths:
+        font = load_font(path)
+        glyf = font["glyf"]
+        for glyphName, variations in font["gvar"].variations.items():
+            coords, controls = glyf.getCoordinatesAndControls(glyphName, font)
+            if controls.numberOfContours < 0:
+                continue
+            ends = list(controls.endPts)
+            for var in variations:
+                var.calcInferredDeltas(coords, ends)
+                deltas = list(var.coordinates)
+                jobs.append((deltas, list(coords), ends))
+                if jitter:
+                    jittered = [(x + rng.randint(-jitter, jitter),
+                                 y + rng.randint(-jitter, jitter)) for x,y in deltas]
+                    jobs.append((jittered, list(coords), ends))
+    return jobs
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fonts", nargs="*")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--jitter", type=int, default=1)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args(args)
+
+    paths = options.fonts or list(test_corpus())
+    jobs = collect_deltas(paths, options.jitter, random.Random(options.seed))
+    print("%d delta sets, %d points, from %d fonts" % (
+        len(jobs), sum(len(deltas) for deltas, _, _ in jobs), len(paths)))
+
+    start = time.perf_counter()
+    expected = [iup_delta_optimize(deltas, coords, ends, options.tolerance)
+                for deltas, coords, ends in jobs]
+    elapsed = time.perf_counter() - start
+    print("Reference:           %.3f s" % elapsed)
+
+    start = time.perf_counter()
+    results = [iup.iup_delta_optimize(deltas, coords, ends, options.tolerance)
+               for deltas, coords, ends in jobs]
+    elapsed = time.perf_counter() - start
+    print("iup_delta_optimize:  %.3f s" % elapsed)
+    assert results == expected, "iup_delta_optimize output differs"
+
+    if options.workers is not None:
+        start = time.perf_counter()
+        results = iup.iup_delta_optimize_glyphs(
+            jobs, options.tolerance, workers=options.workers)
+        elapsed = time.perf_counter() - start
+        print("%d workers:           %.3f s" % (options.workers, elapsed))
+        assert results == expected, "iup_delta_optimize_glyphs output differs"
+
+    print("Output is identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Benchmark the assembly of GSUB/GPOS table data by OTTableWriter.getAllData,
+against the previous implementation, which walked the items of each table
+repeatedly with getDataLength() and getData().
+
+Usage:
+    benchmark-otl-packing.py [FONT] [--table GPOS] [--repeat 5]
+
+Without a FONT, a synthetic GPOS table with ~100k pair adjustments is used.
+"""
+
+import argparse
+import timeit
+
+from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.tables import otTables
+from fontTools.ttLib.tables.otBase import OTTableWriter
+from fontTools.misc.py23 import bytesjoin
+
+
+def referenceDoneWriting(writer, internedTables):
+    isExtension = hasattr(writer, "Extension")
+    dontShare = hasattr(writer, "DontShare")
+    if isExtension:
+        internedTables = {}
+    items = list(writer.items)
+    for i in range(len(items)):
+        item = items[i]
+        if hasattr(item, "getCountData"):
+            items[i] = item.getCountData()
+        elif hasattr(item, "getData"):
+            referenceDoneWriting(item, internedTables)
+            if not dontShare:
+                items[i] = item = internedTables.setdefault(item, item)
+    writer.items = tuple(items)
+
+
+def referenceGatherTables(writer, tables, extTables, done):
+    done[id(writer)] = True
+    numItems = len(writer.items)
+    selfTables = tables
+    if hasattr(writer, "Extension"):
+        tables, extTables, done = extTables, None, {}
+    sortCoverageLast = 0
+    if hasattr(writer, "sortCoverageLast"):
+        for i in range(numItems):
+            item = writer.items[i]
+            if hasattr(item, "name") and (item.name == "Coverage"):
+                sortCoverageLast = 1
+                break
+        if id(item) not in done:
+            referenceGatherTables(item, tables, extTables, done)
+    for i in reversed(range(numItems)):
+        item = writer.items[i]
+        if not hasattr(item, "getData"):
+            continue
+        if sortCoverageLast and (i == 1) and item.name == 'Coverage':
+            continue
+        if id(item) not in done:
+            referenceGatherTables(item, tables, extTables, done)
+    selfTables.append(writer)
+
+
+def referenceGetAllData(writer):
+    referenceDoneWriting(writer, {})
+    tables = []
+    extTables = []
+    referenceGatherTables(writer, tables, extTables, {})
+    tables.reverse()
+    extTables.reverse()
+    pos = 0
+    for table in tables + extTables:
+        table.pos = pos
+        pos = pos + table.getDataLength()
+    return bytesjoin([table.getData() for table in tables + extTables])
+
+
+def makeFont(numGlyphs=320, numLookups=1):
+    from fontTools.otlLib import builder
+
+    glyphs = [".notdef"] + ["g%d" % i for i in range(numGlyphs)]
+    font = TTFont()
+    font.setGlyphOrder(glyphs)
+    glyphMap = font.getReverseGlyphMap()
+    lookups = []
+    for k in range(numLookups):
+        pairs = {}
+        for i in range(1, numGlyphs):
+            for j in range(k, numGlyphs):
+                value = (i * 31 + j * 7 + k) % 1000 - 500 or 1
+                pairs[(glyphs[i], glyphs[j])] = (
+                    builder.buildValue({"XAdvance": value}), None)
+        lookups.append(builder.buildLookup(
+            [builder.buildPairPosGlyphsSubtable(pairs, glyphMap)]))
+    gpos = otTables.GPOS()
+    gpos.Version = 0x00010000
+    gpos.ScriptList = otTables.ScriptList()
+    gpos.ScriptList.ScriptRecord = []
+    gpos.FeatureList = otTables.FeatureList()
+    gpos.FeatureList.FeatureRecord = []
+    gpos.LookupList = otTables.LookupList()
+    gpos.LookupList.Lookup = lookups
+    font["GPOS"] = newTable("GPOS")
+    font["GPOS"].table = gpos
+    return font
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("font", nargs="?")
+    parser.add_argument("--table", default="GPOS")
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args(args)
+
+    font = TTFont(options.font) if options.font else makeFont()
+    table = font[options.table]
+    # fix offset overflows, if any, beforehand
+    table.compile(font)
+
+    def build():
+        writer = OTTableWriter(tableTag=table.tableTag)
+        table.table.compile(writer, font)
+        return writer
+
+    assert referenceGetAllData(build()) == build().getAllData()
+
+    for name, func in [
+        ("reference", referenceGetAllData),
+        ("getAllData", OTTableWriter.getAllData),
+    ]:
+        times = timeit.repeat(
+            "func(writer)", setup="writer = build()",
+            globals={"func": func, "build": build},
+            repeat=options.repeat, number=1)
+        print("%-12s best of %d: %.3f s" % (name, options.repeat, min(times)))
+
+
+if __name__ == "__main__":
+    main()
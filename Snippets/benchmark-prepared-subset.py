@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Benchmark producing many random Unicode subsets of one font, loading and
+subsetting the font anew for each subset, versus with a subset.PreparedFont.
+
+Usage:
+    benchmark-prepared-subset.py FONT [--count 1000] [--size 100] [--flavor woff2]
+
+Meant to be run on a large (e.g. CJK) font.
+"""
+
+import argparse
+import random
+import time
+from io import BytesIO
+
+from fontTools import subset
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("font")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=100,
+                        help="number of random Unicodes per subset")
+    parser.add_argument("--flavor")
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args(args)
+
+    subsetOptions = subset.Options(flavor=options.flavor)
+    with open(options.font, "rb") as f:
+        data = f.read()
+
+    font = subset.load_font(BytesIO(data), subsetOptions)
+    unicodes = sorted(font.getBestCmap())
+    font.close()
+    rng = random.Random(options.seed)
+    requests = [rng.sample(unicodes, min(options.size, len(unicodes)))
+                for _ in range(options.count)]
+
+    start = time.perf_counter()
+    for request in requests:
+        font = subset.load_font(BytesIO(data), subsetOptions)
+        subsetter = subset.Subsetter(subsetOptions)
+        subsetter.populate(unicodes=request)
+        subsetter.subset(font)
+        subset.save_font(font, BytesIO(), subsetOptions)
+    elapsed = time.perf_counter() - start
+    print("Subsetter:    %d subsets in %.2f s (%.1f ms each)" % (
+        len(requests), elapsed, 1000 * elapsed / len(requests)))
+
+    start = time.perf_counter()
+    prepared = subset.PreparedFont(
+        subset.load_font(BytesIO(data), subsetOptions), subsetOptions)
+    prepareTime = time.perf_counter() - start
+    for request in requests:
+        font = prepared.subset(unicodes=request)
+        subset.save_font(font, BytesIO(), subsetOptions)
+    elapsed = time.perf_counter() - start
+    print("PreparedFont: %d subsets in %.2f s (%.1f ms each, %.2f s to prepare)" % (
+        len(requests), elapsed, 1000 * (elapsed - prepareTime) / len(requests),
+        prepareTime))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from fontTools.cffLib.subroutinizer import desubroutinize, subroutinize
+from fontTools.fontBuilder import FontBuilder
+from fontTools.misc.psCharStrings import T2CharString
+from fontTools.ttLib import TTFont
+import io
+import os
+import pytest
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+def load(filename):
+    path = os.path.join(DATA_DIR, filename)
+    if filename.endswith(".ttx"):
+        font = TTFont()
+        font.importXML(path)
+    else:
+        font = TTFont(path)
+    return reload_font(font)
+
+
+def reload_font(font):
+    buf = io.BytesIO()
+    font.save(buf)
+    buf.seek(0)
+    return TTFont(buf)
+
+
+def get_cff(font):
+    return font["CFF2" if "CFF2" in font else "CFF "].cff
+
+
+def flat_programs(font):
+    cff = get_cff(font)
+    desubroutinize(cff)
+    charStrings = cff[cff.fontNames[0]].CharStrings
+    return {g: charStrings[g].program for g in charStrings.keys()}
+
+
+@pytest.mark.parametrize(
+    "filename",
+    ["LinLibertine_RBI.otf", "TestSparseCFF2VF.ttx", "TestFDSelect4.ttx"],
+)
+def test_subroutinize_roundtrip(filename):
+    expected = flat_programs(load(filename))
+
+    font = load(filename)
+    size = len(reload_font(font).reader["CFF2" if "CFF2" in font else "CFF "])
+    desubroutinize(get_cff(font))
+    flat_size = len(reload_font(font).reader["CFF2" if "CFF2" in font else "CFF "])
+    subroutinize(get_cff(font))
+    font = reload_font(font)
+    subr_size = len(font.reader["CFF2" if "CFF2" in font else "CFF "])
+
+    assert subr_size <= flat_size
+    if filename == "LinLibertine_RBI.otf":
+        # Smaller than the original, which has local subroutines
+        assert subr_size < size
+        assert len(get_cff(font).GlobalSubrs) > 0
+    assert flat_programs(font) == expected
+
+
+def test_subroutinize_max_subrs():
+    font = load("LinLibertine_RBI.otf")
+    assert subroutinize(get_cff(font), maxSubrs=10) == 10
+    font = reload_font(font)
+    assert len(get_cff(font).GlobalSubrs) == 10
+
+
+def test_subroutinize_keeps_widths_in_glyphs():
+    fb = FontBuilder(1000, isTTF=False)
+    glyphs = [".notdef", "a", "b"]
+    fb.setupGlyphOrder(glyphs)
+    shared = [100, 100, "rmoveto", 200, 300, 400, 0, "rlineto", -50, 60, "rlineto"]
+    charStrings = {
+        ".notdef": T2CharString(program=["endchar"]),
+        "a": T2CharString(program=[500] + shared + [10, 20, "rlineto", "endchar"]),
+        "b": T2CharString(program=[600] + shared + [30, 40, "rlineto", "endchar"]),
+    }
+    fb.setupCFF("Test", {}, charStrings, {"nominalWidthX": 0}, subroutinize=True)
+    font = reload_font(fb.font)
+    cff = get_cff(font)
+    charStrings = cff[cff.fontNames[0]].CharStrings
+
+    assert len(cff.GlobalSubrs) == 1
+    subr = cff.GlobalSubrs[0]
+    subr.decompile()
+    assert subr.program == [200, 300, 400, 0, "rlineto", -50, 60, "rlineto", "return"]
+    a = charStrings["a"]
+    a.decompile()
+    assert a.program == [
+        500, 100, 100, "rmoveto", -107, "callgsubr", 10, 20, "rlineto", "endchar"]
@@ -0,0 +1,52 @@
+from fontTools.misc.parallelTools import parallelMap
+from fontTools.misc.loggingTools import CapturingLogHandler
+import multiprocessing
+import os
+import pytest
+
+
+@pytest.mark.parametrize("workers", [None, 1, 2, 3])
+@pytest.mark.parametrize("chunksize", [None, 1, 4])
+def test_parallelMap(workers, chunksize):
+    # The function and the objects it refers to aren't pickled
+    offsets = {"offset": 100}
+    func = lambda i: (i + offsets["offset"], os.getpid())
+    results = parallelMap(func, range(10), workers, chunksize=chunksize)
+
+    assert [r for r, _ in results] == list(range(100, 110))
+    pids = {pid for _, pid in results}
+    if workers is None or workers < 2:
+        assert pids == {os.getpid()}
+    else:
+        assert os.getpid() not in pids
+
+
+def test_parallelMap_initializer():
+    def initializer():
+        os.environ["PARALLEL_TOOLS_TEST"] = "1"
+
+    results = parallelMap(
+        lambda i: os.environ.get("PARALLEL_TOOLS_TEST"), range(4), 2,
+        initializer=initializer)
+    assert results == ["1"] * 4
+    assert "PARALLEL_TOOLS_TEST" not in os.environ
+
+
+def test_parallelMap_error():
+    def func(i):
+        if i == 3:
+            raise ValueError(i)
+        return i
+
+    with pytest.raises(ValueError):
+        parallelMap(func, range(6), 2)
+
+
+def test_parallelMap_no_fork(monkeypatch):
+    def get_context(method=None):
+        raise ValueError(method)
+    monkeypatch.setattr(multiprocessing, "get_context", get_context)
+
+    with CapturingLogHandler("fontTools.misc.parallelTools", "WARNING") as captor:
+        assert parallelMap(lambda i: i * 2, range(4), 2) == [0, 2, 4, 6]
+    captor.assertRegex("requires the 'fork' start method")
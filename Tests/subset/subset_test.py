@@ -4,8 +4,10 @@ from fontTools.misc.testTools import getXML
 from fontTools import subset
 from fontTools.fontBuilder import FontBuilder
 from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.tables import otTables
 from fontTools.misc.loggingTools import CapturingLogHandler
 import difflib
+import json
 import logging
 import os
 import shutil
@@ -362,6 +364,35 @@ class SubsetTest(unittest.TestCase):
         self.assertTrue(filter(lambda l: l.args['msg'] == "subset 'cmap'", logs))
         self.assertTrue(filter(lambda l: l.args['msg'] == "subset 'glyf'", logs))
 
+    def test_subset_profile(self):
+        _, fontpath = self.compile_font(self.getpath("TestTTF-Regular.ttx"), ".ttf")
+        font = TTFont(fontpath)
+        subsetter = subset.Subsetter()
+        subsetter.populate(text='B')
+        report = subsetter.subset(font, profile=True)
+
+        self.assertEqual(
+            sorted(report["stages"]),
+            ["closure", "compile", "prune_post", "prune_pre", "subset_glyphs"])
+        self.assertEqual(report["glyphs"], {"before": 4, "retained": 2})
+        self.assertEqual(report["closure"]["requested"], 0)
+        self.assertEqual(report["closure"]["cmap"], 1)
+        self.assertIn("glyf", report["closure"])
+        glyf = report["tables"]["glyf"]
+        self.assertIn("subset_glyphs", glyf["time"])
+        self.assertIn("compile", glyf["time"])
+        self.assertEqual(glyf["size_after"], len(font.getTableData("glyf")))
+        self.assertLess(glyf["size_after"], glyf["size_before"])
+        self.assertEqual(
+            report["size"]["before"],
+            sum(t["size_before"] for t in report["tables"].values()))
+        # The report is JSON
+        self.assertEqual(json.loads(json.dumps(report)), report)
+
+        # Not profiling returns nothing
+        font = TTFont(fontpath)
+        self.assertIsNone(subsetter.subset(font))
+
     def test_passthrough_tables(self):
         _, fontpath = self.compile_font(self.getpath("TestTTF-Regular.ttx"), ".ttf")
         font = TTFont(fontpath)
@@ -455,6 +486,22 @@ class SubsetTest(unittest.TestCase):
         self.expect_ttx(subsetfont, self.getpath(
             "test_cntrmask_CFF.desub.ttx"), ["CFF "])
 
+    def test_subroutinize_CFF(self):
+        from fontTools.cffLib.subroutinizer import desubroutinize
+        for ttx, expected in [
+            ("Lobster.subset.ttx", "expect_desubroutinize_CFF.ttx"),
+            ("test_hinted_subrs_CFF.ttx", "test_hinted_subrs_CFF.desub.ttx"),
+            ("test_cntrmask_CFF.ttx", "test_cntrmask_CFF.desub.ttx"),
+        ]:
+            _, fontpath = self.compile_font(self.getpath(ttx), ".otf")
+            subsetpath = self.temp_path(".otf")
+            subset.main([fontpath, "--subroutinize", "--notdef-outline",
+                         "--output-file=%s" % subsetpath, "*"])
+            subsetfont = TTFont(subsetpath)
+            # Flattening the new subroutines gives back the desubroutinized font
+            desubroutinize(subsetfont["CFF "].cff)
+            self.expect_ttx(subsetfont, self.getpath(expected), ["CFF "])
+
     def test_no_hinting_desubroutinize_CFF(self):
         ttxpath = self.getpath("test_hinted_subrs_CFF.ttx")
         _, fontpath = self.compile_font(ttxpath, ".otf")
@@ -837,6 +884,98 @@ def test_subset_single_pos_format():
     ]
 
 
+def test_subset_gsub_closure_multiple_passes():
+    fb = FontBuilder(unitsPerEm=1000)
+    glyphs = [".notdef", "a", "b", "c.alt", "d", "c_d", "e", "f", "g", "x"]
+    fb.setupGlyphOrder(glyphs)
+    fb.setupCharacterMap({ord(g): g for g in "abefx"})
+    fb.setupNameTable({"familyName": "TestGSUBClosure", "styleName": "Regular"})
+    fb.setupPost()
+    fb.addOpenTypeFeatures("""
+        feature calt {
+            sub a b' x by c.alt;
+            sub e' f g by d;
+        } calt;
+        feature ss01 {
+            sub c.alt by d;
+        } ss01;
+        feature liga {
+            sub c.alt d by c_d;
+        } liga;
+    """)
+    buf = io.BytesIO()
+    fb.save(buf)
+    data = buf.getvalue()
+
+    options = subset.Options(layout_features=["*"])
+    font = TTFont(io.BytesIO(data))
+    closure = font["GSUB"].build_closure_index()
+    # The ligature is only triggered by its own glyphs
+    liga = next(i for i, lookup in enumerate(closure.lookups)
+                if lookup.LookupType == 4)
+    assert closure.triggers[liga] == {"c.alt", "d"}
+
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text="abx ef")
+    subsetter.subset(font)
+    # c.alt, d and c_d each need one more pass; 'g' never gets added so the
+    # second contextual rule never applies.
+    assert font.getGlyphOrder() == [
+        ".notdef", "a", "b", "c.alt", "d", "c_d", "e", "f", "x"]
+
+    prepared = subset.PreparedFont(TTFont(io.BytesIO(data)), options)
+    assert prepared.subset(text="abx ef").getGlyphOrder() == font.getGlyphOrder()
+
+
+def test_subset_gsub_closure_unknown_glyphs():
+    # GSUB maps g19 and g20 to glyph32789 and glyph32790, which are not in
+    # the font, and those on to g17 and g24
+    path = (pathlib.Path(__file__).parent.parent / "ttLib" / "tables" /
+            "data" / "aots" / "gsub1_1_modulo_f1.otf")
+    options = subset.Options(layout_features=["*"])
+    font = TTFont(path)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(glyphs=["g18", "g19", "g20", "g25"])
+    subsetter.subset(font)
+    assert font.getGlyphOrder() == [
+        ".notdef", "g17", "g18", "g19", "g20", "g24", "g25"]
+
+
+def test_glyph_id_set():
+    font = TTFont()
+    font.setGlyphOrder([".notdef"] + ["g%d" % i for i in range(1, 40)])
+    glyphIDs = subset._GlyphIDs(font)
+    names = {"g1", "g3", "g5", "g20", "g21", "g38"}
+    glyphs = glyphIDs.set(names)
+    assert glyphs == names
+    assert glyphIDs.glyphs(glyphs.mask) == ["g1", "g3", "g5", "g20", "g21", "g38"]
+    # Glyphs not in the glyph order have no bit in the mask
+    unknown = glyphIDs.set(names | {"missing"})
+    assert not isinstance(unknown, subset._GlyphIDSet)
+    assert unknown == names | {"missing"}
+
+    classDef = otTables.ClassDef()
+    classDef.classDefs = {"g1": 1, "g2": 1, "g3": 2, "g20": 3, "g30": 4}
+    coverages = []
+    for covGlyphs in (["g1", "g3"], ["g2", "g4"], ["g3", "g4", "g21"]):
+        coverage = otTables.Coverage()
+        coverage.glyphs = covGlyphs
+        coverages.append(coverage)
+    for glyphSet in (glyphs, glyphIDs.set(["g2", "g30"])):
+        plain = frozenset(glyphSet)
+        assert classDef.intersect(glyphSet) == classDef.intersect(plain)
+        for klass in range(5):
+            assert (classDef.intersect_class(glyphSet, klass) ==
+                    classDef.intersect_class(plain, klass))
+        for coverage in coverages:
+            assert coverage.intersect(glyphSet) == coverage.intersect(plain)
+            assert (coverage.intersect_glyphs(glyphSet) ==
+                    coverage.intersect_glyphs(plain))
+    assert classDef.intersect(glyphs) == [0, 1, 2, 3]
+    assert coverages[0].intersect(glyphs) == [0, 1]
+    assert coverages[1].intersect(glyphs) == []
+
+
 @pytest.fixture
 def ttf_path(tmp_path):
     # $(dirname $0)/../ttLib/data
@@ -872,5 +1011,317 @@ def test_subset_empty_glyf(tmp_path, ttf_path):
     assert all(loc == 0 for loc in loca)
 
 
+def test_parse_batch():
+    assert subset.parse_batch([
+        "# Latin\n",
+        "latin: U+0041-0043, U+0131\n",
+        "\n",
+        "U+20AC  # euro\n",
+    ]) == [("latin", [0x41, 0x42, 0x43, 0x131]), ("4", [0x20AC])]
+
+    with pytest.raises(ValueError, match="line 1"):
+        subset.parse_batch(["empty:\n"])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_subset_batch(tmp_path, ttf_path, workers):
+    batch_path = tmp_path / "ranges.txt"
+    batch_path.write_text("a: U+0020\nb: U+0041\nU+0020,U+0041\n")
+    outdir = tmp_path / "out"
+
+    subset.main([
+        str(ttf_path),
+        "--batch=%s" % batch_path,
+        "--output-dir=%s" % outdir,
+        "--workers=%d" % workers,
+        "--notdef-outline",
+    ])
+
+    assert sorted(p.name for p in outdir.iterdir()) == [
+        "TestTTF-Regular.3.ttf", "TestTTF-Regular.a.ttf", "TestTTF-Regular.b.ttf"]
+    for name, unicodes in [("a", "0020"), ("b", "0041"), ("3", "0020,0041")]:
+        expected_path = tmp_path / ("expected.%s.ttf" % name)
+        subset.main([
+            str(ttf_path),
+            "--unicodes=%s" % unicodes,
+            "--output-file=%s" % expected_path,
+            "--notdef-outline",
+        ])
+        actual = TTFont(outdir / ("TestTTF-Regular.%s.ttf" % name))
+        expected = TTFont(expected_path)
+        assert actual.getGlyphOrder() == expected.getGlyphOrder()
+        assert (getXML(actual["glyf"].toXML, actual) ==
+                getXML(expected["glyf"].toXML, expected))
+
+
+@pytest.mark.parametrize("option", ["--output-file", "--profile"])
+def test_subset_batch_bad_options(tmp_path, ttf_path, option, capsys):
+    batch_path = tmp_path / "ranges.txt"
+    batch_path.write_text("a: U+0020\n")
+    outdir = tmp_path / "out"
+
+    assert subset.main([
+        str(ttf_path),
+        "--batch=%s" % batch_path,
+        "--output-dir=%s" % outdir,
+        "%s=%s" % (option, tmp_path / "out.dat"),
+    ]) == 2
+
+    assert "ERROR: --batch can't be combined" in capsys.readouterr().err
+    assert not outdir.exists()
+
+
+@pytest.mark.parametrize(
+    "fontfile", ["TestTTF-Regular.ttx", "TestOTF-Regular.ttx", "TestMATH-Regular.ttx"]
+)
+@pytest.mark.parametrize("retain_gids", [False, True])
+def test_prepared_font(fontfile, retain_gids):
+    path = pathlib.Path(__file__).parent / "data" / fontfile
+    font = TTFont(recalcTimestamp=False)
+    font.importXML(path)
+    buf = io.BytesIO()
+    font.save(buf)
+    data = buf.getvalue()
+
+    def compile(font):
+        buf = io.BytesIO()
+        font.save(buf)
+        return buf.getvalue()
+
+    options = subset.Options(retain_gids=retain_gids, ignore_missing_unicodes=True)
+    prepared = subset.PreparedFont(
+        TTFont(io.BytesIO(data), recalcTimestamp=False), options)
+    unicodes = sorted(prepared.font.getBestCmap())
+    requests = [unicodes[:3], unicodes[-2:], unicodes[1::2], unicodes]
+    for request in requests:
+        font = TTFont(io.BytesIO(data), recalcTimestamp=False)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=request)
+        subsetter.subset(font)
+        expected = compile(font)
+
+        assert compile(prepared.subset(unicodes=request)) == expected
+
+
+
+def test_prepared_font_pairpos(monkeypatch):
+    fb = FontBuilder(unitsPerEm=1000)
+    glyphs = [".notdef"] + [chr(c) for c in range(ord("a"), ord("z") + 1)]
+    fb.setupGlyphOrder(glyphs)
+    fb.setupCharacterMap({ord(g): g for g in glyphs[1:]})
+    fb.setupNameTable({"familyName": "TestPairPos", "styleName": "Regular"})
+    fb.setupPost()
+    fb.addOpenTypeFeatures("""
+        @L1 = [a b c d];
+        @L2 = [e f];
+        @R1 = [g h i];
+        @R2 = [j k l m];
+        feature kern {
+            pos a g -10;
+            pos a z -20;
+            pos x y -30;
+            enum pos b [x y] -40;
+            subtable;
+            pos @L1 @R1 -50;
+            pos @L1 @R2 -60;
+            pos @L2 @R2 <0 0 -70 0>;
+        } kern;
+    """)
+    buf = io.BytesIO()
+    fb.save(buf)
+    data = buf.getvalue()
+
+    def compile(font):
+        buf = io.BytesIO()
+        font.save(buf)
+        return buf.getvalue()
+
+    options = subset.Options()
+    prepared = subset.PreparedFont(
+        TTFont(io.BytesIO(data), recalcTimestamp=False), options)
+    index = prepared.subset_indexes["GPOS"]
+    assert sorted(e["Format"] for e in index.subtables.values()) == [1, 2]
+    indexed = set()
+    for entry in index.subtables.values():
+        for records in entry.get("PairSet", []) + entry.get("Class1Record", []):
+            indexed.update(id(r) for r in records)
+    subsetFromIndex = index.subset_glyphs
+    results = []
+    def subset_glyphs(st, s):
+        results.append(subsetFromIndex(st, s))
+        return results[-1]
+    monkeypatch.setattr(index, "subset_glyphs", subset_glyphs)
+
+    for text in ["ag", "axyz", "bx", "aeg", "cj", "fm", "ejz", "q",
+                 "abcdefghijklmxyz"]:
+        font = TTFont(io.BytesIO(data), recalcTimestamp=False)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text=text)
+        subsetter.subset(font)
+
+        del results[:]
+        subsetFont = prepared.subset(text=text)
+        # The subtables were built from the index, not decompiled
+        assert len(results) == 2 and None not in results
+        if "GPOS" in subsetFont:
+            for lookup in subsetFont["GPOS"].table.LookupList.Lookup:
+                for st in lookup.SubTable:
+                    if st.Format == 1:
+                        records = [r for p in st.PairSet for r in p.PairValueRecord]
+                    else:
+                        records = [r for c in st.Class1Record for r in c.Class2Record]
+                    assert records
+                    # ... from copies of the indexed value records
+                    assert not any(id(r) in indexed for r in records)
+        assert compile(subsetFont) == compile(font), text
+
+
+def test_subset_cache(tmp_path, ttf_path):
+    from fontTools.subset.cache import SubsetCache, font_digest
+
+    data = ttf_path.read_bytes()
+    options = subset.Options(notdef_outline=True)
+    cache = SubsetCache(str(tmp_path / "cache"))
+
+    out = cache.subset(data, options, text="B")
+    font = subset.load_font(str(ttf_path), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text="B")
+    subsetter.subset(font)
+    buf = io.BytesIO()
+    subset.save_font(font, buf, options)
+    assert out == buf.getvalue()
+
+    # Same request, with the unicodes and list options in another order
+    key = cache.key(font_digest(data), options, text="B")
+    options2 = subset.Options(notdef_outline=True, verbose=True)
+    options2.layout_features.reverse()
+    assert cache.key(font_digest(data), options2, unicodes=[0x42]) == key
+    assert cache.key(font_digest(data), options, text="A") != key
+    assert cache.key(font_digest(data), subset.Options(), text="B") != key
+    assert cache.get(key) == out
+    cache.put(key, b"cached")
+    assert cache.subset(data, options, unicodes=[0x42]) == b"cached"
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == [key]
+
+
+def test_subset_cache_evict(tmp_path):
+    from fontTools.subset.cache import SubsetCache
+
+    cache = SubsetCache(str(tmp_path), max_size=30)
+    for i, key in enumerate("abc"):
+        cache.put(key, b"x" * 10)
+        os.utime(tmp_path / key, (i, i))
+    # "a" was used last, "b" is the least recently used
+    cache.get("a")
+    cache.put("d", b"x" * 15)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "d"]
+    assert cache.get("b") is None
+
+
+def test_glyph_dependency_graph():
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    fb = FontBuilder(unitsPerEm=1000)
+    glyphOrder = [".notdef", "A", "B", "C", "D", "E", "F"]
+    fb.setupGlyphOrder(glyphOrder)
+    fb.setupCharacterMap({ord("C"): "C", ord("F"): "F"})
+    glyphs = {}
+    for name in glyphOrder:
+        pen = TTGlyphPen(glyphOrder)
+        if name == "C":
+            pen.addComponent("D", (1, 0, 0, 1, 0, 0))
+        elif name == "F":
+            pen.addComponent("B", (1, 0, 0, 1, 0, 0))
+        else:
+            pen.moveTo((0, 0))
+            pen.lineTo((0, 100))
+            pen.lineTo((100, 0))
+            pen.closePath()
+        glyphs[name] = pen.glyph()
+    fb.setupGlyf(glyphs)
+    fb.setupHorizontalMetrics({name: (500, 0) for name in glyphOrder})
+    fb.setupHorizontalHeader()
+    # "D", a component of "C", has color layers
+    fb.setupCOLR({"D": [("E", 0)], "B": [("A", 0)]})
+    fb.setupCPAL([[(1, 0, 0, 1)]])
+    fb.setupNameTable({"familyName": "TestDeps", "styleName": "Regular"})
+    fb.setupOS2()
+    fb.setupPost()
+    buf = io.BytesIO()
+    fb.save(buf)
+
+    font = TTFont(buf)
+    graph = subset.GlyphDependencyGraph(font)
+    assert graph.dependencies("C") == [("D", "glyf")]
+    assert graph.closure(["C"]) == {"C", "D", "E"}
+    assert graph.closure(["C"], tags=["glyf"]) == {"C", "D"}
+    assert graph.export(["C", "D", "E"]) == {
+        "C": {"glyf": ["D"]}, "D": {"COLR": ["E"]}, "E": {}}
+
+    # The COLR layers of glyf components are retained, and so are their
+    # color glyph records
+    subsetter = subset.Subsetter()
+    subsetter.populate(text="CF")
+    report = subsetter.subset(font, profile=True)
+    assert font.getGlyphOrder() == glyphOrder
+    assert report["closure"]["glyf"] == 2
+    assert report["closure"]["COLR"] == 2
+    assert "closure" in report["tables"]["COLR"]["time"]
+    assert "closure" in report["tables"]["glyf"]["time"]
+    assert sorted(font["COLR"].ColorLayers) == ["B", "D"]
+    assert subsetter.glyphs_glyfed == set(glyphOrder)
+    assert subsetter.explain_glyph("E") == [
+        ("C", "cmap"), ("D", "glyf"), ("E", "COLR")]
+    assert subsetter.explain_glyph("A") == [
+        ("F", "cmap"), ("B", "glyf"), ("A", "COLR")]
+    assert subsetter.explain_glyph(".notdef") == [(".notdef", "notdef")]
+
+    # ... and the glyf components of COLR layers
+    font = TTFont(io.BytesIO(buf.getvalue()))
+    font["COLR"].ColorLayers["B"][0].name = "C"
+    subsetter = subset.Subsetter()
+    subsetter.populate(glyphs=["B"])
+    subsetter.subset(font)
+    assert font.getGlyphOrder() == [".notdef", "B", "C", "D", "E"]
+    assert sorted(font["COLR"].ColorLayers) == ["B", "D"]
+    assert subsetter.explain_glyph("E") == [
+        ("B", "requested"), ("C", "COLR"), ("D", "glyf"), ("E", "COLR")]
+    with pytest.raises(KeyError):
+        subsetter.explain_glyph("A")
+
+
+def test_prepared_font_pairpos_varstore():
+    path = (pathlib.Path(__file__).parent / ".." / "varLib" / "data" /
+            "PartialInstancerTest2-VF.ttx")
+    font = TTFont(recalcTimestamp=False)
+    font.importXML(path)
+    # Make all the PairPos device tables use the second VarStore item, for
+    # the subset to renumber it
+    pairPos = font["GPOS"].table.LookupList.Lookup[0].SubTable[0]
+    pairPos.Class1Record[2].Class2Record[2].Value1.XAdvDevice.EndSize = 1
+    buf = io.BytesIO()
+    font.save(buf)
+    data = buf.getvalue()
+
+    def compile(font):
+        buf = io.BytesIO()
+        font.save(buf)
+        return buf.getvalue()
+
+    # Remapping the GDEF VarStore must not change the indexed PairPos
+    # values of later subsets
+    options = subset.Options()
+    prepared = subset.PreparedFont(
+        TTFont(io.BytesIO(data), recalcTimestamp=False), options)
+    for glyphs in [["A", "T"], ["A", "T"], ["Agrave", "T"]]:
+        font = TTFont(io.BytesIO(data), recalcTimestamp=False)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(glyphs=glyphs)
+        subsetter.subset(font)
+
+        assert compile(prepared.subset(glyphs=glyphs)) == compile(font), glyphs
+
+
 if __name__ == "__main__":
     sys.exit(unittest.main())
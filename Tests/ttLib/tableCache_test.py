@@ -0,0 +1,124 @@
+from fontTools.misc.py23 import *
+from fontTools.misc.testTools import getXML
+from fontTools.ttLib import TTFont, TableCache
+import gc
+import os
+import pytest
+import weakref
+
+
+DATA_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), "data")
+
+
+@pytest.fixture
+def fontPath(tmpdir):
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, "TestTTF-Regular.ttx"))
+    path = str(tmpdir / "font.ttf")
+    font.save(path)
+    return path
+
+
+def test_lru_eviction():
+    cache = TableCache(maxSize=2)
+    keys = [TableCache.makeKey("name", b"data%d" % i) for i in range(3)]
+    cache[keys[0]] = "a"
+    cache[keys[1]] = "b"
+    assert cache.get(keys[0]) == "a"  # now most recently used
+    cache[keys[2]] = "c"
+    assert len(cache) == 2
+    assert keys[1] not in cache
+    assert cache.get(keys[1]) is None
+    assert cache.getStats() == {
+        "size": 2, "maxSize": 2, "hits": 1, "misses": 1, "evictions": 1}
+
+
+def test_makeKey():
+    digest = TableCache.digestGlyphOrder([".notdef", "A"])
+    # glyph order only matters for tables that depend on it
+    assert (TableCache.makeKey("name", b"abc", digest) ==
+            TableCache.makeKey("name", b"abc"))
+    assert (TableCache.makeKey("cmap", b"abc", digest) !=
+            TableCache.makeKey("cmap", b"abc"))
+    assert (TableCache.makeKey("cmap", b"abc") !=
+            TableCache.makeKey("cmap", b"abd"))
+
+
+def test_shared_between_fonts(fontPath):
+    cache = TableCache()
+    font1 = TTFont(fontPath, tableCache=cache)
+    tags = ("name", "cmap", "glyf")
+    for tag in tags:
+        font1[tag]
+    assert cache.hits == 0
+    misses = cache.misses
+
+    font2 = TTFont(fontPath, tableCache=cache)
+    for tag in tags:
+        assert font2[tag] is font1[tag]
+    assert cache.misses == misses
+    hits = cache.hits
+    # a hit is stored in the font, and not looked up again
+    font2["cmap"]
+    assert cache.hits == hits
+
+
+def test_different_glyph_order(fontPath):
+    cache = TableCache()
+    font1 = TTFont(fontPath, tableCache=cache)
+    font2 = TTFont(fontPath, tableCache=cache)
+    font2.setGlyphOrder(["glyph%d" % i for i in range(len(font1.getGlyphOrder()))])
+    assert font1["name"] is font2["name"]
+    assert font1["cmap"] is not font2["cmap"]
+    cmap = font1["cmap"].getBestCmap()
+    glyphID = font1.getGlyphID(cmap[0x20])
+    assert font2["cmap"].getBestCmap()[0x20] == "glyph%d" % glyphID
+
+
+def test_lazy_gvar_outlives_font(tmpdir):
+    font = TTFont()
+    font.importXML(os.path.join(
+        DATA_DIR, os.pardir, os.pardir, "varLib", "data",
+        "PartialInstancerTest-VF.ttx"))
+    path = str(tmpdir / "font.ttf")
+    font.save(path)
+    expected = TTFont(path)["gvar"].variations["hyphen"]
+
+    cache = TableCache()
+    font1 = TTFont(path, tableCache=cache)
+    font1["gvar"]
+    font1.close()
+    font2 = TTFont(path, tableCache=cache)
+    gvar = font2["gvar"]
+    assert gvar is font1["gvar"]
+    # the cached table was decompiled, and doesn't refer to the first font
+    assert gvar.variations.font is None
+    assert gvar.variations["hyphen"] == expected
+
+
+
+def test_lazy_font_not_kept(tmpdir):
+    font = TTFont()
+    font.importXML(os.path.join(
+        DATA_DIR, os.pardir, os.pardir, "varLib", "data",
+        "PartialInstancerTest2-VF.ttx"))
+    path = str(tmpdir / "font.ttf")
+    font.save(path)
+    tags = ("GDEF", "GPOS", "GSUB", "gvar")
+    font = TTFont(path)
+    expected = {tag: getXML(font[tag].toXML, font) for tag in tags}
+
+    cache = TableCache()
+    font1 = TTFont(path, lazy=True, tableCache=cache)
+    tables = {tag: font1[tag] for tag in tags}
+    font1.close()
+    ref = weakref.ref(font1)
+    del font1
+    gc.collect()
+    # the cached tables were decompiled, and don't keep the first font alive
+    assert ref() is None
+
+    font2 = TTFont(path, lazy=True, tableCache=cache)
+    for tag in tags:
+        assert font2[tag] is tables[tag]
+        assert getXML(font2[tag].toXML, font2) == expected[tag]
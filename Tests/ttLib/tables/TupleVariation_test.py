@@ -1,11 +1,16 @@
 from fontTools.misc.py23 import *
+from fontTools.misc.fixedTools import otRound
 from fontTools.misc.loggingTools import CapturingLogHandler
 from fontTools.misc.testTools import parseXML
 from fontTools.misc.textTools import deHexStr, hexStr
 from fontTools.misc.xmlWriter import XMLWriter
+from fontTools.ttLib.tables import TupleVariation as tupleVariation
 from fontTools.ttLib.tables.TupleVariation import \
-	log, TupleVariation, compileSharedTuples, decompileSharedTuples, \
+	log, TupleVariation, SparseDeltas, compileSharedTuples, decompileSharedTuples, \
 	compileTupleVariationStore, decompileTupleVariationStore, inferRegion_
+from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+import array
+import pytest
 import random
 import unittest
 
@@ -879,6 +884,90 @@ class TupleVariationTest(unittest.TestCase):
 
 		self.assertEqual(var1.coordinates, [0, 3, None, 7])
 
+	def test_coordinates_sparse(self):
+		var = TupleVariation({}, [None, (1, 2), None, (3, -4), None])
+		deltas = var.coordinates
+
+		self.assertEqual(deltas.points, array.array("I", [1, 3]))
+		self.assertEqual(deltas.x, array.array("i", [1, 3]))
+		self.assertEqual(deltas.y, array.array("i", [2, -4]))
+		self.assertEqual(len(deltas), 5)
+		self.assertEqual(deltas[3], (3, -4))
+		self.assertEqual(deltas[-1], None)
+		self.assertEqual(deltas[1:4], [(1, 2), None, (3, -4)])
+		self.assertIn(None, deltas)
+		with self.assertRaises(IndexError):
+			deltas[5]
+
+		deltas[0] = (5, 6)
+		deltas[3] = None
+		deltas[4] = (0.5, 0)
+		self.assertEqual(deltas, [(5, 6), (1, 2), None, None, (0.5, 0)])
+		self.assertEqual(deltas.points, array.array("I", [0, 1, 4]))
+		self.assertEqual(deltas.x.typecode, "d")
+		self.assertEqual(var.getUsedPoints(), {0, 1, 4})
+
+		# deltas of mixed widths are kept in a plain list
+		deltas[2] = 7
+		self.assertIsNone(deltas.points)
+		self.assertEqual(deltas, [(5, 6), (1, 2), 7, None, (0.5, 0)])
+		self.assertEqual(var.getUsedPoints(), {0, 1, 2, 4})
+
+	def test_coordinates_copy(self):
+		deltas = [(1, 2), None]
+		var = TupleVariation({}, deltas)
+		deltas[1] = (3, 4)
+		copy = TupleVariation({}, var.coordinates)
+		copy.coordinates[0] = None
+
+		self.assertEqual(var.coordinates, [(1, 2), None])
+		self.assertEqual(copy.coordinates, [None, None])
+		self.assertEqual(copy.getCoordWidth(), 0)
+
+	def test_coordinates_fromGlyphCoordinates(self):
+		var = TupleVariation({}, GlyphCoordinates([(1, 2), (3, 4)]))
+		self.assertEqual(var.coordinates, [(1, 2), (3, 4)])
+		self.assertEqual(var.coordinates.x.typecode, "i")
+
+		var = TupleVariation({}, GlyphCoordinates([(1.5, 2), (3, 4)]))
+		self.assertEqual(var.coordinates, [(1.5, 2.0), (3.0, 4.0)])
+		self.assertEqual(var.coordinates.x.typecode, "d")
+
+	def test_sparseDeltas_fromArrays(self):
+		deltas = SparseDeltas.fromArrays(4, range(4), [1, 2, 3, 4])
+		self.assertEqual(deltas, [1, 2, 3, 4])
+		deltas = SparseDeltas.fromArrays(4, [1, 3], [1, 2], [3, 4])
+		self.assertEqual(deltas, [None, (1, 3), None, (2, 4)])
+		# unsorted, repeated and out of range points
+		deltas = SparseDeltas.fromArrays(4, [3, 1, 3, 9], [1, 2, 3, 4])
+		self.assertEqual(deltas, [None, 2, None, 3])
+
+
+@pytest.mark.parametrize("useNumpy", [True, False])
+def test_sparseDeltas_arithmetic(useNumpy, monkeypatch):
+	if useNumpy:
+		pytest.importorskip("numpy")
+	else:
+		monkeypatch.setattr(tupleVariation, "numpy", None)
+	count = tupleVariation._numpyMinDeltas + 1
+	rng = random.Random(0)
+	deltas1 = [(rng.randint(-500, 500), rng.randint(-500, 500)) for _ in range(count)]
+	deltas2 = [(rng.randint(-500, 500), rng.randint(-500, 500)) for _ in range(count)]
+	var1 = TupleVariation({}, deltas1)
+	var2 = TupleVariation({}, deltas2)
+
+	var1.scaleDeltas(0.3)
+	assert var1.coordinates == [(x * 0.3, y * 0.3) for x, y in deltas1]
+	var1 += var2
+	expected = [(x1 * 0.3 + x2, y1 * 0.3 + y2)
+	            for (x1, y1), (x2, y2) in zip(deltas1, deltas2)]
+	assert var1.coordinates == expected
+	var1.roundDeltas()
+	assert var1.coordinates == [(otRound(x), otRound(y)) for x, y in expected]
+	assert var1.coordinates.x.typecode == "i"
+	var2 += var2
+	assert var2.coordinates == [(2 * x, 2 * y) for x, y in deltas2]
+
 
 if __name__ == "__main__":
 	import sys
@@ -351,6 +351,47 @@ class GlyfTableTest(unittest.TestCase):
         self.assertEqual(glyfData, b"\x00")
         self.assertEqual(list(font["loca"]), [0] * (font["maxp"].numGlyphs+1))
 
+    def test_compile_workers(self):
+        font = TTFont(sfntVersion="\x00\x01\x00\x00")
+        font.importXML(GLYF_TTX)
+        glyfTable = font['glyf']
+        glyfTable.workers = 2
+        glyfData = glyfTable.compile(font)
+        self.assertEqual(glyfData, self.glyfData)
+
+    def test_compileGlyphs_workers(self):
+        font = TTFont(sfntVersion="\x00\x01\x00\x00")
+        font.importXML(GLYF_TTX)
+        glyfTable = font['glyf']
+        glyfTable.glyphOrder = font.getGlyphOrder()
+        expected = glyfTable.compileGlyphs()
+        # recalculated in the worker processes
+        glyphName = next(g for g in glyfTable.glyphOrder
+                         if glyfTable[g].numberOfContours > 0)
+        glyph = glyfTable[glyphName]
+        glyph.coordinates.translate((10, 0))
+        expectedXMin = glyph.xMin + 10
+
+        dataList, locations = glyfTable.compileGlyphs(workers=2)
+
+        self.assertEqual(len(dataList), len(glyfTable.glyphOrder))
+        self.assertEqual(locations, expected[1])
+        self.assertEqual(glyph.xMin, expectedXMin)
+
+    def test_compile_optimizeSize(self):
+        font = TTFont(sfntVersion="\x00\x01\x00\x00")
+        font.importXML(GLYF_TTX)
+        glyfTable = font['glyf']
+        glyfTable.optimizeSize = True
+        glyfData = glyfTable.compile(font)
+        self.assertLessEqual(len(glyfData), len(self.glyfData))
+
+        glyfTable.decompile(glyfData, font)
+        out = UnicodeIO()
+        font.saveXML(out)
+        glyfXML = strip_ttLibVersion(out.getvalue()).splitlines()
+        self.assertEqual(glyfXML, self.glyfXML)
+
     def test_decompile_empty_table(self):
         font = TTFont()
         glyphNames = [".notdef", "space"]
@@ -472,6 +513,53 @@ class GlyphTest:
         )
 
 
+    @staticmethod
+    def decompileCoordinates(coordinates, flags):
+        glyph = Glyph()
+        glyph.numberOfContours = 2
+        glyph.endPtsOfContours = [9, len(coordinates) - 1]
+        glyph.coordinates = GlyphCoordinates(coordinates)
+        glyph.flags = array.array("B", flags)
+        glyph.program = ttProgram.Program()
+        glyph.program.fromBytecode(b"")
+        data = glyph.compileCoordinates()
+
+        glyph = Glyph()
+        glyph.numberOfContours = 2
+        glyph.decompileCoordinates(data)
+        return glyph
+
+    @pytest.mark.parametrize("useNumpy", [True, False])
+    def test_decompileCoordinates(self, useNumpy, monkeypatch):
+        from fontTools.ttLib.tables import _g_l_y_f
+        if useNumpy:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(_g_l_y_f, "numpy", None)
+        # exercise short, long, repeated and zero deltas in both directions
+        coordinates = [(0, 0), (0, 0), (0, 0), (10, -10), (-200, 255),
+                       (-200, 0), (20000, -20000), (0, 0), (-1, 1), (-1, 2)]
+        coordinates += [(i * 300 - 5000, (i % 7) * 40) for i in range(30)]
+        flags = [1, 1, 1, 0, 1, 0, 1, 1, 0, 0] + [i % 2 for i in range(30)]
+
+        glyph = self.decompileCoordinates(coordinates, flags)
+
+        assert list(glyph.coordinates) == coordinates
+        assert glyph.coordinates.array.typecode == "h"
+        assert glyph.flags == array.array("B", flags)
+        assert glyph.endPtsOfContours == [9, 39]
+
+    def test_decompileCoordinates_numpy_bad_flags(self):
+        from fontTools.ttLib.tables import _g_l_y_f
+        pytest.importorskip("numpy")
+        # a repeated flag that overshoots the number of points
+        data = bytes(bytearray([0x01 | 0x08 | 0x10 | 0x20, 20, 0, 0]))
+        assert _g_l_y_f._decompileCoordinatesNumpy(16, data) is None
+        # coordinate data that is too short
+        data = bytes(bytearray([0x01 | 0x08, 15, 0, 0]))
+        assert _g_l_y_f._decompileCoordinatesNumpy(16, data) is None
+
+
 class GlyphComponentTest:
 
     def test_toXML_no_transform(self):
@@ -179,6 +179,35 @@ class GVARTableTest(unittest.TestCase):
 		gvar.decompile(GVAR_DATA, font)
 		self.assertVariationsAlmostEqual(gvar.variations, GVAR_VARIATIONS)
 
+	def test_decompile_lazy(self):
+		font, gvar = self.makeFont({})
+		font.lazy = None
+		gvar.decompile(GVAR_DATA, font)
+		self.assertIsNotNone(gvar.variations.getRawData("I"))
+		self.assertVariationsAlmostEqual(
+			{"I": gvar.variations["I"]}, {"I": GVAR_VARIATIONS["I"]})
+		self.assertIsNone(gvar.variations.getRawData("I"))
+		self.assertIsNotNone(gvar.variations.getRawData("space"))
+
+	def test_decompile_notLazy(self):
+		font, gvar = self.makeFont({})
+		self.assertIs(font.lazy, False)
+		gvar.decompile(GVAR_DATA, font)
+		self.assertFalse(gvar.variations.hasRawData())
+
+	def test_compile_untouched(self):
+		font, gvar = self.makeFont({})
+		font.lazy = None
+		gvar.decompile(GVAR_DATA, font)
+		self.assertEqual(hexStr(gvar.compile(font)), hexStr(GVAR_DATA))
+		gvar.variations["I"][0].coordinates[0] = (30, 30)
+		data = gvar.compile(font)
+		gvar.decompile(data, font)
+		self.assertEqual(gvar.variations["I"][0].coordinates[0], (30, 30))
+		self.assertVariationsAlmostEqual(
+			{"space": gvar.variations["space"]},
+			{"space": GVAR_VARIATIONS["space"]})
+
 	def test_decompile_noVariations(self):
 		font, gvar = self.makeFont({})
 		gvar.decompile(GVAR_DATA_EMPTY_VARIATIONS, font)
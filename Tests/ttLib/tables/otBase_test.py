@@ -1,6 +1,8 @@
 from fontTools.misc.py23 import *
 from fontTools.misc.textTools import deHexStr
-from fontTools.ttLib.tables.otBase import OTTableReader, OTTableWriter
+from fontTools.ttLib.tables.otBase import (
+    BaseTTXConverter, OTTableReader, OTTableWriter)
+import copy
 import unittest
 
 
@@ -89,6 +91,79 @@ class OTTableWriterTest(unittest.TestCase):
         writer.writeULong(0xBEEFCAFE)
         self.assertEqual(writer.getData(), deHexStr("BE EF CA FE"))
 
+    def test_getAllData(self):
+        writer = OTTableWriter()
+        writer.writeUShort(0xAAAA)
+        for value in (1, 1, 2):
+            subWriter = writer.getSubWriter()
+            subWriter.writeUShort(value)
+            subWriter.writeUShort(0xCCCC)
+            writer.writeSubTable(subWriter)
+        writer.writeUShort(0xBBBB)
+        # identical subtables are shared
+        self.assertEqual(
+            writer.getAllData(),
+            deHexStr("AAAA 000A 000A 000E BBBB 0001 CCCC 0002 CCCC"))
+        # the table can be assembled again
+        self.assertEqual(
+            writer.getAllData(),
+            deHexStr("AAAA 000A 000A 000E BBBB 0001 CCCC 0002 CCCC"))
+
+
+class BaseTTXConverterTest(unittest.TestCase):
+
+    @staticmethod
+    def makeFont(numGlyphs, numLookups):
+        from fontTools.otlLib import builder
+        from fontTools.ttLib import TTFont, newTable
+        from fontTools.ttLib.tables import otTables
+
+        glyphs = [".notdef"] + ["g%d" % i for i in range(numGlyphs)]
+        font = TTFont()
+        font.setGlyphOrder(glyphs)
+        glyphMap = font.getReverseGlyphMap()
+        lookups = []
+        for k in range(numLookups):
+            pairs = {}
+            for i in range(1, numGlyphs):
+                for j in range(k, numGlyphs):
+                    value = (i * 31 + j * 7 + k) % 1000 - 500 or 1
+                    pairs[(glyphs[i], glyphs[j])] = (
+                        builder.buildValue({"XAdvance": value}), None)
+            lookups.append(builder.buildLookup(
+                [builder.buildPairPosGlyphsSubtable(pairs, glyphMap)]))
+        gpos = otTables.GPOS()
+        gpos.Version = 0x00010000
+        gpos.ScriptList = otTables.ScriptList()
+        gpos.ScriptList.ScriptRecord = []
+        gpos.FeatureList = otTables.FeatureList()
+        gpos.FeatureList.FeatureRecord = []
+        gpos.LookupList = otTables.LookupList()
+        gpos.LookupList.Lookup = lookups
+        font["GPOS"] = newTable("GPOS")
+        font["GPOS"].table = gpos
+        return font
+
+    def test_compile_overflow(self):
+        # both the subtables and the lookup list overflow
+        font = self.makeFont(140, 2)
+        expectedFont = copy.deepcopy(font)
+
+        data = font["GPOS"].compile(font)
+
+        # the same, but recompiling the whole table after each overflow fix
+        recompileLookups = BaseTTXConverter._recompileLookups
+        BaseTTXConverter._recompileLookups = lambda *args: False
+        try:
+            expected = expectedFont["GPOS"].compile(expectedFont)
+        finally:
+            BaseTTXConverter._recompileLookups = recompileLookups
+
+        self.assertEqual(data, expected)
+        lookups = font["GPOS"].table.LookupList.Lookup
+        self.assertEqual(lookups[0].LookupType, 9)
+        self.assertGreater(len(lookups[0].SubTable), 1)
+
 
 if __name__ == "__main__":
     import sys
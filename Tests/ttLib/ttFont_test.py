@@ -0,0 +1,198 @@
+from fontTools.misc.py23 import *
+from fontTools.ttLib import TTFont, TTLibError, getTableClass
+import copy
+import os
+import pytest
+
+
+DATA_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), "data")
+
+
+@pytest.fixture(params=["TestTTF-Regular.ttx", "TestOTF-Regular.otx"])
+def fontPath(request, tmpdir):
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, request.param))
+    path = str(tmpdir / "font.bin")
+    font.save(path)
+    return path
+
+
+def _dumpXML(font):
+    buf = StringIO()
+    font.saveXML(buf)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("lazy", [None, False, True])
+def test_mmap_decompile(fontPath, lazy):
+    expected = _dumpXML(TTFont(fontPath, lazy=lazy))
+
+    font = TTFont(fontPath, mmap=True, lazy=lazy)
+    assert isinstance(font.reader["head"], memoryview)
+    assert _dumpXML(font) == expected
+    font.close()
+
+
+def test_mmap_zero_copy(fontPath):
+    font = TTFont(fontPath, mmap=True)
+    if "glyf" in font:
+        glyph = font["glyf"].glyphs["period"]
+        assert isinstance(glyph.data, memoryview)
+    # tables that can't handle memoryviews get a bytes copy
+    assert font["name"].getDebugName(1)
+    font.close()
+
+
+def test_mmap_save(fontPath):
+    font = TTFont(fontPath)
+    expected = BytesIO()
+    font["hmtx"]
+    font.save(expected)
+
+    font = TTFont(fontPath, mmap=True)
+    font["hmtx"]
+    buf = BytesIO()
+    font.save(buf)
+    assert buf.getvalue() == expected.getvalue()
+
+
+def test_mmap_deepcopy(fontPath):
+    font = TTFont(fontPath, mmap=True, lazy=True)
+    for tag in font.keys():
+        font[tag]
+    copied = copy.deepcopy(font)
+    font.close()
+    assert _dumpXML(copied) == _dumpXML(TTFont(fontPath, lazy=True))
+
+
+def test_mmap_cant_overwrite(fontPath):
+    font = TTFont(fontPath, mmap=True)
+    with pytest.raises(TTLibError, match="mmap"):
+        font.save(fontPath)
+
+
+def test_mmap_empty_file(tmpdir):
+    path = tmpdir / "empty.ttf"
+    path.write_binary(b"")
+    with pytest.raises(TTLibError, match="not enough data"):
+        TTFont(str(path), mmap=True)
+    with path.open("rb") as f:
+        with pytest.raises(TTLibError, match="not enough data"):
+            TTFont(f, mmap=True)
+
+
+def test_reuseUnmodifiedTables(fontPath, monkeypatch):
+    compiled = []
+    nameTableClass = getTableClass("name")
+    origCompile = nameTableClass.compile
+
+    def compile(self, ttFont):
+        compiled.append(self.tableTag)
+        return origCompile(self, ttFont)
+
+    monkeypatch.setattr(nameTableClass, "compile", compile)
+
+    font = TTFont(fontPath, reuseUnmodifiedTables=True, recalcTimestamp=False)
+    for tag in font.keys():
+        font[tag]
+    buf = BytesIO()
+    font.save(buf)
+    assert not compiled
+    assert TTFont(buf).reader["name"] == TTFont(fontPath).reader["name"]
+
+    font["name"].setName("Foo", 1, 3, 1, 0x409)
+    buf = BytesIO()
+    font.save(buf)
+    assert compiled == ["name"]
+    assert TTFont(buf)["name"].getName(1, 3, 1, 0x409).toUnicode() == "Foo"
+
+
+def test_reuseUnmodifiedTables_dependencies(fontPath):
+    font = TTFont(fontPath, reuseUnmodifiedTables=True, recalcTimestamp=False)
+    for tag in font.keys():
+        font[tag]
+    assert {"hmtx", "hhea", "maxp", "head", "post"} <= font._getUnmodifiedTables()
+
+    font["hmtx"][".notdef"] = (1, 0)
+    unmodified = font._getUnmodifiedTables()
+    assert "hmtx" not in unmodified
+    # 'hhea' is recalculated from 'hmtx'
+    assert "hhea" not in unmodified
+    assert "post" in unmodified
+
+    font.setGlyphOrder(font.getGlyphOrder()[:-1] + ["foo"])
+    assert "post" not in font._getUnmodifiedTables()
+
+
+def test_reuseUnmodifiedTables_recalcTimestamp(fontPath):
+    font = TTFont(fontPath, reuseUnmodifiedTables=True)
+    font["head"]
+    assert "head" not in font._getUnmodifiedTables()
+
+
+@pytest.mark.parametrize("lazy", [None, True])
+def test_save_workers(fontPath, lazy):
+    font = TTFont(fontPath, recalcTimestamp=False)
+    for tag in font.keys():
+        font[tag]
+    expected = BytesIO()
+    font.save(expected)
+
+    font = TTFont(fontPath, recalcTimestamp=False, lazy=lazy)
+    for tag in font.keys():
+        font[tag]
+    buf = BytesIO()
+    font.save(buf, workers=2)
+    assert buf.getvalue() == expected.getvalue()
+    # the tables others depend on were compiled in this process
+    if "loca" in font:
+        assert font["head"].indexToLocFormat == TTFont(buf)["head"].indexToLocFormat
+
+
+def test_save_workers_recalcTables(fontPath):
+    fonts = []
+    for workers in (None, 2):
+        font = TTFont(fontPath, recalcTimestamp=False)
+        for tag in font.keys():
+            font[tag]
+        font["hhea"].advanceWidthMax = 1
+        font["maxp"].maxPoints = 1
+        font.save(BytesIO(), workers=workers)
+        fonts.append(font)
+
+    serial, parallel = fonts
+    assert serial["hhea"].advanceWidthMax != 1
+    # the values recalculated by compile() are kept in the saved font
+    for tag in ("head", "hhea", "maxp", "OS/2"):
+        if tag in serial:
+            expected = dict(serial[tag].__dict__)
+            values = dict(parallel[tag].__dict__)
+            if tag == "OS/2":
+                assert values.pop("panose").__dict__ == expected.pop("panose").__dict__
+            assert values == expected
+
+
+class UnseekableBytesIO(BytesIO):
+
+    def seekable(self):
+        return False
+
+
+@pytest.mark.parametrize("flavor", [None, "woff"])
+@pytest.mark.parametrize("reorderTables", [True, False, None])
+def test_save_streaming(fontPath, flavor, reorderTables):
+    font = TTFont(fontPath, recalcTimestamp=False)
+    font.flavor = flavor
+    for tag in font.keys():
+        font[tag]
+    expected = UnseekableBytesIO()
+    font.save(expected, reorderTables=reorderTables)
+
+    font = TTFont(fontPath, recalcTimestamp=False)
+    font.flavor = flavor
+    for tag in font.keys():
+        font[tag]
+    buf = BytesIO()
+    font.save(buf, reorderTables=reorderTables)
+    assert buf.getvalue() == expected.getvalue()
+    TTFont(buf, checkChecksums=2)
@@ -644,6 +644,29 @@ class WOFF2WriterTTFTest(WOFF2WriterTest):
 		reader = WOFF2Reader(writer.file)
 		self.assertEqual(len(reader.flavorData.transformedTables), 0)
 
+	def test_setGlyfTable(self):
+		writer = WOFF2Writer(BytesIO(), self.numTables, self.font.sfntVersion)
+		for tag in self.tags:
+			writer[tag] = self.font.getTableData(tag)
+		writer.close()
+
+		# the loaded 'glyf' table is passed to the writer, rather than
+		# compiled, decompiled and compiled again with 4-byte padding
+		glyfTable = self.font['glyf']
+		padding = glyfTable.padding
+		writer2 = WOFF2Writer(BytesIO(), self.numTables, self.font.sfntVersion)
+		self.assertTrue(writer2.setGlyfTable(glyfTable))
+		self.assertIs(writer2.ttFont['glyf'].glyphs, glyfTable.glyphs)
+
+		tmp = BytesIO()
+		self.font.save(tmp)
+		self.assertEqual(glyfTable.padding, padding)
+		self.assertEqual(tmp.getvalue(), writer.file.getvalue())
+
+		writer3 = WOFF2Writer(BytesIO(), self.numTables, self.font.sfntVersion)
+		writer3.flavorData = WOFF2FlavorData(transformedTables=())
+		self.assertFalse(writer3.setGlyfTable(glyfTable))
+
 
 class WOFF2LocaTableTest(unittest.TestCase):
 
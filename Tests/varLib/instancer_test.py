@@ -143,6 +143,15 @@ class InstantiateGvarTest(object):
 
         assert "gvar" not in varfont
 
+    def test_optimize_workers(self, varfont):
+        varfont2 = deepcopy(varfont)
+        instancer.instantiateGvar(varfont, {"wdth": -0.5})
+        instancer.instantiateGvar(varfont2, {"wdth": -0.5}, workers=2)
+
+        variations = varfont["gvar"].variations
+        assert any(None in t.coordinates for t in variations["hyphen"])
+        assert variations == varfont2["gvar"].variations
+
     def test_composite_glyph_not_in_gvar(self, varfont):
         """ The 'minus' glyph is a composite glyph, which references 'hyphen' as a
         component, but has no tuple variations in gvar table, so the component offset
@@ -1447,6 +1456,53 @@ class InstantiateVariableFontTest(object):
         assert _dump_ttx(instance) == expected
 
 
+class PreparedInstancerTest(object):
+    def test_multiple_instances(self, varfont2):
+        preparedInstancer = instancer.PreparedInstancer(varfont2)
+
+        for wght, wdth in [
+            (100, 100), (400, 100), (900, 100), (100, 62.5), (400, 62.5), (900, 62.5)
+        ]:
+            instance = preparedInstancer.instantiate({"wght": wght, "wdth": wdth})
+
+            expected = _get_expected_instance_ttx(wght, wdth)
+
+            assert _dump_ttx(instance) == expected
+
+    def test_default_instance(self, varfont2):
+        preparedInstancer = instancer.PreparedInstancer(varfont2)
+
+        instance = preparedInstancer.instantiate({"wght": None})
+
+        assert _dump_ttx(instance) == _get_expected_instance_ttx(400, 100)
+
+    @pytest.mark.parametrize(
+        "location", [{"wght": 100, "wdth": 100}, {"wght": 650, "wdth": 80}]
+    )
+    def test_same_as_instantiateVariableFont(self, location):
+        def loadVarfont():
+            f = ttLib.TTFont(recalcTimestamp=False)
+            f.importXML(os.path.join(TESTDATA, "PartialInstancerTest-VF.ttx"))
+            return f
+
+        # this font also has 'cvar', 'MVAR' and 'vmtx' tables
+        preparedInstancer = instancer.PreparedInstancer(loadVarfont())
+        instance = preparedInstancer.instantiate(location)
+
+        expected = instancer.instantiateVariableFont(loadVarfont(), location)
+
+        assert "fvar" not in instance
+        assert _dump_ttx(instance) == _dump_ttx(expected)
+
+    def test_invalid_location(self, varfont):
+        preparedInstancer = instancer.PreparedInstancer(varfont)
+
+        with pytest.raises(ValueError, match="not present in fvar"):
+            preparedInstancer.instantiate({"ZZZZ": 0})
+        with pytest.raises(NotImplementedError, match="only makes full instances"):
+            preparedInstancer.instantiate({"wght": (100, 900)})
+
+
 def _conditionSetAsDict(conditionSet, axisOrder):
     result = {}
     for cond in conditionSet.ConditionTable:
@@ -0,0 +1,83 @@
+from fontTools.varLib import iup
+from fontTools.varLib.iup import (
+    iup_delta, iup_delta_optimize, iup_delta_optimize_glyphs)
+import math
+import pytest
+
+
+PHANTOMS = [(0, 0)] * 4
+
+
+def circle(n):
+    coords = [
+        (round(500 + 400 * math.cos(2 * math.pi * k / n)),
+         round(500 + 400 * math.sin(2 * math.pi * k / n)))
+        for k in range(n)
+    ]
+    # deltas that mostly interpolate, with a few bumps
+    deltas = [(round(x * 0.1) + (k % 7 == 0), round(y * 0.05) - (k % 11 == 0))
+              for k, (x, y) in enumerate(coords)]
+    return deltas + PHANTOMS, coords + PHANTOMS, [n - 1]
+
+
+class IupTest(object):
+
+    @pytest.mark.parametrize(
+        "coords, deltas, expected",
+        [
+            (
+                [(0, 0), (10, 0), (10, 10), (0, 10)],
+                [(0, 0), (5, 0), (5, 5), (0, 5)],
+                [None, (5, 0), None, (0, 5)],
+            ),
+            (
+                [(0, 0), (10, 0), (20, 0), (20, 10), (10, 10), (0, 10)],
+                [(0, 0), (1, 0), (2, 0), (2, 1), (1, 1), (0, 1)],
+                [None, None, (2, 0), None, None, (0, 1)],
+            ),
+            (
+                [(0, 0), (10, 0), (20, 0), (20, 10), (10, 10), (0, 10)],
+                [(0, 0), (3, 0), (2, 0), (2, 1), (1, 1), (0, 1)],
+                [(0, 0), (3, 0), None, (2, 1), None, None],
+            ),
+            (
+                [(0, 0), (100, 0), (100, 100), (0, 100)],
+                [(1, 1), (1, 1), (1, 1), (1, 1)],
+                [(1, 1), None, None, None],
+            ),
+        ],
+    )
+    def test_iup_delta_optimize(self, coords, deltas, expected):
+        result = iup_delta_optimize(
+            deltas + PHANTOMS, coords + PHANTOMS, [len(coords) - 1],
+            tolerance=0.5)
+
+        assert result == expected + [None] * 4
+
+    @pytest.mark.parametrize("n", [8, 40, 100])
+    def test_iup_delta_optimize_numpy(self, n, monkeypatch):
+        pytest.importorskip("numpy")
+        deltas, coords, ends = circle(n)
+
+        result = iup_delta_optimize(deltas, coords, ends, tolerance=0.5)
+        monkeypatch.setattr(iup, "numpy", None)
+        expected = iup_delta_optimize(deltas, coords, ends, tolerance=0.5)
+
+        assert result == expected
+
+    @pytest.mark.parametrize("tolerance", [0, 0.5, 2])
+    def test_iup_delta_optimize_within_tolerance(self, tolerance):
+        deltas, coords, ends = circle(60)
+
+        result = iup_delta_optimize(deltas, coords, ends, tolerance=tolerance)
+
+        assert None in result
+        for (x, y), (p, q) in zip(deltas, iup_delta(result, coords, ends)):
+            assert abs(complex(x - p, y - q)) <= tolerance
+
+    def test_iup_delta_optimize_glyphs(self):
+        glyphs = [circle(n) for n in (5, 20, 40, 60)]
+        expected = [iup_delta_optimize(*glyph, tolerance=0.5) for glyph in glyphs]
+
+        assert iup_delta_optimize_glyphs(glyphs, 0.5) == expected
+        assert iup_delta_optimize_glyphs(glyphs, 0.5, workers=2) == expected
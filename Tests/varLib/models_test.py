@@ -1,6 +1,8 @@
 from fontTools.misc.py23 import *
+from fontTools.varLib import models
 from fontTools.varLib.models import (
     normalizeLocation, supportScalar, VariationModel, VariationModelError)
+from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
 import pytest
 
 
@@ -153,3 +155,46 @@ class VariationModelTest(object):
                     {"bar": 1.0, "foo": 1.0},
                 ]
             )
+
+    @pytest.mark.parametrize("useNumpy", [True, False])
+    def test_getScalarsForLocations(self, useNumpy, monkeypatch):
+        if useNumpy:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(models, "numpy", None)
+        model = VariationModel(
+            [{}, {'wght': 1.0}, {'wght': 0.5}, {'wdth': 1.0}, {'wght': -1.0},
+             {'wght': 1.0, 'wdth': 1.0}, {'wght': 0.5, 'wdth': 0.25}])
+        locations = [{}, {'wght': 0.75}, {'wght': -0.3, 'wdth': 0.6},
+                     {'wght': 0.5, 'wdth': 0.25}, {'wght': 0.9, 'wdth': 1.0},
+                     {'wdth': 2.0, 'opsz': 1.0}] + model.locations
+
+        assert model.getScalarsForLocations(locations) == [
+            model.getScalars(loc) for loc in locations]
+        assert model.getScalarsForLocations([]) == []
+
+    @pytest.mark.parametrize("useNumpy", [True, False])
+    def test_getDeltaArrays(self, useNumpy, monkeypatch):
+        if useNumpy:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(models, "numpy", None)
+        model = VariationModel(
+            [{'wght': 1.0}, {}, {'wght': 0.3}, {'wdth': 1.0},
+             {'wght': 1.0, 'wdth': 1.0}, {'wght': 0.3, 'wdth': 0.7}])
+        masterCoords = [
+            [(0, 0), (100, 700), (500, -30)],
+            [(10, 0), (90, 650), (450, -30)],
+            [(7, 1), (93, 671), (470, -29)],
+            [(10, 0), (130, 650), (600, -30)],
+            [(2, 5), (141, 707), (643, -31)],
+            [(9, 3), (122, 671), (581, -30)],
+        ]
+        expected = model.getDeltas(
+            [GlyphCoordinates(coords) for coords in masterCoords])
+
+        deltas = model.getDeltaArrays(
+            [GlyphCoordinates(coords).array for coords in masterCoords])
+
+        assert [list(d) for d in deltas] == [list(e.array) for e in expected]
+        assert all(d.typecode == 'd' for d in deltas)
@@ -318,6 +318,31 @@ class BuildTest(unittest.TestCase):
         tables = ["fvar", "CFF2"]
         self.expect_ttx(varfont, expected_ttx_path, tables)
 
+    def test_varlib_build_CFF2_subroutinize(self):
+        from fontTools.cffLib.subroutinizer import desubroutinize
+        ds_path = self.get_test_input('TestCFF2.designspace')
+        ttx_dir = self.get_test_input("master_cff2")
+        expected_ttx_path = self.get_test_output("BuildTestCFF2.ttx")
+
+        self.temp_dir()
+        for path in self.get_file_list(ttx_dir, '.ttx', 'TestCFF2_'):
+            self.compile_font(path, ".otf", self.tempdir)
+
+        ds = DesignSpaceDocument.fromfile(ds_path)
+        for source in ds.sources:
+            source.path = os.path.join(
+                self.tempdir, os.path.basename(source.filename).replace(".ufo", ".otf")
+            )
+        ds.updatePaths()
+
+        varfont, _, _ = build(ds, subroutinize=True)
+        varfont = reload_font(varfont)
+
+        # Flattening the subroutines gives back the usual charstrings
+        desubroutinize(varfont["CFF2"].cff)
+        tables = ["fvar", "CFF2"]
+        self.expect_ttx(varfont, expected_ttx_path, tables)
+
     def test_varlib_build_CFF2_from_CFF2(self):
         ds_path = self.get_test_input('TestCFF2Input.designspace')
         ttx_dir = self.get_test_input("master_cff2_input")
@@ -501,6 +526,15 @@ class BuildTest(unittest.TestCase):
         tables = [table_tag for table_tag in varfont.keys() if table_tag != "head"]
         self.expect_ttx(varfont, expected_ttx_path, tables)
 
+    def test_varlib_build_sparse_masters_workers(self):
+        ds_path = self.get_test_input("SparseMasters.designspace")
+        expected_ttx_path = self.get_test_output("SparseMasters.ttx")
+
+        varfont, _, _ = build(ds_path, workers=2)
+        varfont = reload_font(varfont)
+        tables = [table_tag for table_tag in varfont.keys() if table_tag != "head"]
+        self.expect_ttx(varfont, expected_ttx_path, tables)
+
     def test_varlib_build_lazy_masters(self):
         # See https://github.com/fonttools/fonttools/issues/1808
         ds_path = self.get_test_input("SparseMasters.designspace")